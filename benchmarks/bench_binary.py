@@ -0,0 +1,74 @@
+"""Compare lookups in a binary index with lookups in a SQLite index.
+
+Builds both indexes for 2,000 synthetic projects, each with 50 releases
+of an sdist and 4 wheels, then times looking up every project, both on
+its own and through a Finder.
+
+    python benchmarks/bench_binary.py
+"""
+
+import os
+import tempfile
+import timeit
+
+from packaging.requirements import Requirement
+from packaging.tags import sys_tags
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder
+from shadwell.sources.binary import BinaryIndexSource, build_index
+from shadwell.sources.sqlite import SQLiteSource
+
+PROJECTS = 2000
+RELEASES = 50
+WHEEL_TAGS = [
+    "py3-none-any",
+    "cp311-cp311-manylinux_2_17_x86_64",
+    "cp312-cp312-manylinux_2_17_x86_64",
+    "cp312-cp312-win_amd64",
+]
+
+
+def synthetic(name):
+    files = []
+    for i in range(RELEASES):
+        version = "1.{}".format(i)
+        files.append("{}-{}.tar.gz".format(name, version))
+        files.extend("{}-{}-{}.whl".format(name, version, t) for t in WHEEL_TAGS)
+    return [
+        CompactCandidate.from_filename(f, ">=3.8", url="https://example.com/" + f)
+        for f in files
+    ]
+
+
+def main():
+    names = ["project{}".format(i) for i in range(PROJECTS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteSource(os.path.join(tmp, "index.db"))
+        for name in names:
+            sqlite.add_project(name, synthetic(name))
+        binary_path = os.path.join(tmp, "index.bin")
+        build_index(binary_path, sqlite, names)
+        binary = BinaryIndexSource(binary_path)
+        print(
+            "{} projects, {} files, binary index {:.1f} MB".format(
+                PROJECTS,
+                PROJECTS * RELEASES * (1 + len(WHEEL_TAGS)),
+                os.path.getsize(binary_path) / 1e6,
+            )
+        )
+
+        for label, src in [("sqlite", sqlite), ("binary", binary)]:
+            t = timeit.timeit(lambda: [list(src(n)) for n in names], number=1)
+            print("{:8} lookup  {:7.1f} us/project".format(label, t / PROJECTS * 1e6))
+            finder = Finder(sources=[src], compatibility_tags=list(sys_tags()))
+            reqs = [Requirement(n) for n in names]
+            t = timeit.timeit(
+                lambda: [finder.get_candidates(r) for r in reqs], number=1
+            )
+            print("{:8} finder  {:7.1f} us/project".format(label, t / PROJECTS * 1e6))
+        binary.close()
+
+
+if __name__ == "__main__":
+    main()
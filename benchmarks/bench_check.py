@@ -0,0 +1,83 @@
+"""Measure how checking a metadata dump scales with worker processes.
+
+Builds a synthetic dump of 4,000 projects, each with 20 releases of an
+sdist and 3 wheels, then checks it in this process, and with pools of
+increasing size, reporting files checked per second.
+
+    python benchmarks/bench_check.py
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from shadwell.check import check_dump
+
+PROJECTS = 4000
+RELEASES = 20
+WHEEL_TAGS = [
+    "py3-none-any",
+    "cp312-cp312-win_amd64",
+    "cp312-cp312-musllinux_1_1_x86_64",
+]
+
+
+def project_data(name):
+    releases = {}
+    for i in range(RELEASES):
+        version = "1.{}".format(i)
+        files = ["{}-{}.tar.gz".format(name, version)]
+        files.extend("{}-{}-{}.whl".format(name, version, t) for t in WHEEL_TAGS)
+        releases[version] = [
+            {
+                "filename": f,
+                "url": "https://example.com/" + f,
+                "requires_python": ">=3.8",
+                "packagetype": "bdist_wheel" if f.endswith(".whl") else "sdist",
+                "yanked": False,
+            }
+            for f in files
+        ]
+    return json.dumps({"info": {}, "releases": releases})
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.db")
+        db = sqlite3.connect(dump)
+        db.execute("CREATE TABLE package_data_json (name TEXT, json TEXT)")
+        db.executemany(
+            "INSERT INTO package_data_json VALUES (?, ?)",
+            (
+                ("project{}".format(i), project_data("project{}".format(i)))
+                for i in range(PROJECTS)
+            ),
+        )
+        db.commit()
+        db.close()
+
+        counts = [0]
+        n = 1
+        while n <= (os.cpu_count() or 1):
+            counts.append(n)
+            n *= 2
+        for processes in counts:
+            start = time.perf_counter()
+            if processes:
+                with ProcessPoolExecutor(processes) as executor:
+                    summary = check_dump(dump, executor=executor)
+            else:
+                summary = check_dump(dump)
+            elapsed = time.perf_counter() - start
+            print(
+                "{:2} processes: {:9.0f} files/s".format(
+                    processes, summary.files / elapsed
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
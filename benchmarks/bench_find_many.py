@@ -0,0 +1,73 @@
+"""Compare Finder.find_many with calling get_candidates in a loop.
+
+Resolves 500 requirements (over 400 distinct projects) against a source
+that simulates 5ms of network latency per project lookup.
+
+    python benchmarks/bench_find_many.py
+"""
+
+import time
+
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import Candidate
+from shadwell.finder import Finder
+
+PROJECTS = 400
+REQUIREMENTS = 500
+LATENCY = 0.005
+
+
+class BenchCandidate(Candidate):
+    def __init__(self, filename):
+        self.attributes_from_filename(filename)
+        self.requires_python = SpecifierSet()
+        self.is_yanked = False
+
+
+def source(name):
+    time.sleep(LATENCY)
+    for minor in range(20):
+        version = "1.{}".format(minor)
+        yield BenchCandidate("{}-{}.tar.gz".format(name, version))
+        yield BenchCandidate("{}-{}-py3-none-any.whl".format(name, version))
+
+
+def requirements():
+    reqs = []
+    for i in range(REQUIREMENTS):
+        project = "project{}".format(i % PROJECTS)
+        spec = ">=1.{}".format(i % 7) if i >= PROJECTS else ""
+        reqs.append(Requirement(project + spec))
+    return reqs
+
+
+def main():
+    finder = Finder(
+        [source],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.9"),
+    )
+    reqs = requirements()
+
+    start = time.perf_counter()
+    loop = {req: finder.get_candidates(req) for req in reqs}
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = finder.find_many(reqs)
+    batch_time = time.perf_counter() - start
+
+    assert {r: [c.version for c in cs] for r, cs in loop.items()} == {
+        r: [c.version for c in cs] for r, cs in batch.items()
+    }
+    print("{} requirements, {} projects".format(len(reqs), PROJECTS))
+    print("get_candidates loop {:8.3f} s".format(loop_time))
+    print("find_many           {:8.3f} s".format(batch_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare the memory used by Candidate and CompactCandidate objects.
+
+Builds candidates for a synthetic project shaped like a large PyPI
+project: 1,500 releases, each with an sdist and 30 platform wheels, and a
+handful of distinct Requires-Python values.
+
+    python benchmarks/bench_memory.py
+"""
+
+import gc
+import tracemalloc
+
+from packaging.specifiers import SpecifierSet
+
+from shadwell.candidate import Candidate, CandidatePool, CompactCandidate
+
+RELEASES = 1500
+REQUIRES_PYTHON = [None, ">=3.6", ">=3.7", ">=3.8", ">=3.9"]
+PLATFORMS = [
+    "manylinux_2_17_x86_64.manylinux2014_x86_64",
+    "manylinux_2_17_aarch64.manylinux2014_aarch64",
+    "musllinux_1_1_x86_64",
+    "macosx_10_9_x86_64",
+    "macosx_11_0_arm64",
+    "win_amd64",
+]
+PYTHONS = ["cp38", "cp39", "cp310", "cp311", "cp312"]
+
+
+def files():
+    for i in range(RELEASES):
+        version = "{}.{}.{}".format(i // 100, (i // 10) % 10, i % 10)
+        spec = REQUIRES_PYTHON[i * len(REQUIRES_PYTHON) // RELEASES]
+        yield "bigproject-{}.tar.gz".format(version), spec
+        for py in PYTHONS:
+            for plat in PLATFORMS:
+                yield "bigproject-{}-{}-{}-{}.whl".format(version, py, py, plat), spec
+
+
+def plain(filename, spec):
+    c = Candidate()
+    c.attributes_from_filename(filename)
+    c.requires_python = SpecifierSet(spec or "")
+    c.is_yanked = False
+    c.url = "https://files.example.com/" + filename
+    return c
+
+
+def compact(pool):
+    def make(filename, spec):
+        return CompactCandidate.from_filename(
+            filename, spec, url="https://files.example.com/" + filename, pool=pool
+        )
+
+    return make
+
+
+def measure(make):
+    data = list(files())
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    candidates = [make(filename, spec) for filename, spec in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(candidates), after - before
+
+
+def main():
+    for label, make in [
+        ("Candidate", plain),
+        ("CompactCandidate", compact(CandidatePool())),
+    ]:
+        count, size = measure(make)
+        print(
+            "{:<17} {} candidates, {:7.1f} MB, {:5.0f} bytes each".format(
+                label, count, size / 1024 / 1024, size / count
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
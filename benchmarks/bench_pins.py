@@ -0,0 +1,79 @@
+"""Time exact-pin lookups on a large project.
+
+The project has 3,000 releases, each with an sdist and 4 wheels, in a
+SQLite index and a binary index. A pinned requirement is looked up
+through each index's query (which reads only the pinned release), through
+a CoalescingSource over the SQLite index (which is read in version order
+and stopped below the pin), and through a plain function wrapping the
+SQLite index, which has to return every file.
+
+    python benchmarks/bench_pins.py
+"""
+
+import os
+import tempfile
+import timeit
+
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder
+from shadwell.sources.binary import BinaryIndexSource, write_index
+from shadwell.sources.coalescing import CoalescingSource
+from shadwell.sources.sqlite import SQLiteSource
+
+RELEASES = 3000
+WHEEL_TAGS = [
+    "py3-none-any",
+    "cp311-cp311-manylinux_2_17_x86_64",
+    "cp312-cp312-manylinux_2_17_x86_64",
+    "cp312-cp312-win_amd64",
+]
+PINS = ["proj==1.0.0", "proj==15.0.0", "proj==29.19.0"]
+
+
+def files():
+    result = []
+    for i in range(RELEASES):
+        version = "{}.{}.0".format(i // 100, i % 100 // 5)
+        if i % 5:
+            version += ".post{}".format(i % 5)
+        result.append("proj-{}.tar.gz".format(version))
+        result.extend("proj-{}-{}.whl".format(version, t) for t in WHEEL_TAGS)
+    return [CompactCandidate.from_filename(f, url="u/" + f) for f in result]
+
+
+def main():
+    candidates = files()
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteSource(os.path.join(tmp, "index.db"))
+        sqlite.add_project("proj", candidates)
+        binary_path = os.path.join(tmp, "index.bin")
+        write_index(binary_path, [("proj", candidates)])
+        binary = BinaryIndexSource(binary_path)
+        coalescing = CoalescingSource(sqlite)
+        print("{} files".format(len(candidates)))
+
+        reqs = [Requirement(pin) for pin in PINS]
+        for label, src in [
+            ("sqlite query", sqlite),
+            ("binary query", binary),
+            ("coalescing", coalescing),
+            ("plain", lambda name: sqlite(name)),
+        ]:
+            f = Finder(
+                sources=[src],
+                compatibility_tags=[Tag("py3", "none", "any")],
+            )
+            for req in reqs:
+                assert len(f.get_candidates(req)) == 2, req
+            t = timeit.timeit(
+                lambda: [f.get_candidates(r) for r in reqs], number=10
+            ) / (10 * len(reqs))
+            print("{:13} {:8.1f} us/lookup".format(label, t * 1e6))
+        binary.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Time the finder's filtering and ranking on a large project.
+
+The project has 2,000 versions and 20,000 files, with a handful of
+distinct Requires-Python values. Candidates are built both as plain
+Candidate objects (each with its own SpecifierSet, as JsonSource makes
+them) and as CompactCandidates sharing values through a CandidatePool.
+Each is timed with the finder's memoised scoring, and with a baseline
+that checks every candidate in full, as the finder did before scoring
+was memoised. Sources are not included in the timings.
+
+    python benchmarks/bench_scoring.py
+"""
+
+import timeit
+
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import sys_tags
+
+from shadwell.candidate import Candidate, CandidatePool, CompactCandidate, version_key
+from shadwell.finder import Finder, WheelPolicy, ranked_compatibility
+
+VERSIONS = 2000
+REQUIRES_PYTHON = [None, ">=3.6", ">=3.7", ">=3.8", ">=3.9,!=3.9.0"]
+WHEEL_TAGS = [
+    "cp311-cp311-manylinux_2_17_x86_64",
+    "cp312-cp312-manylinux_2_17_x86_64",
+    "cp312-cp312-win_amd64",
+    "cp312-cp312-macosx_11_0_arm64",
+    "cp313-cp313-manylinux_2_17_x86_64",
+    "cp313-cp313-win_amd64",
+    "cp313-cp313-macosx_11_0_arm64",
+    "py3-none-any",
+    "py2.py3-none-any",
+]
+
+
+class UnmemoisedFinder(Finder):
+    """A finder that checks each candidate without remembering anything."""
+
+    def _scorer(self, specifier=None, rejected=None):
+        def sort_key(candidate):
+            if specifier is not None and not specifier.contains(
+                candidate.version, True
+            ):
+                return None
+            if self.python_version not in candidate.requires_python:
+                return None
+            wheel = self.wheel_policy(candidate.name)
+            wheel_first = 0
+            if candidate.is_wheel:
+                if wheel == WheelPolicy.PROHIBIT:
+                    return None
+                elif wheel == WheelPolicy.PREFER:
+                    wheel_first = 1
+                level = ranked_compatibility(candidate.tags, self._tag_ranks)
+                if level == -1:
+                    return None
+            else:
+                if wheel == WheelPolicy.REQUIRE:
+                    return None
+                level = 0
+            return (wheel_first, version_key(candidate.version), level)
+
+        return sort_key
+
+
+def files():
+    for i in range(VERSIONS):
+        version = "{}.{}.{}".format(i // 100, i // 10 % 10, i % 10)
+        spec = REQUIRES_PYTHON[i // 400]
+        yield "proj-{}.tar.gz".format(version), spec
+        for tag in WHEEL_TAGS:
+            yield "proj-{}-{}.whl".format(version, tag), spec
+
+
+def plain_candidates():
+    result = []
+    for filename, spec in files():
+        c = Candidate()
+        c.attributes_from_filename(filename)
+        c.requires_python = SpecifierSet(spec or "")
+        c.is_yanked = False
+        result.append(c)
+    return result
+
+
+def compact_candidates():
+    pool = CandidatePool()
+    return [
+        CompactCandidate.from_filename(filename, spec, pool=pool)
+        for filename, spec in files()
+    ]
+
+
+def main():
+    req = Requirement("proj>=1.0,!=5.5.5")
+    for label, candidates in [
+        ("Candidate", plain_candidates()),
+        ("CompactCandidate", compact_candidates()),
+    ]:
+        times = []
+        for cls in (UnmemoisedFinder, Finder):
+            f = cls(
+                [lambda name: candidates],
+                compatibility_tags=list(sys_tags()),
+                wheel_policy=lambda name: WheelPolicy.PREFER,
+            )
+            times.append(timeit.timeit(lambda: f.get_candidates(req), number=5) / 5)
+        print(
+            "{:17} {} files: {:6.1f} ms unmemoised, {:6.1f} ms memoised"
+            " ({:.2f}x)".format(
+                label,
+                len(candidates),
+                times[0] * 1e3,
+                times[1] * 1e3,
+                times[0] / times[1],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compare SimpleSource (JSON and HTML) with JsonSource.
+
+Writes fixture pages for a synthetic 20,000 file project, in the legacy
+JSON API, PEP 691 JSON and PEP 503 HTML forms, serves them from a local
+HTTP server, and times a full lookup through each source.
+
+    python benchmarks/bench_simple.py
+"""
+
+import json
+import threading
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shadwell.sources.json_api import JsonSource
+from shadwell.sources.simple import SimpleSource
+
+RELEASES = 2000
+FILES_PER_RELEASE = 10
+
+
+def files():
+    for i in range(RELEASES):
+        version = "1.{}.{}".format(i // 100, i % 100)
+        for j in range(FILES_PER_RELEASE):
+            if j == 0:
+                filename = "bigproject-{}.tar.gz".format(version)
+            else:
+                filename = "bigproject-{}-cp3{}-cp3{}-manylinux2014_x86_64.whl".format(
+                    version, j, j
+                )
+            yield version, filename
+
+
+def fixtures():
+    url = "https://files.example.com/packages/{}/{}"
+    digest = "0123456789abcdef" * 4
+    releases = {}
+    simple_files = []
+    links = []
+    for version, filename in files():
+        file_url = url.format(digest, filename)
+        releases.setdefault(version, []).append(
+            {
+                "filename": filename,
+                "url": file_url,
+                "digests": {"sha256": digest, "md5": digest[:32]},
+                "requires_python": ">=3.7",
+                "yanked": False,
+                "yanked_reason": None,
+                "size": 123456,
+                "upload_time": "2021-01-01T00:00:00",
+                "upload_time_iso_8601": "2021-01-01T00:00:00.000000Z",
+                "packagetype": "sdist" if filename.endswith(".gz") else "bdist_wheel",
+                "python_version": "source",
+                "comment_text": "",
+                "has_sig": False,
+            }
+        )
+        simple_files.append(
+            {
+                "filename": filename,
+                "url": file_url,
+                "hashes": {"sha256": digest},
+                "requires-python": ">=3.7",
+            }
+        )
+        links.append(
+            '<a href="{}#sha256={}" data-requires-python="&gt;=3.7">{}</a><br/>'.format(
+                file_url, digest, filename
+            )
+        )
+    info = {"description": "A long description. " * 2000}
+    legacy = json.dumps({"info": info, "releases": releases})
+    simple_json = json.dumps(
+        {"meta": {"api-version": "1.0"}, "name": "bigproject", "files": simple_files}
+    )
+    simple_html = "<html><body>\n{}\n</body></html>".format("\n".join(links))
+    return {
+        "/legacy/bigproject/json": (legacy.encode(), "application/json"),
+        "/json/bigproject/": (
+            simple_json.encode(),
+            "application/vnd.pypi.simple.v1+json",
+        ),
+        "/html/bigproject/": (simple_html.encode(), "text/html"),
+    }
+
+
+def serve(pages):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, content_type = pages[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:{}".format(httpd.server_address[1])
+
+
+def main():
+    pages = fixtures()
+    base = serve(pages)
+    sources = [
+        (
+            "JsonSource",
+            JsonSource(base + "/legacy/{pkg}/json"),
+            "/legacy/bigproject/json",
+        ),
+        ("Simple JSON", SimpleSource(base + "/json/"), "/json/bigproject/"),
+        ("Simple HTML", SimpleSource(base + "/html/"), "/html/bigproject/"),
+    ]
+    for label, src, path in sources:
+        assert sum(1 for _ in src("bigproject")) == RELEASES * FILES_PER_RELEASE
+        best = min(timeit.repeat(lambda: list(src("bigproject")), number=1, repeat=5))
+        print(
+            "{:<12} page {:6.2f} MB, lookup {:7.1f} ms".format(
+                label, len(pages[path][0]) / 1024 / 1024, best * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
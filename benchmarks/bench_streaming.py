@@ -0,0 +1,88 @@
+"""Compare peak memory of loaded and streamed JSON API documents.
+
+Parses a synthetic project document with 40,000 files, shaped like the
+JSON API response for boto3 or botocore, and reports the peak memory
+allocated while producing candidates, and the time to the first one.
+
+    python benchmarks/bench_streaming.py
+"""
+
+import io
+import json
+import time
+import tracemalloc
+
+from shadwell.sources.json_api import candidates_from_files, candidates_from_json
+from shadwell.sources.jsonstream import iter_release_files
+
+RELEASES = 4000
+FILES_PER_RELEASE = 10
+
+
+def document():
+    releases = {}
+    for i in range(RELEASES):
+        version = "1.{}.{}".format(i // 100, i % 100)
+        files = []
+        for j in range(FILES_PER_RELEASE):
+            if j == 0:
+                filename = "bigproject-{}.tar.gz".format(version)
+            else:
+                filename = "bigproject-{}-py3-none-manylinux_2_{}_x86_64.whl".format(
+                    version, j
+                )
+            files.append(
+                {
+                    "filename": filename,
+                    "url": "https://files.example.com/packages/" + "ab" * 30,
+                    "digests": {"sha256": "0" * 64, "md5": "0" * 32},
+                    "requires_python": ">=3.7",
+                    "yanked": False,
+                    "yanked_reason": None,
+                    "size": 123456,
+                    "upload_time": "2021-01-01T00:00:00",
+                    "packagetype": "sdist" if j == 0 else "bdist_wheel",
+                }
+            )
+        releases[version] = files
+    info = {"description": "x" * 100_000}
+    return json.dumps({"info": info, "releases": releases}).encode("utf-8")
+
+
+def loaded(data):
+    return candidates_from_json("bigproject", json.load(io.BytesIO(data)))
+
+
+def streamed(data):
+    return candidates_from_files("bigproject", iter_release_files(io.BytesIO(data)))
+
+
+def measure(data, parse):
+    tracemalloc.start()
+    start = time.perf_counter()
+    candidates = parse(data)
+    next(candidates)
+    first = time.perf_counter() - start
+    count = 1
+    for _ in candidates:
+        # Don't keep the candidates, so we only measure the parsing
+        count += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, peak, first, total
+
+
+def main():
+    data = document()
+    print("Document size: {:.1f} MB".format(len(data) / 1024 / 1024))
+    for label, parse in [("json.load", loaded), ("streaming", streamed)]:
+        count, peak, first, total = measure(data, parse)
+        print(
+            "{:<10} {} files, peak {:6.1f} MB, first after {:6.3f} s,"
+            " total {:6.3f} s".format(label, count, peak / 1024 / 1024, first, total)
+        )
+
+
+if __name__ == "__main__":
+    main()
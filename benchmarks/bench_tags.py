@@ -0,0 +1,72 @@
+"""Compare tag compatibility scoring using a linear scan and a rank mapping.
+
+Builds a synthetic project with 10,000 wheels, spread over a range of
+platform tags, and scores every wheel against a manylinux CPython tag list.
+
+    python benchmarks/bench_tags.py
+"""
+
+import random
+import timeit
+
+from packaging.tags import Tag, compatible_tags, cpython_tags
+
+from shadwell.finder import compatibility, ranked_compatibility, tag_ranks
+
+WHEELS = 10_000
+
+
+def system_tags():
+    platforms = [
+        "manylinux_2_{}_x86_64".format(minor) for minor in range(35, 16, -1)
+    ] + [
+        "manylinux2014_x86_64",
+        "manylinux2010_x86_64",
+        "manylinux1_x86_64",
+        "linux_x86_64",
+    ]
+    tags = list(cpython_tags((3, 11), platforms=platforms))
+    tags.extend(compatible_tags((3, 11), "cp311", platforms=platforms))
+    return tags
+
+
+def wheel_tag_sets(count):
+    rng = random.Random(1234)
+    interpreters = ["cp{}".format(v) for v in range(36, 313)]
+    platforms = [
+        "win_amd64",
+        "win32",
+        "macosx_10_9_x86_64",
+        "macosx_11_0_arm64",
+        "manylinux2014_x86_64",
+        "manylinux2014_aarch64",
+        "musllinux_1_1_x86_64",
+        "manylinux_2_17_x86_64",
+    ]
+    result = []
+    for _ in range(count):
+        interp = rng.choice(interpreters)
+        result.append({Tag(interp, interp, rng.choice(platforms))})
+    return result
+
+
+def main():
+    sys_tags = system_tags()
+    wheels = wheel_tag_sets(WHEELS)
+    print("{} system tags, {} wheels".format(len(sys_tags), len(wheels)))
+
+    def linear():
+        return [compatibility(tags, sys_tags) for tags in wheels]
+
+    def ranked():
+        ranks = tag_ranks(sys_tags)
+        return [ranked_compatibility(tags, ranks) for tags in wheels]
+
+    assert linear() == ranked()
+    for name, fn in [("linear scan", linear), ("rank mapping", ranked)]:
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print("{:<14} {:8.2f} ms".format(name, best * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Find where VectorisedFinder starts to beat Finder.
+
+Times selecting from synthetic projects of increasing size (a mix of
+sdists and platform wheels, with a few Requires-Python values), using
+Finder and VectorisedFinder with the vectorised code always enabled.
+The crossover point is the basis of DEFAULT_MIN_CANDIDATES.
+
+    python benchmarks/bench_vectorised.py
+"""
+
+import timeit
+
+from packaging.requirements import Requirement
+from packaging.tags import sys_tags
+
+from shadwell.candidate import CandidatePool, CompactCandidate
+from shadwell.finder import Finder
+from shadwell.vectorised import VectorisedFinder
+
+SIZES = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+REQUIRES_PYTHON = [None, ">=3.6", ">=3.7", ">=3.8"]
+WHEEL_TAGS = [
+    "cp311-cp311-manylinux_2_17_x86_64",
+    "cp312-cp312-manylinux_2_17_x86_64",
+    "cp312-cp312-win_amd64",
+    "cp312-cp312-macosx_11_0_arm64",
+    "py3-none-any",
+]
+
+
+def project(size):
+    pool = CandidatePool()
+    files = []
+    per_release = len(WHEEL_TAGS) + 1
+    for i in range(size):
+        release, j = divmod(i, per_release)
+        version = "{}.{}.{}".format(release // 100, release // 10 % 10, release % 10)
+        if j == 0:
+            filename = "proj-{}.tar.gz".format(version)
+        else:
+            filename = "proj-{}-{}.whl".format(version, WHEEL_TAGS[j - 1])
+        spec = REQUIRES_PYTHON[release % len(REQUIRES_PYTHON)]
+        files.append(CompactCandidate.from_filename(filename, spec, pool=pool))
+    return files
+
+
+def main():
+    req = Requirement("proj>=0.1")
+    tags = list(sys_tags())
+    finder = Finder([], compatibility_tags=tags)
+    vectorised = VectorisedFinder([], compatibility_tags=tags, min_candidates=0)
+    print(
+        "{:>8} {:>12} {:>12} {:>8}".format("files", "Finder", "Vectorised", "speedup")
+    )
+    for size in SIZES:
+        files = project(size)
+        assert finder._select(req, files) == vectorised._select(req, files)
+        number = max(1, 20000 // size)
+        t1 = timeit.timeit(lambda: finder._select(req, files), number=number)
+        t2 = timeit.timeit(lambda: vectorised._select(req, files), number=number)
+        print(
+            "{:8} {:9.3f} ms {:9.3f} ms {:7.2f}x".format(
+                size, t1 / number * 1e3, t2 / number * 1e3, t1 / t2
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
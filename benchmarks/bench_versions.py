@@ -0,0 +1,99 @@
+"""Time ordering candidates for a project with thousands of versions.
+
+The versions follow a real-world mix: mostly X.Y.Z releases, with alpha,
+beta and release candidate pre-releases, post-releases, development
+releases, a few local versions and an epoch change. Each version has an
+sdist and two wheels, and the files are returned in the (string) order
+of their versions, as the JSON API returns them. The first timings sort
+the distinct versions alone, as Version objects and as precomputed
+`version_key` keys, and the last time a finder's whole lookup, and the
+part of it spent ordering the candidates.
+
+    python benchmarks/bench_versions.py
+"""
+
+import random
+import timeit
+
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CandidatePool, CompactCandidate, version_key
+from shadwell.finder import Finder
+from shadwell.metrics import Metrics
+
+RELEASES = 3000
+WHEEL_TAGS = ["py3-none-any", "cp312-cp312-manylinux_2_17_x86_64"]
+
+
+def versions(rng):
+    result = []
+    for i in range(RELEASES):
+        base = "{}.{}.{}".format(i // 300, i // 20 % 15, i % 20)
+        if i > RELEASES * 0.9:
+            # The project switched version scheme
+            base = "1!" + base
+        kind = rng.random()
+        if kind < 0.05:
+            result.append(base + ".dev{}".format(rng.randint(0, 3)))
+        elif kind < 0.15:
+            result.append(base + rng.choice(["a", "b", "rc"]) + str(rng.randint(1, 3)))
+        elif kind < 0.18:
+            result.append(base + "rc1.dev{}".format(rng.randint(0, 2)))
+        elif kind < 0.22:
+            result.append(base + ".post{}".format(rng.randint(1, 2)))
+        elif kind < 0.24:
+            result.append(base + "+local.{}".format(rng.randint(1, 9)))
+        else:
+            result.append(base)
+    return sorted(set(result))
+
+
+def candidates(version_strings):
+    pool = CandidatePool()
+    files = []
+    for v in version_strings:
+        files.append("proj-{}.tar.gz".format(v))
+        files.extend("proj-{}-{}.whl".format(v, tag) for tag in WHEEL_TAGS)
+    return [CompactCandidate.from_filename(f, pool=pool) for f in files]
+
+
+def main():
+    rng = random.Random(1234)
+    version_strings = versions(rng)
+    parsed = [Version(v) for v in version_strings]
+    print("{} versions, {} files".format(len(parsed), len(parsed) * 3))
+
+    t = timeit.timeit(lambda: sorted(parsed), number=10) / 10
+    print("sort Versions:          {:6.2f} ms".format(t * 1e3))
+    t = timeit.timeit(lambda: [version_key(v) for v in parsed], number=10) / 10
+    print("compute version_keys:   {:6.2f} ms".format(t * 1e3))
+    keys = [version_key(v) for v in parsed]
+    t = timeit.timeit(lambda: sorted(keys), number=10) / 10
+    print("sort version_keys:      {:6.2f} ms".format(t * 1e3))
+
+    files = candidates(version_strings)
+    metrics = Metrics()
+    tags = [Tag("cp312", "cp312", "manylinux_2_17_x86_64"), Tag("py3", "none", "any")]
+    for label, req, collector in [
+        ("finder", "proj", None),
+        ("finder (measured)", "proj", metrics),
+        ("finder, with pre", "proj>=0.5.0a1", None),
+    ]:
+        f = Finder(
+            [lambda name: files],
+            compatibility_tags=tags,
+            python_version=Version("3.12"),
+            collector=collector,
+        )
+        req = Requirement(req)
+        t = timeit.timeit(lambda: f.get_candidates(req), number=10) / 10
+        print("{:23} {:6.2f} ms".format(label + ":", t * 1e3))
+    print(
+        "  of which ordering:    {:6.2f} ms".format(metrics.times["order"] / 10 * 1e3)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Finding candidates from asyncio code.
+
+An async source is a callable that takes a project name and returns an
+asynchronous iterator of candidates, typically an async generator function.
+Apart from that, async sources follow the same rules as normal sources.
+"""
+
+import asyncio
+import itertools
+import logging
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+from .candidate import Candidate
+from .finder import Finder, Source, SourceErrorPolicy, WheelPolicy
+
+logger = logging.getLogger(__name__)
+
+AsyncSource = Callable[[str], AsyncIterator[Candidate]]
+
+
+def from_sync(source: Source, executor: Optional[Executor] = None) -> AsyncSource:
+    """Adapt a normal (blocking) source, so it can be used by an AsyncFinder.
+
+    The source is run in the given executor, or the event loop's default
+    executor if none is supplied.
+    """
+
+    async def async_source(name):
+        loop = asyncio.get_running_loop()
+        candidates = await loop.run_in_executor(executor, lambda: list(source(name)))
+        for candidate in candidates:
+            yield candidate
+
+    return async_source
+
+
+async def _collect(source: AsyncSource, name: str) -> List[Candidate]:
+    return [candidate async for candidate in source(name)]
+
+
+class AsyncFinder:
+    """A finder that queries async sources.
+
+    This filters and orders candidates in exactly the same way as
+    `Finder` (using one internally), but `get_candidates` and `find_many`
+    are coroutines. The sources for a requirement are always queried
+    concurrently.
+    """
+
+    sources: List[AsyncSource]
+    source_timeout: Optional[float]
+    source_errors: SourceErrorPolicy
+
+    def __init__(
+        self,
+        sources: List[AsyncSource],
+        compatibility_tags: Optional[List[Tag]] = None,
+        allow_prerelease: bool = False,
+        python_version: Optional[Version] = None,
+        wheel_policy: Optional[Callable[[str], WheelPolicy]] = None,
+        allow_yanked: bool = False,
+        source_timeout: Optional[float] = None,
+        source_errors: SourceErrorPolicy = SourceErrorPolicy.RAISE,
+    ):
+        self.sources = sources
+        self.source_timeout = source_timeout
+        self.source_errors = source_errors
+        # Does the filtering and ordering. It has no sources of its own.
+        self._finder = Finder(
+            [],
+            compatibility_tags=compatibility_tags,
+            allow_prerelease=allow_prerelease,
+            python_version=python_version,
+            wheel_policy=wheel_policy,
+            allow_yanked=allow_yanked,
+        )
+
+    def _source_failed(self, source: AsyncSource, name: str, exc: Exception) -> None:
+        if self.source_errors == SourceErrorPolicy.RAISE:
+            raise exc
+        logger.warning("Source %r failed for %s", source, name, exc_info=exc)
+
+    async def _afetch(self, name: str) -> Iterable[Candidate]:
+        tasks = [_collect(source, name) for source in self.sources]
+        if self.source_timeout is not None:
+            tasks = [asyncio.wait_for(t, self.source_timeout) for t in tasks]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        candidates = []
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                self._source_failed(source, name, result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                candidates.append(result)
+        return itertools.chain.from_iterable(candidates)
+
+    async def get_candidates(self, req: Requirement) -> List[Candidate]:
+        """Return candidates matching the requirement."""
+        return self._finder._select(
+            req, await self._afetch(canonicalize_name(req.name))
+        )
+
+    async def find_many(
+        self, reqs: Iterable[Requirement]
+    ) -> Dict[Requirement, List[Candidate]]:
+        """Return candidates for each of a collection of requirements.
+
+        As with `Finder.find_many`, each project is only fetched once.
+        """
+        reqs = list(reqs)
+        names = list(dict.fromkeys(canonicalize_name(req.name) for req in reqs))
+
+        async def fetch(name: str) -> Tuple[str, List[Candidate]]:
+            return name, list(await self._afetch(name))
+
+        fetched = dict(await asyncio.gather(*(fetch(name) for name in names)))
+        return {
+            req: self._finder._select(req, fetched[canonicalize_name(req.name)])
+            for req in reqs
+        }
@@ -1,10 +1,191 @@
-import re
-from typing import Set
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple, Union
 
 from packaging.specifiers import SpecifierSet
 from packaging.tags import Tag
-from packaging.utils import parse_sdist_filename, parse_wheel_filename
-from packaging.version import Version
+from packaging.utils import (
+    InvalidSdistFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import InvalidVersion, Version
+
+# The sdist formats we recognise. packaging only handles the first two
+# (the only ones allowed by current standards), but indexes still host
+# plenty of files in the older formats.
+SDIST_EXTENSIONS = (".tar.gz", ".zip", ".tar.bz2", ".tar.xz", ".tgz", ".tar")
+
+# (name, version, tags, is_wheel)
+ParsedFilename = Tuple[str, Version, FrozenSet[Tag], bool]
+
+DEFAULT_CACHE_SIZE = 100_000
+
+
+def _parse_filename(filename: str) -> Optional[ParsedFilename]:
+    filename = filename.lower()
+
+    if filename.endswith(".whl"):
+        name, version, _, tags = parse_wheel_filename(filename)
+        return name, version, tags, True
+
+    for ext in SDIST_EXTENSIONS:
+        if filename.endswith(ext):
+            break
+    else:
+        return None
+
+    if ext in (".tar.gz", ".zip"):
+        name, version = parse_sdist_filename(filename)
+    else:
+        # We are requiring a PEP 440 version, which cannot contain dashes,
+        # so we split on the last dash.
+        name, sep, version_str = filename[: -len(ext)].rpartition("-")
+        if not sep:
+            raise InvalidSdistFilename(
+                "Invalid sdist filename (no dash): {}".format(filename)
+            )
+        try:
+            version = Version(version_str)
+        except InvalidVersion as e:
+            raise InvalidSdistFilename(
+                "Invalid sdist filename (invalid version): {}".format(filename)
+            ) from e
+        name = canonicalize_name(name)
+    return name, version, frozenset(), False
+
+
+class FilenameCache:
+    """A bounded cache of parsed filenames.
+
+    `parse` returns (name, version, tags, is_wheel) for wheels and sdists,
+    and None for any other type of file. Invalid wheel or sdist filenames
+    raise an exception, and are not cached. The least recently used entries
+    are discarded once there are more than `maxsize` of them.
+
+    The cache is thread safe. It can also be pickled, so that a populated
+    cache can be handed to worker processes.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Optional[ParsedFilename]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, filename: str) -> Optional[ParsedFilename]:
+        with self._lock:
+            try:
+                result = self._entries[filename]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(filename)
+                return result
+
+        result = _parse_filename(filename)
+        with self._lock:
+            self._entries[filename] = result
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self):
+        with self._lock:
+            return self.maxsize, self.hits, self.misses, list(self._entries.items())
+
+    def __setstate__(self, state):
+        self.maxsize, self.hits, self.misses, entries = state
+        self._entries = OrderedDict(entries)
+        self._lock = threading.Lock()
+
+
+filename_cache = FilenameCache()
+
+
+def parse_filename(filename: str) -> Optional[ParsedFilename]:
+    """Parse a wheel or sdist filename, using the shared filename cache."""
+    return filename_cache.parse(filename)
+
+
+# (epoch, release, pre rank, pre number, post rank, post number,
+#  dev rank, dev number[, local segments])
+VersionKey = Tuple
+
+_PRE_RANKS = {"a": 0, "b": 1, "rc": 2}
+# The pre-release rank of a version with no pre-release part
+_NO_PRE_RANK = 3
+
+
+def version_key(version: Version) -> VersionKey:
+    """Return a sort key for a version, made of ints.
+
+    Keys compare in the same order as the versions do (and are equal only
+    when the versions are), but as they are plain tuples, comparing them
+    doesn't call back into Python code. The key for a version with a
+    local part also includes its segments, some of which may be strings.
+    """
+    release = version.release
+    end = len(release)
+    while end > 1 and release[end - 1] == 0:
+        end -= 1
+    pre = version.pre
+    post = version.post
+    dev = version.dev
+    if pre is not None:
+        pre_rank, pre_number = _PRE_RANKS[pre[0]], pre[1]
+    elif post is None and dev is not None:
+        # A development release of a final release comes before its
+        # pre-releases.
+        pre_rank, pre_number = -1, 0
+    else:
+        pre_rank, pre_number = _NO_PRE_RANK, 0
+    key = (
+        version.epoch,
+        release[:end],
+        pre_rank,
+        pre_number,
+        0 if post is None else 1,
+        post or 0,
+        1 if dev is None else 0,
+        dev or 0,
+    )
+    local = version.local
+    if local is None:
+        return key
+    # Numeric segments compare as numbers, and after any string segment
+    return key + (
+        tuple(
+            (int(part), "") if part.isdigit() else (-1, part)
+            for part in local.split(".")
+        ),
+    )
+
+
+def is_final(key: VersionKey) -> bool:
+    """Return whether a key from `version_key` is for a final release.
+
+    This is the opposite of the version's `is_prerelease`: the version
+    has neither a pre-release nor a development release part.
+    """
+    return key[2] == _NO_PRE_RANK and key[6] == 1
 
 
 class Candidate:
@@ -16,15 +197,151 @@ class Candidate:
     is_yanked: bool
 
     def attributes_from_filename(self, filename: str) -> None:
-        filename = filename.lower()
-
-        if filename.endswith(".whl"):
-            self.is_wheel = True
-            self.name, self.version, _, self.tags = parse_wheel_filename(filename)
-
-        elif filename.endswith(".tar.gz"):
-            self.is_wheel = False
-            # We are requiring a PEP 440 version, which cannot contain dashes,
-            # so we split on the last dash.
-            self.name, self.version = parse_sdist_filename(filename)
-            self.tags = set()
+        parsed = parse_filename(filename)
+        if parsed is not None:
+            self.name, self.version, self.tags, self.is_wheel = parsed
+
+
+class CandidatePool:
+    """Shared instances of the values that candidates hold.
+
+    Most files in a project have the same tags, Requires-Python and
+    version as many other files, so candidates created through a pool
+    share a single object for each distinct value, rather than each
+    holding a copy of their own.
+
+    Values are kept for as long as the pool exists, so a pool should
+    only be shared by candidates that are in use at the same time.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, Version] = {}
+        # id of a pooled version -> its sort key
+        self._version_keys: Dict[int, VersionKey] = {}
+        self._specifiers: Dict[str, SpecifierSet] = {}
+        self._tag_sets: Dict[FrozenSet[Tag], FrozenSet[Tag]] = {}
+
+    def version(self, version: Union[str, Version]) -> Version:
+        key = str(version)
+        result = self._versions.get(key)
+        if result is None:
+            if not isinstance(version, Version):
+                version = Version(version)
+            result = self._versions.setdefault(key, version)
+        return result
+
+    def version_key(self, version: Version) -> VersionKey:
+        """Return `version_key(version)`, computing it once per distinct version.
+
+        Keys are stored by the identity of the pooled version, which is
+        never discarded, so its ID can't be reused. Versions from anywhere
+        else are interned first, and so share the pooled version's key.
+        """
+        result = self._version_keys.get(id(version))
+        if result is None:
+            version = self.version(version)
+            result = self._version_keys.get(id(version))
+            if result is None:
+                result = self._version_keys.setdefault(
+                    id(version), version_key(version)
+                )
+        return result
+
+    def specifier(self, spec: Optional[str]) -> SpecifierSet:
+        spec = spec or ""
+        result = self._specifiers.get(spec)
+        if result is None:
+            result = self._specifiers.setdefault(spec, SpecifierSet(spec))
+        return result
+
+    def tags(self, tags: Iterable[Tag]) -> FrozenSet[Tag]:
+        tags = frozenset(tags)
+        return self._tag_sets.setdefault(tags, tags)
+
+    def __len__(self) -> int:
+        return len(self._versions) + len(self._specifiers) + len(self._tag_sets)
+
+
+# The pool used when none is given. Like any pool, it never discards
+# anything, so it grows with every distinct value seen by the process.
+# Long-running or bulk processing code should use its own pools.
+DEFAULT_POOL = CandidatePool()
+
+
+class CompactCandidate:
+    """A memory-efficient candidate.
+
+    Instances have no __dict__, and are normally created with `from_filename`,
+    which takes their version, tags and Requires-Python from a
+    `CandidatePool`, so that they are shared with other candidates. The
+    pool also supplies `version_key`, the version's sort key, which the
+    finder uses rather than computing it (it may be None).
+    """
+
+    __slots__ = (
+        "name",
+        "version",
+        "requires_python",
+        "is_wheel",
+        "tags",
+        "is_yanked",
+        "url",
+        "filename",
+        "hashes",
+        "version_key",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        version: Version,
+        requires_python: SpecifierSet,
+        is_wheel: bool,
+        tags: FrozenSet[Tag],
+        is_yanked: bool = False,
+        url: Optional[str] = None,
+        filename: Optional[str] = None,
+        hashes: Optional[Dict[str, str]] = None,
+        version_key: Optional[VersionKey] = None,
+    ):
+        self.name = name
+        self.version = version
+        self.requires_python = requires_python
+        self.is_wheel = is_wheel
+        self.tags = tags
+        self.is_yanked = is_yanked
+        self.url = url
+        self.filename = filename
+        self.hashes = hashes
+        self.version_key = version_key
+
+    @classmethod
+    def from_filename(
+        cls,
+        filename: str,
+        requires_python: Optional[str] = None,
+        is_yanked: bool = False,
+        url: Optional[str] = None,
+        pool: Optional[CandidatePool] = None,
+    ) -> "CompactCandidate":
+        if pool is None:
+            pool = DEFAULT_POOL
+        parsed = parse_filename(filename)
+        if parsed is None:
+            raise ValueError("Not a wheel or sdist: {}".format(filename))
+        name, version, tags, is_wheel = parsed
+        version = pool.version(version)
+        return cls(
+            sys.intern(name),
+            version,
+            pool.specifier(requires_python),
+            is_wheel,
+            pool.tags(tags),
+            is_yanked,
+            url,
+            filename,
+            version_key=pool.version_key(version),
+        )
+
+    def __repr__(self) -> str:
+        return "<CompactCandidate {!r}>".format(self.filename)
@@ -0,0 +1,357 @@
+"""Checking the files in a PyPI metadata dump, in parallel.
+
+A dump is a SQLite database with a `package_data_json` table, holding each
+project's name and its JSON API data (see `SQLiteSource.ingest_pypi_dump`).
+`check_dump` parses the filename of every wheel and sdist in it, and
+reports files whose names are invalid, or don't match their project or
+release, and files with an invalid Requires-Python. It can also load the
+files into a `SQLiteSource` as it goes.
+
+The dump is split into chunks of rows, which are checked by an executor.
+With a `ProcessPoolExecutor`, each worker process reads and decodes its
+own chunks from the dump, so throughput grows with the number of workers,
+until writing the index (which happens in the calling process) limits it.
+
+This module can also be run as a script (or as `shadwell-check`):
+
+    python -m shadwell.check [--index INDEX] [--processes N] DUMP
+"""
+
+import argparse
+import enum
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from packaging.specifiers import InvalidSpecifier
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+from .candidate import CandidatePool, CompactCandidate, parse_filename
+from .sources.sqlite import Row, SQLiteSource, project_rows
+
+# The number of dump rows (projects) checked together
+CHUNK_SIZE = 500
+
+# The package types that checked files can have
+PACKAGE_TYPES = ("bdist_wheel", "sdist")
+
+
+class ProblemKind(enum.Enum):
+    INVALID_JSON = enum.auto()  # The project's data could not be read
+    INVALID_FILENAME = enum.auto()  # Not a valid wheel or sdist filename
+    NAME_MISMATCH = enum.auto()  # The filename is for a different project
+    VERSION_MISMATCH = enum.auto()  # The filename is for a different release
+    INVALID_REQUIRES_PYTHON = enum.auto()  # The file's Requires-Python is invalid
+
+
+class Problem(NamedTuple):
+    kind: ProblemKind
+    project: str
+    release: Optional[str]
+    filename: Optional[str]
+    message: str
+
+
+class Summary(NamedTuple):
+    projects: int
+    files: int
+    problems: int
+
+
+# (projects, files, problems, [(name, rows)] if rows were wanted)
+ChunkResult = Tuple[int, int, List[Problem], List[Tuple[str, List[Row]]]]
+
+
+def check_project(
+    name: str,
+    json_data: str,
+    problems: List[Problem],
+    pool: Optional[CandidatePool] = None,
+) -> Tuple[int, Optional[List[CompactCandidate]]]:
+    """Check the files for one project in a dump.
+
+    Problems found are appended to `problems`. Returns the number of
+    files checked, and candidates for the files with valid names and
+    Requires-Python for this project (the files
+    `SQLiteSource.ingest_pypi_dump` would load), or None if the project's
+    data is invalid. The candidates' values are interned in `pool` (by
+    default, a new one).
+    """
+    if pool is None:
+        pool = CandidatePool()
+    try:
+        data = json.loads(json_data)
+    except (TypeError, ValueError) as e:
+        problems.append(Problem(ProblemKind.INVALID_JSON, name, None, None, repr(e)))
+        return 0, None
+    found: List[Problem] = []
+    try:
+        count, candidates = _check_releases(name, data.get("releases", {}), found, pool)
+    except (TypeError, KeyError, AttributeError) as e:
+        # Valid JSON, but not laid out like the JSON API's data
+        problems.append(Problem(ProblemKind.INVALID_JSON, name, None, None, repr(e)))
+        return 0, None
+    problems.extend(found)
+    return count, candidates
+
+
+def _check_releases(
+    name: str, releases: Dict, problems: List[Problem], pool: CandidatePool
+) -> Tuple[int, List[CompactCandidate]]:
+    count = 0
+    candidates = []
+    for release, files in releases.items():
+        try:
+            release_version: Optional[Version] = Version(release)
+        except InvalidVersion:
+            release_version = None
+        for file in files:
+            filename = file["filename"]
+            packagetype = file.get("packagetype")
+            try:
+                parsed = parse_filename(filename)
+            except ValueError as e:
+                if packagetype in PACKAGE_TYPES:
+                    count += 1
+                    problems.append(
+                        Problem(
+                            ProblemKind.INVALID_FILENAME,
+                            name,
+                            release,
+                            filename,
+                            str(e),
+                        )
+                    )
+                continue
+            if parsed is None:
+                if packagetype in PACKAGE_TYPES:
+                    count += 1
+                    problems.append(
+                        Problem(
+                            ProblemKind.INVALID_FILENAME,
+                            name,
+                            release,
+                            filename,
+                            "Not a wheel or sdist",
+                        )
+                    )
+                continue
+
+            count += 1
+            file_name, version, tags, is_wheel = parsed
+            if file_name != name:
+                problems.append(
+                    Problem(
+                        ProblemKind.NAME_MISMATCH,
+                        name,
+                        release,
+                        filename,
+                        "Filename is for project {}".format(file_name),
+                    )
+                )
+                continue
+            if version != release_version:
+                problems.append(
+                    Problem(
+                        ProblemKind.VERSION_MISMATCH,
+                        name,
+                        release,
+                        filename,
+                        "Filename is for version {}".format(version),
+                    )
+                )
+            try:
+                requires_python = pool.specifier(file.get("requires_python"))
+            except InvalidSpecifier as e:
+                problems.append(
+                    Problem(
+                        ProblemKind.INVALID_REQUIRES_PYTHON,
+                        name,
+                        release,
+                        filename,
+                        str(e),
+                    )
+                )
+                continue
+            candidates.append(
+                CompactCandidate(
+                    name,
+                    pool.version(version),
+                    requires_python,
+                    is_wheel,
+                    pool.tags(tags),
+                    bool(file.get("yanked")),
+                    file.get("url", ""),
+                    filename,
+                )
+            )
+    return count, candidates
+
+
+def check_chunk(dump: str, first: int, last: int, rows: bool) -> ChunkResult:
+    """Check the dump rows with rowids from `first` to `last`.
+
+    This is run by the executor, so it opens the dump itself. The chunk's
+    candidates share a pool, which is dropped once the chunk is done.
+    """
+    pool = CandidatePool()
+    db = sqlite3.connect(dump)
+    try:
+        cur = db.execute(
+            "SELECT name, json FROM package_data_json"
+            " WHERE rowid BETWEEN ? AND ? ORDER BY rowid",
+            (first, last),
+        )
+        projects = 0
+        files = 0
+        problems: List[Problem] = []
+        loaded = []
+        for name, json_data in cur:
+            name = canonicalize_name(name)
+            count, candidates = check_project(name, json_data, problems, pool)
+            projects += 1
+            files += count
+            if rows and candidates is not None:
+                loaded.append((name, project_rows(candidates)))
+    finally:
+        db.close()
+    return projects, files, problems, loaded
+
+
+def _chunks(dump: str, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    db = sqlite3.connect(dump)
+    try:
+        first, last = db.execute(
+            "SELECT min(rowid), max(rowid) FROM package_data_json"
+        ).fetchone()
+    finally:
+        db.close()
+    if first is None:
+        return
+    for start in range(first, last + 1, chunk_size):
+        yield start, min(start + chunk_size - 1, last)
+
+
+def _run_chunks(
+    dump: str,
+    rows: bool,
+    executor: Optional[Executor],
+    chunk_size: int,
+    max_pending: int,
+) -> Iterator[ChunkResult]:
+    """Yield the results for each chunk of the dump, in order."""
+    if executor is None:
+        for first, last in _chunks(dump, chunk_size):
+            yield check_chunk(dump, first, last, rows)
+        return
+    # Only a few chunks are submitted ahead, so that results are not
+    # held in memory faster than the caller uses them.
+    pending: Deque[Future] = deque()
+    for first, last in _chunks(dump, chunk_size):
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(check_chunk, dump, first, last, rows))
+    while pending:
+        yield pending.popleft().result()
+
+
+def check_dump(
+    dump: str,
+    index: Optional[SQLiteSource] = None,
+    executor: Optional[Executor] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_pending: Optional[int] = None,
+    report: Optional[Callable[[Problem], None]] = None,
+) -> Summary:
+    """Check every project in a PyPI metadata dump.
+
+    Each problem found is passed to `report` as it is found. If `index`
+    is given, the projects are loaded into it, as `ingest_pypi_dump`
+    would. Chunks of `chunk_size` projects are checked in `executor` (in
+    this thread, if there is none), with at most `max_pending` (by default,
+    twice the number of CPUs) in progress at once.
+    """
+    if max_pending is None:
+        max_pending = 2 * (os.cpu_count() or 1)
+    totals = [0, 0, 0]
+
+    def projects() -> Iterator[Tuple[str, List[Row]]]:
+        chunks = _run_chunks(dump, index is not None, executor, chunk_size, max_pending)
+        for projects, files, problems, loaded in chunks:
+            totals[0] += projects
+            totals[1] += files
+            totals[2] += len(problems)
+            if report is not None:
+                for problem in problems:
+                    report(problem)
+            yield from loaded
+
+    if index is None:
+        for _ in projects():
+            pass
+    else:
+        index.ingest_rows(projects())
+    return Summary(*totals)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="shadwell-check",
+        description="Check the filenames in a PyPI metadata dump.",
+    )
+    parser.add_argument("dump", help="The dump database")
+    parser.add_argument("--index", help="Also load the files into this SQLite index")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of worker processes (0 to check in this process)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help="The number of projects each worker checks at a time",
+    )
+    args = parser.parse_args(argv)
+
+    def report(problem: Problem) -> None:
+        print(
+            "{}\t{}\t{}\t{}\t{}".format(
+                problem.kind.name,
+                problem.project,
+                problem.release or "",
+                problem.filename or "",
+                problem.message,
+            )
+        )
+
+    index = None if args.index is None else SQLiteSource(args.index)
+    start = time.perf_counter()
+    if args.processes:
+        with ProcessPoolExecutor(args.processes) as executor:
+            summary = check_dump(
+                args.dump, index, executor, args.chunk_size, None, report
+            )
+    else:
+        summary = check_dump(args.dump, index, None, args.chunk_size, None, report)
+    elapsed = time.perf_counter() - start
+    rate = summary.files / elapsed if elapsed else 0
+    print(
+        "Checked {} files in {} projects in {:.1f}s ({:.0f} files/s)".format(
+            summary.files, summary.projects, elapsed, rate
+        ),
+        file=sys.stderr,
+    )
+    print("{} problems found".format(summary.problems), file=sys.stderr)
+    return 1 if summary.problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
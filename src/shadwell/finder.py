@@ -1,14 +1,43 @@
 import enum
+import heapq
+import itertools
+import logging
 import sys
-from typing import Callable, List, Optional, Set, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
 from packaging.tags import Tag, sys_tags
-from packaging.version import Version
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
 
-from .candidate import Candidate
+from .candidate import Candidate, VersionKey, is_final, version_key
+from .metrics import STAGES, Collector
 
-SortKey = Tuple[int, Version, int]
+SortKey = Tuple[int, VersionKey, int]
+Source = Callable[[str], Iterable[Candidate]]
+
+logger = logging.getLogger(__name__)
 
 
 class WheelPolicy(enum.Enum):
@@ -18,6 +47,11 @@ class WheelPolicy(enum.Enum):
     PREFER = enum.auto()  # May be either, but prefer wheel
 
 
+class SourceErrorPolicy(enum.Enum):
+    RAISE = enum.auto()  # Errors from a source propagate (default)
+    IGNORE = enum.auto()  # A failing source contributes no candidates
+
+
 def compatibility(tags: Set[Tag], sys_tags: List[Tag]) -> int:
     """Given a set of tags, say "how compatible" it is.
 
@@ -34,22 +68,305 @@ def compatibility(tags: Set[Tag], sys_tags: List[Tag]) -> int:
     return -1
 
 
+def tag_ranks(sys_tags: List[Tag]) -> Dict[Tag, int]:
+    """Build a mapping from tag to compatibility value.
+
+    The values are the same as those returned by `compatibility`, so
+    the compatibility of a tag set is the highest rank of any of its
+    tags. Where a tag appears more than once, the earliest entry wins.
+    """
+    max_compat = len(sys_tags)
+    ranks: Dict[Tag, int] = {}
+    for i, tag in enumerate(sys_tags):
+        ranks.setdefault(tag, max_compat - i)
+    return ranks
+
+
+def ranked_compatibility(tags: Iterable[Tag], ranks: Dict[Tag, int]) -> int:
+    """Equivalent to `compatibility`, but using a precomputed rank mapping.
+
+    This costs one dictionary lookup per tag in the set, rather than a
+    scan of the full list of system tags.
+    """
+    return max((ranks.get(tag, -1) for tag in tags), default=-1)
+
+
+class Query(NamedTuple):
+    """Everything the finder knows about what it will accept for a project.
+
+    Sources with a `query` method are passed one of these instead of just
+    the project name. Such sources may leave out any candidate that the
+    query's `accepts` method rejects, as the finder would discard it
+    anyway. Sources don't have to filter at all, though, as the finder
+    still checks every candidate it is given.
+
+    Prereleases and yanked files are never left out here, as whether
+    they are used depends on what other files are available (a project
+    whose final releases are all yanked falls back to its prereleases,
+    for instance). A `python_version` or `tag_ranks` of None means that
+    any value is acceptable.
+    """
+
+    name: str
+    specifier: SpecifierSet
+    python_version: Optional[Version]
+    tag_ranks: Optional[Dict[Tag, int]]
+    wheel_policy: WheelPolicy
+    allow_prerelease: bool
+    allow_yanked: bool
+
+    def accepts_version(self, version: Version) -> bool:
+        return self.specifier.contains(version, True)
+
+    def pinned_version(self) -> Optional[Version]:
+        """The version the specifier pins, if it is an exact pin.
+
+        See `pinned_version` for how sources can use this.
+        """
+        return pinned_version(self.specifier)
+
+    def accepts_python(self, requires_python: SpecifierSet) -> bool:
+        if self.python_version is None:
+            return True
+        return self.python_version in requires_python
+
+    def accepts_file(self, is_wheel: bool, tags: FrozenSet[Tag]) -> bool:
+        if not is_wheel:
+            return self.wheel_policy != WheelPolicy.REQUIRE
+        if self.wheel_policy == WheelPolicy.PROHIBIT:
+            return False
+        if self.tag_ranks is None:
+            return True
+        return ranked_compatibility(tags, self.tag_ranks) != -1
+
+    def accepts(self, candidate: Candidate) -> bool:
+        return (
+            self.accepts_version(candidate.version)
+            and self.accepts_python(candidate.requires_python)
+            and self.accepts_file(candidate.is_wheel, candidate.tags)
+        )
+
+
+def pinned_version(specifier: SpecifierSet) -> Optional[Version]:
+    """Return the version an exact pin is for, or None for other specifiers.
+
+    An exact pin is a single `==` clause (without a wildcard), or a single
+    `===` clause for a valid version. The versions a pin matches are all
+    at least the version returned, and next to each other in version order
+    (for `==1.0`, they are 1.0 and its local versions, such as 1.0+abc).
+    So a source with its versions in order only needs to look from the
+    pinned version up, and can stop at the first version that doesn't match.
+    """
+    if len(specifier) != 1:
+        return None
+    (spec,) = specifier
+    if spec.operator == "===" or (
+        spec.operator == "==" and not spec.version.endswith(".*")
+    ):
+        try:
+            return Version(spec.version)
+        except InvalidVersion:
+            return None
+    return None
+
+
+def _stop_below(candidates: Iterable[Candidate], pin: Version) -> Iterator[Candidate]:
+    for candidate in candidates:
+        if candidate.version < pin:
+            return
+        yield candidate
+
+
+def query_source(source: Source, query: Query) -> Iterable[Candidate]:
+    """Get candidates from a source, passing it the query if it can use it.
+
+    A source without a `query` method, but with a true `version_ordered`
+    attribute, yields candidates best version first. For an exact pin,
+    it is only read until its versions are lower than the pinned one.
+    """
+    method = getattr(source, "query", None)
+    if method is not None:
+        return method(query)
+    candidates = source(query.name)
+    if getattr(source, "version_ordered", False):
+        pin = query.pinned_version()
+        if pin is not None:
+            return _stop_below(candidates, pin)
+    return candidates
+
+
+def _compares_strings(specifier: SpecifierSet) -> bool:
+    """Say if a specifier uses arbitrary equality (``===``).
+
+    That compares version strings, so it tells apart versions which are
+    otherwise equal, like 0.2 and 0.2.0, and a result for one can't be
+    reused for the other.
+    """
+    return any(spec.operator == "===" for spec in specifier)
+
+
+def _memoised_contains(
+    specifier: Optional[SpecifierSet],
+) -> Callable[[Version], bool]:
+    """Return a function saying if a version is in the specifier.
+
+    Prereleases are always accepted, as in `Query.accepts_version`. The
+    result for each distinct version is only computed once, unless the
+    specifier compares version strings (see `_compares_strings`). A
+    specifier of None accepts everything.
+    """
+    if specifier is None or not specifier:
+        return lambda version: True
+    if _compares_strings(specifier):
+        return lambda version: specifier.contains(version, True)
+    results: Dict[Version, bool] = {}
+
+    def contains(version: Version) -> bool:
+        result = results.get(version)
+        if result is None:
+            result = results[version] = specifier.contains(version, True)
+        return result
+
+    return contains
+
+
+def _memoised_version_keys(
+    specifier: Optional[SpecifierSet],
+) -> Callable[[Candidate], Optional[VersionKey]]:
+    """Return a function giving a candidate's version sort key.
+
+    The function returns None if the version is not in the specifier
+    (with prereleases accepted, as in `Query.accepts_version`). The check
+    is made once per distinct version (unless the specifier compares
+    version strings, see `_compares_strings`), and the key (see `version_key`)
+    is taken from the candidate's `version_key` attribute if it has one.
+    """
+
+    def key_of(candidate: Candidate) -> Optional[VersionKey]:
+        result = getattr(candidate, "version_key", None)
+        if result is None:
+            result = version_key(candidate.version)
+        return result
+
+    if specifier is None or not specifier:
+        return key_of
+    if _compares_strings(specifier):
+
+        def checked_key_of(candidate: Candidate) -> Optional[VersionKey]:
+            if specifier.contains(candidate.version, True):
+                return key_of(candidate)
+            return None
+
+        return checked_key_of
+
+    results: Dict[Version, Optional[VersionKey]] = {}
+
+    def key(candidate: Candidate) -> Optional[VersionKey]:
+        version = candidate.version
+        try:
+            return results[version]
+        except KeyError:
+            pass
+        if specifier.contains(version, True):
+            result = getattr(candidate, "version_key", None)
+            if result is None:
+                result = version_key(version)
+        else:
+            result = None
+        results[version] = result
+        return result
+
+    return key
+
+
+class _LRUCache:
+    """A thread safe mapping, holding at most `maxsize` entries.
+
+    Once full, the least recently used entries are discarded.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+class _Ranked:
+    """A candidate in the best-first heap used by `Finder.iter_candidates`."""
+
+    __slots__ = ("key", "seq", "candidate")
+
+    def __init__(self, key: SortKey, seq: int, candidate: Candidate):
+        self.key = key
+        self.seq = seq
+        self.candidate = candidate
+
+    def __lt__(self, other: "_Ranked") -> bool:
+        # heapq pops the smallest item first, so "smaller" means "better".
+        # Equal keys are taken in the order the sources returned them,
+        # to match the stable sort in get_candidates.
+        if self.key == other.key:
+            return self.seq < other.seq
+        return self.key > other.key
+
+
 class Finder:
-    sources: List[Callable[[str], List[Candidate]]]
+    sources: List[Source]
     compatibility_tags: List[Tag]
     allow_prerelease: bool
     python_version: Version
     wheel_policy: Callable[[str], WheelPolicy]
     allow_yanked: bool
+    executor: Optional[Executor]
+    source_timeout: Optional[float]
+    source_errors: SourceErrorPolicy
+    cache_size: Optional[int]
+    collector: Optional[Collector]
 
     def __init__(
         self,
-        sources: List[Callable[[str], List[Candidate]]],
+        sources: List[Source],
         compatibility_tags: Optional[List[Tag]] = None,
         allow_prerelease: bool = False,
         python_version: Optional[Version] = None,
         wheel_policy: Optional[Callable[[str], WheelPolicy]] = None,
         allow_yanked: bool = False,
+        executor: Union[None, int, Executor] = None,
+        source_timeout: Optional[float] = None,
+        source_errors: SourceErrorPolicy = SourceErrorPolicy.RAISE,
+        cache_size: Optional[int] = None,
+        collector: Optional[Collector] = None,
     ):
         # Default values
         if compatibility_tags is None:
@@ -63,71 +380,491 @@ class Finder:
 
         self.sources = sources
         self.compatibility_tags = compatibility_tags
+        self._tag_ranks = tag_ranks(compatibility_tags)
         self.allow_prerelease = allow_prerelease
         self.python_version = python_version
         self.wheel_policy = wheel_policy
         self.allow_yanked = allow_yanked
+        self.source_timeout = source_timeout
+        self.source_errors = source_errors
+        self.collector = collector
 
-    def _sort_key(self, candidate: Candidate) -> Optional[SortKey]:
+        # An integer executor means "use our own pool of that many threads"
+        self._owns_executor = isinstance(executor, int)
+        if self._owns_executor:
+            executor = ThreadPoolExecutor(max_workers=executor)
+        self.executor = executor
 
-        # Handle the simple case first.
-        if self.python_version not in candidate.requires_python:
-            return None
+        # Results by (name, specifier), and the scored candidates for each
+        # project, valid as long as the sources' serials are unchanged.
+        self.cache_size = cache_size
+        self._results: Optional[_LRUCache] = None
+        self._projects: Optional[_LRUCache] = None
+        if cache_size is not None:
+            self._results = _LRUCache(cache_size)
+            self._projects = _LRUCache(cache_size)
+        self._serials = self._source_serials()
 
-        # Wheel handling. We need to know the policy.
-        wheel = self.wheel_policy(candidate.name)
-        wheel_first = 0
+    def _source_serials(self) -> Tuple:
+        return tuple(getattr(source, "serial", None) for source in self.sources)
 
-        if candidate.is_wheel:
-            if wheel == WheelPolicy.PROHIBIT:
-                return None
-            elif wheel == WheelPolicy.PREFER:
-                wheel_first = 1
+    def clear_cache(self) -> None:
+        """Discard all cached results."""
+        if self._results is not None:
+            self._results.clear()
+            self._projects.clear()
+
+    def _check_serials(self) -> None:
+        serials = self._source_serials()
+        if serials != self._serials:
+            self.clear_cache()
+            self._serials = serials
+
+    def close(self) -> None:
+        """Shut down the finder's thread pool, if it created one."""
+        if self._owns_executor:
+            self.executor.shutdown()
 
-            compatibility_level = compatibility(candidate.tags, self.compatibility_tags)
-            if compatibility_level == -1:
+    def _scorer(
+        self,
+        specifier: Optional[SpecifierSet] = None,
+        rejected: Optional[Dict[str, int]] = None,
+    ) -> Callable[[Candidate], Optional[SortKey]]:
+        """Return a function giving a candidate's sort key.
+
+        The function returns None for unacceptable candidates, including
+        those whose version is not in `specifier`, if one is given. If
+        `rejected` is given, it counts the rejections for each filter stage.
+
+        A project's files share a few Requires-Python values, tag sets
+        and names, and many files share a version, so the function
+        remembers the result of each check. As it holds on to the objects
+        it has seen, it should only be used for one batch of candidates.
+        """
+        python_version = self.python_version
+        ranks = self._tag_ranks
+        wheel_policy = self.wheel_policy
+        version_keys = _memoised_version_keys(specifier)
+        # Versions, specifiers and tag sets are keyed by identity, as
+        # hashing them is slow, and sources using a CandidatePool share
+        # them. Each entry keeps its key object alive, so that the ID
+        # can't be reused by a different object.
+        versions: Dict[int, Tuple[Version, Optional[VersionKey]]] = {}
+        python_ok: Dict[int, Tuple[SpecifierSet, bool]] = {}
+        levels: Dict[int, Tuple[Set[Tag], int]] = {}
+        policies: Dict[str, WheelPolicy] = {}
+
+        def sort_key(candidate: Candidate) -> Optional[SortKey]:
+            version = candidate.version
+            entry = versions.get(id(version))
+            if entry is None:
+                entry = versions[id(version)] = (version, version_keys(candidate))
+            version = entry[1]
+            if version is None:
+                if rejected is not None:
+                    rejected["specifier"] += 1
                 return None
-        else:
-            if wheel == WheelPolicy.REQUIRE:
+
+            # Handle the simple case first.
+            spec = candidate.requires_python
+            entry = python_ok.get(id(spec))
+            if entry is None:
+                entry = python_ok[id(spec)] = (spec, python_version in spec)
+            if not entry[1]:
+                if rejected is not None:
+                    rejected["requires_python"] += 1
                 return None
 
-            # Source distributions are considered
-            # "less compatible" than binaries.
-            compatibility_level = 0
+            # Wheel handling. We need to know the policy.
+            name = candidate.name
+            wheel = policies.get(name)
+            if wheel is None:
+                wheel = policies[name] = wheel_policy(name)
+            wheel_first = 0
+
+            if candidate.is_wheel:
+                if wheel == WheelPolicy.PROHIBIT:
+                    if rejected is not None:
+                        rejected["wheel_policy"] += 1
+                    return None
+                elif wheel == WheelPolicy.PREFER:
+                    wheel_first = 1
+
+                tags = candidate.tags
+                level = levels.get(id(tags))
+                if level is None:
+                    level = levels[id(tags)] = (
+                        tags,
+                        ranked_compatibility(tags, ranks),
+                    )
+                compatibility_level = level[1]
+                if compatibility_level == -1:
+                    if rejected is not None:
+                        rejected["tags"] += 1
+                    return None
+            else:
+                if wheel == WheelPolicy.REQUIRE:
+                    if rejected is not None:
+                        rejected["wheel_policy"] += 1
+                    return None
+
+                # Source distributions are considered
+                # "less compatible" than binaries.
+                compatibility_level = 0
+
+            # We're a valid match. Sort key is:
+            #
+            #   - Wheel first, if prefer_wheel
+            #   - Version
+            #   - More compatible before less compatible
+
+            return (wheel_first, version, compatibility_level)
+
+        return sort_key
+
+    def _source_failed(self, source: Source, name: str, exc: Exception) -> None:
+        if self.source_errors == SourceErrorPolicy.RAISE:
+            raise exc
+        logger.warning("Source %r failed for %s", source, name, exc_info=exc)
+
+    def query(self, name: str, specifier: Optional[SpecifierSet] = None) -> Query:
+        """Build the query passed to sources for a (canonical) project name."""
+        if specifier is None:
+            specifier = SpecifierSet()
+        return Query(
+            name,
+            specifier,
+            self.python_version,
+            self._tag_ranks,
+            self.wheel_policy(name),
+            self.allow_prerelease,
+            self.allow_yanked,
+        )
+
+    def _call_source(self, source: Source, query: Query) -> List[Candidate]:
+        collector = self.collector
+        if collector is None:
+            return list(query_source(source, query))
+        start = time.perf_counter()
+        try:
+            result = list(query_source(source, query))
+        except BaseException as e:
+            elapsed = time.perf_counter() - start
+            collector.source_fetched(source, query.name, elapsed, 0, e)
+            raise
+        elapsed = time.perf_counter() - start
+        collector.source_fetched(source, query.name, elapsed, len(result), None)
+        return result
+
+    def _fetch(self, query: Query) -> Iterable[Candidate]:
+        """Get all the candidates for a project from every source.
 
-        # We're a valid match. Sort key is:
-        #
-        #   - Wheel first, if prefer_wheel
-        #   - Version
-        #   - More compatible before less compatible
+        Candidates are returned in source order, so that the final
+        ordering does not depend on which source responds first.
+        """
+        if self.collector is None:
+            return self._fetch_all(query)
+        start = time.perf_counter()
+        result = self._fetch_all(query)
+        self.collector.timed(query.name, "fetch", time.perf_counter() - start)
+        return result
 
-        return (wheel_first, candidate.version, compatibility_level)
+    def _fetch_all(self, query: Query) -> Iterable[Candidate]:
+        name = query.name
+        if self.executor is None:
+            results = []
+            for source in self.sources:
+                try:
+                    results.append(self._call_source(source, query))
+                except Exception as e:
+                    self._source_failed(source, name, e)
+            return itertools.chain.from_iterable(results)
+
+        futures = [
+            self.executor.submit(self._call_source, source, query)
+            for source in self.sources
+        ]
+        if self.source_timeout is not None:
+            deadline = time.monotonic() + self.source_timeout
+        results = []
+        for source, future in zip(self.sources, futures):
+            timeout = None
+            if self.source_timeout is not None:
+                timeout = max(0, deadline - time.monotonic())
+            try:
+                results.append(future.result(timeout))
+            except FutureTimeoutError as e:
+                future.cancel()
+                self._source_failed(source, name, e)
+            except Exception as e:
+                self._source_failed(source, name, e)
+        return itertools.chain.from_iterable(results)
 
     def get_candidates(self, req: Requirement) -> List[Candidate]:
         """Return candidates matching the requirement."""
+        name = canonicalize_name(req.name)
+        if self._results is None:
+            return self._select(req, self._fetch(self.query(name, req.specifier)))
+
+        self._check_serials()
+        key = (name, req.specifier)
+        result = self._results.get(key)
+        if self.collector is not None:
+            self.collector.cache_lookup("results", result is not None)
+        if result is None and (
+            name not in self._projects and pinned_version(req.specifier) is not None
+        ):
+            # Sources can look up an exact pin's files without reading the
+            # whole project, so don't fetch the whole project to cache it.
+            result = self._select(req, self._fetch(self.query(name, req.specifier)))
+            self._results.put(key, result)
+        elif result is None:
+            version_ok = _memoised_contains(req.specifier)
+            scored = self._scored(name)
+            keyed = [(k, c) for (k, c) in scored if version_ok(c.version)]
+            if self.collector is not None:
+                self.collector.filtered(name, "specifier", len(scored), len(keyed))
+            result = self._order(keyed, name)
+            self._results.put(key, result)
+        # Callers may modify the list, so don't hand out the cached one
+        return list(result)
+
+    def _scored(self, name: str) -> List[Tuple[SortKey, Candidate]]:
+        """Return the acceptable candidates for a project, best first.
+
+        The list is not filtered by any specifier, and is cached, so
+        requirements with different specifiers can share it.
+        """
+        scored = self._projects.get(name)
+        if self.collector is not None:
+            self.collector.cache_lookup("projects", scored is not None)
+        if scored is None:
+            scored = []
+            rejected = None if self.collector is None else dict.fromkeys(STAGES, 0)
+            sort_key = self._scorer(rejected=rejected)
+            total = 0
+            for candidate in self._fetch(self.query(name)):
+                total += 1
+                key = sort_key(candidate)
+                if key is not None:
+                    scored.append((key, candidate))
+            if rejected is not None:
+                self._report_rejected(name, total, rejected, STAGES[1:4])
+            scored.sort(key=itemgetter(0), reverse=True)
+            self._projects.put(name, scored)
+        return scored
+
+    def _report_rejected(
+        self, name: str, total: int, rejected: Dict[str, int], stages: Iterable[str]
+    ) -> None:
+        for stage in stages:
+            self.collector.filtered(name, stage, total, total - rejected[stage])
+            total -= rejected[stage]
+
+    def find_many(
+        self, reqs: Iterable[Requirement], max_workers: Optional[int] = None
+    ) -> Dict[Requirement, List[Candidate]]:
+        """Return candidates for each of a collection of requirements.
+
+        The result maps each requirement to the same list that
+        `get_candidates` would return for it. Each distinct project is
+        only fetched from the sources once, and the fetches are run
+        concurrently, using a thread pool of up to `max_workers` threads.
+        """
+        reqs = list(reqs)
+        names = list(dict.fromkeys(canonicalize_name(req.name) for req in reqs))
+
+        if self._results is not None:
+            # Fill the project cache concurrently, then use it
+            self._check_serials()
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(self._scored, names))
+            return {req: self.get_candidates(req) for req in reqs}
+
+        # Different requirements for the same project may have different
+        # specifiers, so the sources are not asked to filter on them.
+        def fetch(name):
+            return list(self._fetch(self.query(name)))
+
+        # Use a separate pool for the projects, as tasks waiting on
+        # sources submitted to self.executor must not occupy its threads.
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = dict(zip(names, pool.map(fetch, names)))
+
+        return {
+            req: self._select(req, fetched[canonicalize_name(req.name)]) for req in reqs
+        }
+
+    def _select(
+        self, req: Requirement, all_candidates: Iterable[Candidate]
+    ) -> List[Candidate]:
+        if self.collector is not None:
+            return self._select_measured(req, all_candidates)
         candidates = []
-        for source in self.sources:
-            for candidate in source(req.name):
-                if not req.specifier.contains(candidate.version, True):
-                    continue
-                key = self._sort_key(candidate)
-                if key is None:
-                    continue
-                candidates.append((key, candidate))
-        candidates.sort(reverse=True)
-        candidates = [c for (k, c) in candidates]
+        sort_key = self._scorer(req.specifier)
+        for candidate in all_candidates:
+            key = sort_key(candidate)
+            if key is None:
+                continue
+            candidates.append((key, candidate))
+        return self._order(candidates)
+
+    def _select_measured(
+        self, req: Requirement, all_candidates: Iterable[Candidate]
+    ) -> List[Candidate]:
+        """The same as _select, reporting to the collector as it goes."""
+        name = canonicalize_name(req.name)
+        start = time.perf_counter()
+        rejected = dict.fromkeys(STAGES, 0)
+        sort_key = self._scorer(req.specifier, rejected)
+        total = 0
+        candidates = []
+        for candidate in all_candidates:
+            total += 1
+            key = sort_key(candidate)
+            if key is None:
+                continue
+            candidates.append((key, candidate))
+        filtered = time.perf_counter()
+        self.collector.timed(name, "filter", filtered - start)
+        self._report_rejected(name, total, rejected, STAGES[:4])
+        result = self._order(candidates, name)
+        self.collector.timed(name, "order", time.perf_counter() - filtered)
+        return result
+
+    def _order(
+        self, keyed: List[Tuple[SortKey, Candidate]], name: Optional[str] = None
+    ) -> List[Candidate]:
+        """Sort acceptable candidates, and apply the fallback rules.
+
+        If there is a collector, the fallback rules are reported to it
+        as filter stages for the project `name`.
+        """
+        # The sort is stable, so candidates with equal keys stay in
+        # the order the sources returned them.
+        keyed.sort(key=itemgetter(0), reverse=True)
+        candidates = [c for (k, c) in keyed]
+        collector = self.collector
+        before = len(candidates)
 
         # Remove prereleases unless we explicitly allow them, or the only
         # versions selected are pre-releases.
         # See https://www.python.org/dev/peps/pep-0440/#handling-of-pre-releases
-        if not (
-            self.allow_prerelease or all(c.version.is_prerelease for c in candidates)
-        ):
-            candidates = [c for c in candidates if not c.version.is_prerelease]
+        if not self.allow_prerelease:
+            # Checking the keys is quicker than asking each version if it
+            # is a pre-release.
+            finals = [c for (k, c) in keyed if is_final(k[1])]
+            if finals:
+                candidates = finals
+        if collector is not None:
+            collector.filtered(name, "prerelease", before, len(candidates))
+            before = len(candidates)
 
         # If we allow yanked candidates when they are the only option,
         # do so now.
-        if self.allow_yanked and all(c.is_yanked for c in candidates):
-            return candidates
+        if not (self.allow_yanked and all(c.is_yanked for c in candidates)):
+            candidates = [c for c in candidates if not c.is_yanked]
+        if collector is not None:
+            collector.filtered(name, "yanked", before, len(candidates))
+        return candidates
+
+    def iter_candidates(self, req: Requirement) -> Iterator[Candidate]:
+        """Yield candidates matching the requirement, best first.
+
+        This yields the same candidates as `get_candidates`, in the same
+        order, but the candidates are only ranked as they are needed. So
+        callers that only want the best few candidates do not pay for
+        sorting all of them.
+
+        If the finder has a cache, the results come from the cache. The
+        prerelease and yanked filter stages are reported to the collector
+        (if any) once all the candidates have been yielded.
+        """
+        if self._results is not None:
+            yield from self.get_candidates(req)
+            return
+
+        heap = []
+        query = self.query(canonicalize_name(req.name), req.specifier)
+        candidates = self._fetch(query)
+        rejected = None if self.collector is None else dict.fromkeys(STAGES, 0)
+        sort_key = self._scorer(req.specifier, rejected)
+        seq = -1
+        for seq, candidate in enumerate(candidates):
+            key = sort_key(candidate)
+            if key is None:
+                continue
+            heap.append(_Ranked(key, seq, candidate))
+        heapq.heapify(heap)
+        if rejected is not None:
+            self._report_rejected(query.name, seq + 1, rejected, STAGES[:4])
+
+        def ranked():
+            while heap:
+                yield heapq.heappop(heap).candidate
+
+        yield from self._lazy_fallbacks(ranked(), query.name)
+
+    def _lazy_fallbacks(
+        self, ranked: Iterator[Candidate], name: Optional[str] = None
+    ) -> Iterator[Candidate]:
+        """Apply the prerelease and yanked rules of get_candidates lazily.
+
+        Candidates that are certain to be in the result are yielded as soon
+        as they are seen. Prereleases (when not allowed) and yanked files
+        are only used if nothing else is available, so they are held back
+        until we know whether that is the case.
+
+        If there is a collector, the rules are reported to it as filter
+        stages for the project `name`, as in `_order`, once every
+        candidate has been yielded.
+        """
+        filter_prereleases = not self.allow_prerelease
+        seen_final = False
+        seen_unyanked = False
+        held_prereleases = []
+        held_yanked = []
+        # Counts for the collector: all candidates, prereleases held back,
+        # and yanked files among the others
+        total = prereleases = yanked = 0
+
+        for c in ranked:
+            total += 1
+            if filter_prereleases:
+                if c.version.is_prerelease:
+                    prereleases += 1
+                    if not seen_final:
+                        held_prereleases.append(c)
+                    continue
+                if not seen_final:
+                    seen_final = True
+                    held_prereleases = []
+            if c.is_yanked:
+                yanked += 1
+                if not seen_unyanked:
+                    held_yanked.append(c)
+                continue
+            if not seen_unyanked:
+                seen_unyanked = True
+                held_yanked = []
+            yield c
+
+        if filter_prereleases and not seen_final:
+            # There were only prereleases, so they are all allowed.
+            unyanked = [c for c in held_prereleases if not c.is_yanked]
+            prereleases = 0
+            yanked = len(held_prereleases) - len(unyanked)
+            if unyanked:
+                yield from unyanked
+            elif self.allow_yanked:
+                yield from held_prereleases
+        elif not seen_unyanked and self.allow_yanked:
+            yield from held_yanked
 
-        return [c for c in candidates if not c.is_yanked]
+        if self.collector is not None:
+            before = total - prereleases
+            after = before - yanked
+            if self.allow_yanked and after == 0:
+                after = before
+            self.collector.filtered(name, "prerelease", total, before)
+            self.collector.filtered(name, "yanked", before, after)
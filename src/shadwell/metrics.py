@@ -0,0 +1,108 @@
+"""Measuring where a finder spends its time.
+
+A finder (or a `JsonSource`) given a `collector` reports what it does to
+it, by calling the collector's methods. `Collector` does nothing with the
+reports, and is meant to be subclassed, for example to feed an existing
+metrics system. `Metrics` is a collector that keeps running totals.
+
+When no collector is given, nothing is measured, and the only cost is
+a check of whether there is a collector.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+# The finder's filter stages, in the order they are applied
+STAGES = (
+    "specifier",
+    "requires_python",
+    "wheel_policy",
+    "tags",
+    "prerelease",
+    "yanked",
+)
+
+
+class Collector:
+    """Receives measurements. All methods do nothing by default."""
+
+    def source_fetched(
+        self,
+        source: Any,
+        name: str,
+        seconds: float,
+        candidates: int,
+        error: Optional[BaseException],
+    ) -> None:
+        """A source was called for a project.
+
+        `candidates` is the number of candidates it returned, and `error`
+        the exception it raised, if it failed.
+        """
+
+    def bytes_fetched(self, url: str, size: int) -> None:
+        """A source read `size` bytes of the response for `url`.
+
+        Only responses from the network are reported, not bodies read
+        from an `HTTPCache` (after a 304 response, `size` is 0).
+        """
+
+    def filtered(self, name: str, stage: str, before: int, after: int) -> None:
+        """A filter stage (see `STAGES`) reduced `before` candidates to `after`."""
+
+    def timed(self, name: str, step: str, seconds: float) -> None:
+        """A step ("fetch", "filter" or "order") of a lookup took `seconds`."""
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        """The finder looked in its "results" or "projects" cache."""
+
+
+class Metrics(Collector):
+    """A collector that keeps totals of everything reported to it.
+
+    Totals are kept per source (by `repr`), per filter stage and per
+    step. The collector is thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # source -> number of calls, errors, candidates, total seconds
+            self.sources: Dict[str, List] = {}
+            self.bytes = 0
+            # stage -> total candidates before, after
+            self.stages: Dict[str, List[int]] = {stage: [0, 0] for stage in STAGES}
+            # step -> total seconds
+            self.times: Dict[str, float] = {}
+            # cache -> hits, misses
+            self.caches: Dict[str, List[int]] = {}
+
+    def source_fetched(self, source, name, seconds, candidates, error):
+        with self._lock:
+            totals = self.sources.setdefault(repr(source), [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += error is not None
+            totals[2] += candidates
+            totals[3] += seconds
+
+    def bytes_fetched(self, url, size):
+        with self._lock:
+            self.bytes += size
+
+    def filtered(self, name, stage, before, after):
+        with self._lock:
+            totals = self.stages[stage]
+            totals[0] += before
+            totals[1] += after
+
+    def timed(self, name, step, seconds):
+        with self._lock:
+            self.times[step] = self.times.get(step, 0.0) + seconds
+
+    def cache_lookup(self, cache, hit):
+        with self._lock:
+            totals = self.caches.setdefault(cache, [0, 0])
+            totals[0 if hit else 1] += 1
@@ -0,0 +1,182 @@
+"""Finding candidates for several target environments at once.
+
+Lock files are often built for many platforms and Python versions. Using a
+separate `Finder` for each target would fetch and parse every project once
+per target, so `MultiTargetFinder` fetches each project once, and scores
+each candidate against all of the targets in a single pass.
+"""
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+from .candidate import Candidate
+from .finder import (
+    Finder,
+    Query,
+    SortKey,
+    Source,
+    SourceErrorPolicy,
+    WheelPolicy,
+    _memoised_version_keys,
+    ranked_compatibility,
+    tag_ranks,
+)
+
+
+class Target(NamedTuple):
+    """An environment to find candidates for."""
+
+    compatibility_tags: List[Tag]
+    python_version: Version
+
+
+class MultiTargetFinder:
+    """A finder that selects candidates for several targets at once.
+
+    `targets` maps a label for each target to a `Target`. The other
+    arguments are the same as for `Finder`, and apply to every target.
+    Results are dictionaries mapping each target's label to the list of
+    candidates that a `Finder` for that target would return.
+    """
+
+    targets: Dict[Hashable, Target]
+
+    def __init__(
+        self,
+        sources: List[Source],
+        targets: Mapping[Hashable, Target],
+        allow_prerelease: bool = False,
+        wheel_policy: Optional[Callable[[str], WheelPolicy]] = None,
+        allow_yanked: bool = False,
+        executor: Union[None, int, Executor] = None,
+        source_timeout: Optional[float] = None,
+        source_errors: SourceErrorPolicy = SourceErrorPolicy.RAISE,
+    ):
+        self.targets = dict(targets)
+        # Fetching, and the prerelease and yanked rules, are the same for
+        # every target, so they are left to a Finder. Its own tags and
+        # Python version are not used.
+        self._finder = Finder(
+            sources,
+            compatibility_tags=[],
+            allow_prerelease=allow_prerelease,
+            wheel_policy=wheel_policy,
+            allow_yanked=allow_yanked,
+            executor=executor,
+            source_timeout=source_timeout,
+            source_errors=source_errors,
+        )
+        self._labels = list(self.targets)
+        self._tag_ranks = [
+            tag_ranks(t.compatibility_tags) for t in self.targets.values()
+        ]
+        self._python_versions = [t.python_version for t in self.targets.values()]
+        # A wheel is worth fetching if it is compatible with any target
+        self._any_tag: Dict[Tag, int] = {}
+        for ranks in self._tag_ranks:
+            self._any_tag.update(ranks)
+
+    def close(self) -> None:
+        """Shut down the finder's thread pool, if it created one."""
+        self._finder.close()
+
+    def query(self, name: str, specifier: Optional[SpecifierSet] = None) -> Query:
+        """Build the query passed to sources for a (canonical) project name.
+
+        The query accepts anything that some target would accept.
+        """
+        if specifier is None:
+            specifier = SpecifierSet()
+        f = self._finder
+        return Query(
+            name,
+            specifier,
+            None,
+            self._any_tag,
+            f.wheel_policy(name),
+            f.allow_prerelease,
+            f.allow_yanked,
+        )
+
+    def get_candidates(self, req: Requirement) -> Dict[Hashable, List[Candidate]]:
+        """Return candidates matching the requirement, for each target."""
+        query = self.query(canonicalize_name(req.name), req.specifier)
+        return self._select(req, self._finder._fetch(query))
+
+    def find_many(
+        self, reqs: Iterable[Requirement], max_workers: Optional[int] = None
+    ) -> Dict[Requirement, Dict[Hashable, List[Candidate]]]:
+        """Return candidates for each of a collection of requirements.
+
+        As with `Finder.find_many`, each project is fetched only once.
+        """
+        reqs = list(reqs)
+        names = list(dict.fromkeys(canonicalize_name(req.name) for req in reqs))
+
+        def fetch(name):
+            return list(self._finder._fetch(self.query(name)))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            fetched = dict(zip(names, pool.map(fetch, names)))
+
+        return {
+            req: self._select(req, fetched[canonicalize_name(req.name)]) for req in reqs
+        }
+
+    def _select(
+        self, req: Requirement, all_candidates: Iterable[Candidate]
+    ) -> Dict[Hashable, List[Candidate]]:
+        policy = self._finder.wheel_policy(canonicalize_name(req.name))
+        all_ranks = self._tag_ranks
+        no_tags = [0] * len(all_ranks)
+        # Requires-Python values are shared by many files, so each one
+        # is only checked against the target versions once.
+        python_ok: Dict[SpecifierSet, List[bool]] = {}
+        keyed: List[List[Tuple[SortKey, Candidate]]] = [[] for _ in all_ranks]
+        version_keys = _memoised_version_keys(req.specifier)
+
+        for candidate in all_candidates:
+            version = version_keys(candidate)
+            if version is None:
+                continue
+            wheel_first = 0
+            if candidate.is_wheel:
+                if policy == WheelPolicy.PROHIBIT:
+                    continue
+                if policy == WheelPolicy.PREFER:
+                    wheel_first = 1
+                tags = candidate.tags
+                levels = [ranked_compatibility(tags, ranks) for ranks in all_ranks]
+            else:
+                if policy == WheelPolicy.REQUIRE:
+                    continue
+                levels = no_tags
+
+            spec = candidate.requires_python
+            ok = python_ok.get(spec)
+            if ok is None:
+                ok = python_ok[spec] = [v in spec for v in self._python_versions]
+
+            for results, level, python_matches in zip(keyed, levels, ok):
+                if python_matches and level != -1:
+                    results.append(((wheel_first, version, level), candidate))
+
+        order = self._finder._order
+        return {label: order(k) for label, k in zip(self._labels, keyed)}
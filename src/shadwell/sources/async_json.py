@@ -0,0 +1,134 @@
+"""An async JSON API source, with a minimal HTTP client built on asyncio.
+
+The client only does what `AsyncJsonSource` needs: GET requests over a new
+connection each time, following redirects. It doesn't use proxies (the
+`http_proxy` and `https_proxy` environment variables are ignored), request
+compressed responses or cache anything. Where that matters, wrap a
+`JsonSource` with `shadwell.aio.from_sync` instead.
+"""
+
+import asyncio
+import json
+import ssl
+from http.client import BadStatusLine
+from typing import Dict, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+
+from .json_api import PYPI_TEMPLATE, candidates_from_json
+from .transport import MAX_REDIRECTS
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            # Skip any trailers
+            await _read_headers(reader)
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()
+
+
+async def _request(url: str, timeout: Optional[float]) -> Tuple[int, Dict, bytes]:
+    # The timeout covers the whole exchange, from connecting to reading
+    # the last byte of the body.
+    return await asyncio.wait_for(_exchange(url), timeout)
+
+
+async def _exchange(url: str) -> Tuple[int, Dict, bytes]:
+    parts = urlsplit(url)
+    if parts.scheme == "https":
+        context = ssl.create_default_context()
+        port = parts.port or 443
+    elif parts.scheme == "http":
+        context = None
+        port = parts.port or 80
+    else:
+        raise ValueError("Unsupported URL scheme: {}".format(parts.scheme))
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=context)
+    try:
+        request = (
+            "GET {} HTTP/1.1\r\n"
+            "Host: {}\r\n"
+            "Accept: application/json\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: close\r\n"
+            "\r\n"
+        ).format(path, parts.netloc)
+        writer.write(request.encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        fields = status_line.decode("latin-1").split(None, 2)
+        if len(fields) < 2 or not fields[0].startswith("HTTP/"):
+            raise BadStatusLine(repr(status_line))
+        try:
+            status = int(fields[1])
+        except ValueError:
+            raise BadStatusLine(repr(status_line)) from None
+        headers = await _read_headers(reader)
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await _read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+    finally:
+        writer.close()
+    return status, headers, body
+
+
+async def fetch(url: str, timeout: Optional[float] = None) -> bytes:
+    """Fetch the body of a URL, using asyncio streams.
+
+    Redirects are followed, and error statuses raise
+    `urllib.error.HTTPError`, as they would from `urlopen`. A response
+    without a valid status line raises `http.client.BadStatusLine`, and
+    if `timeout` is given, the whole of each request must finish within
+    it (or `asyncio.TimeoutError` is raised).
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        status, headers, body = await _request(url, timeout)
+        if status in (301, 302, 303, 307, 308):
+            url = urljoin(url, headers["location"])
+            continue
+        if status >= 400:
+            raise HTTPError(url, status, "HTTP error", headers, None)
+        return body
+    raise HTTPError(url, status, "Too many redirects", headers, None)
+
+
+class AsyncJsonSource:
+    """An async version of `JsonSource`, for use with `AsyncFinder`."""
+
+    def __init__(self, template=PYPI_TEMPLATE, timeout=None):
+        self.template = template
+        self.timeout = timeout
+
+    async def __call__(self, name):
+        try:
+            body = await fetch(self.template.format(pkg=name), self.timeout)
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            # The project doesn't exist
+            return
+        for candidate in candidates_from_json(name, json.loads(body)):
+            yield candidate
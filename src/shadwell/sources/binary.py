@@ -0,0 +1,502 @@
+"""A read-only, memory-mapped binary index of candidates.
+
+The index file is laid out as follows (all integers little-endian):
+
+* A header (`HEADER`), giving the number of entries in each table and
+  where each table starts.
+* The project table: one fixed-width entry (`PROJECT`) per project,
+  sorted by name, giving the project's name and its range of records.
+* The record table: one fixed-width entry (`RECORD`) per file, holding
+  string IDs for the version, tags, Requires-Python, filename and URL,
+  plus the version's rank within its project and a flags byte. Each
+  project's records are stored best version first.
+* The string table: an (offset, length) entry (`STRING`) per string.
+* The string data, UTF-8 encoded. Versions, tag sets and specifiers are
+  interned, so each distinct value is stored (and decoded) only once.
+
+As the file is opened with mmap, worker processes that open the same
+index share its pages through the OS page cache. Records are only
+decoded when a candidate's attributes are actually used.
+
+An index is never modified in place. `sync_index` writes a new file and
+renames it over the old one. A `BinaryIndexSource` created with
+`reload=True` notices the new file and opens it, while lookups already
+running finish with the old one.
+
+Windows doesn't allow a file to be replaced while it is memory-mapped, so
+there, writing an index over one that any process has open fails with a
+`PermissionError`. Close every `BinaryIndexSource` using the file first,
+or write the new index to a different path and open that instead.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from ..candidate import (
+    DEFAULT_POOL,
+    CandidatePool,
+    CompactCandidate,
+    VersionKey,
+    version_key,
+)
+from ..finder import Query, Source, WheelPolicy
+from .changelog import changes_since
+from .sqlite import tags_from_str, tags_to_str
+
+MAGIC = b"SHWL"
+FORMAT_VERSION = 1
+
+# magic, format version, serial, projects, records, strings,
+# then the offsets of the project, record, string and string data tables
+HEADER = struct.Struct("<4sIqIII4xQQQQ")
+# name string ID, first record, record count
+PROJECT = struct.Struct("<III")
+# version, version rank, tags, requires_python, filename, url, flags
+RECORD = struct.Struct("<IIIIIIB3x")
+# offset, length
+STRING = struct.Struct("<QI4x")
+
+FLAG_WHEEL = 1
+FLAG_YANKED = 2
+
+
+def _file_id(st: os.stat_result) -> Tuple[int, int, int, int]:
+    # Identifies a version of a file, as a new index replaces the old file
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class BinaryIndex:
+    """An open binary index file."""
+
+    def __init__(self, path: str, pool: Optional[CandidatePool] = None):
+        if pool is None:
+            pool = DEFAULT_POOL
+        self.path = path
+        self.pool = pool
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.file_id = _file_id(os.fstat(f.fileno()))
+        (
+            magic,
+            version,
+            self.serial,
+            self.project_count,
+            self.record_count,
+            self.string_count,
+            self._projects_at,
+            self._records_at,
+            self._strings_at,
+            self._data_at,
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError("{} is not a shadwell binary index".format(path))
+        self._versions: Dict[int, Version] = {}
+        self._specifiers: Dict[int, SpecifierSet] = {}
+        self._tags: Dict[int, FrozenSet[Tag]] = {}
+
+    def close(self) -> None:
+        self._map.close()
+
+    def string(self, string_id: int) -> str:
+        offset, length = STRING.unpack_from(
+            self._map, self._strings_at + string_id * STRING.size
+        )
+        start = self._data_at + offset
+        return self._map[start : start + length].decode("utf-8")
+
+    def version(self, string_id: int) -> Version:
+        result = self._versions.get(string_id)
+        if result is None:
+            result = self._versions[string_id] = self.pool.version(
+                self.string(string_id)
+            )
+        return result
+
+    def version_key(self, string_id: int) -> VersionKey:
+        return self.pool.version_key(self.version(string_id))
+
+    def specifier(self, string_id: int) -> SpecifierSet:
+        result = self._specifiers.get(string_id)
+        if result is None:
+            result = self._specifiers[string_id] = self.pool.specifier(
+                self.string(string_id)
+            )
+        return result
+
+    def tags(self, string_id: int) -> FrozenSet[Tag]:
+        result = self._tags.get(string_id)
+        if result is None:
+            result = self._tags[string_id] = self.pool.tags(
+                tags_from_str(self.string(string_id))
+            )
+        return result
+
+    def _project(self, i: int) -> Tuple[int, int, int]:
+        return PROJECT.unpack_from(self._map, self._projects_at + i * PROJECT.size)
+
+    def project_names(self) -> List[str]:
+        return [self.string(self._project(i)[0]) for i in range(self.project_count)]
+
+    def find(self, name: str) -> range:
+        """Return the range of record numbers for a project."""
+        key = name.encode("utf-8")
+        lo, hi = 0, self.project_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name_id, first, count = self._project(mid)
+            found = self.string(name_id).encode("utf-8")
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return range(first, first + count)
+        return range(0)
+
+    def pinned(
+        self, records: range, pin: Version, accepts: Callable[[Version], bool]
+    ) -> range:
+        """Narrow a project's records to those matching an exact pin.
+
+        The versions matching a pin are next to each other in version
+        order (see `pinned_version`), so they are found with a binary
+        search for the first record below the pinned version, followed
+        by a scan back over the records that `accepts`. Records equal to
+        the pinned version are included even if not accepted, as they can
+        come in any order (`===1.0` accepts 1.0 but not 1.0.0).
+        """
+        pin_key = version_key(pin)
+        lo, hi = records.start, records.stop
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.version_key(self.record(mid)[0]) < pin_key:
+                hi = mid
+            else:
+                lo = mid + 1
+        start = end = lo
+        checked: Dict[int, bool] = {}
+        while start > records.start:
+            version = self.record(start - 1)[0]
+            ok = checked.get(version)
+            if ok is None:
+                ok = checked[version] = self.version_key(version) == pin_key or accepts(
+                    self.version(version)
+                )
+            if not ok:
+                break
+            start -= 1
+        return range(start, end)
+
+    def record(self, i: int) -> Tuple[int, int, int, int, int, int, int]:
+        return RECORD.unpack_from(self._map, self._records_at + i * RECORD.size)
+
+
+class LazyCandidate:
+    """A candidate whose fields are decoded from the index on first use."""
+
+    __slots__ = ("name", "_index", "_record")
+
+    def __init__(self, name: str, index: BinaryIndex, record: Tuple):
+        self.name = name
+        self._index = index
+        self._record = record
+
+    @property
+    def version(self) -> Version:
+        return self._index.version(self._record[0])
+
+    @property
+    def version_key(self) -> VersionKey:
+        return self._index.version_key(self._record[0])
+
+    @property
+    def version_rank(self) -> int:
+        return self._record[1]
+
+    @property
+    def tags(self) -> FrozenSet[Tag]:
+        return self._index.tags(self._record[2])
+
+    @property
+    def requires_python(self) -> SpecifierSet:
+        return self._index.specifier(self._record[3])
+
+    @property
+    def filename(self) -> str:
+        return self._index.string(self._record[4])
+
+    @property
+    def url(self) -> str:
+        return self._index.string(self._record[5])
+
+    @property
+    def is_wheel(self) -> bool:
+        return bool(self._record[6] & FLAG_WHEEL)
+
+    @property
+    def is_yanked(self) -> bool:
+        return bool(self._record[6] & FLAG_YANKED)
+
+    def __repr__(self) -> str:
+        return "<LazyCandidate {!r}>".format(self.filename)
+
+
+class BinaryIndexSource:
+    """A source that looks candidates up in a binary index file.
+
+    Candidates are returned best version first, and for an exact pin,
+    only the pinned version's records are read.
+
+    The index file is opened once, and used even if the file is replaced.
+    With `reload=True`, the file is checked at each lookup, and if it has
+    been replaced (for example by `sync_index`), the new index is opened.
+    """
+
+    def __init__(
+        self, path: str, pool: Optional[CandidatePool] = None, reload: bool = False
+    ):
+        self.path = path
+        self.pool = pool
+        self.reload = reload
+        self.index = BinaryIndex(path, pool)
+
+    # Candidates are returned best version first
+    version_ordered = True
+
+    def _current(self) -> BinaryIndex:
+        index = self.index
+        if not self.reload:
+            return index
+        try:
+            replaced = _file_id(os.stat(self.path)) != index.file_id
+        except FileNotFoundError:
+            replaced = False
+        if replaced:
+            # The old index isn't closed, as lookups (or candidates) may
+            # still be using it. Its mapping is released when they're done.
+            index = self.index = BinaryIndex(self.path, self.pool)
+        return index
+
+    @property
+    def serial(self) -> int:
+        """The serial number the index was built with."""
+        return self._current().serial
+
+    def projects(self) -> List[str]:
+        """Return the names of all the projects in the index."""
+        return self._current().project_names()
+
+    def close(self) -> None:
+        self.index.close()
+
+    def __call__(self, name):
+        index = self._current()
+        for i in index.find(name):
+            yield LazyCandidate(name, index, index.record(i))
+
+    def query(self, query: Query):
+        """Yield the candidates for a project that the query accepts.
+
+        Records are checked using their flags and interned string IDs, so
+        each distinct version, Requires-Python and tag set value is only
+        checked once, and rejected records are never decoded.
+        """
+        index = self._current()
+        skip = 0
+        if query.wheel_policy == WheelPolicy.REQUIRE:
+            skip_sdists = True
+        else:
+            skip_sdists = False
+            if query.wheel_policy == WheelPolicy.PROHIBIT:
+                skip |= FLAG_WHEEL
+
+        records = index.find(query.name)
+        pin = query.pinned_version()
+        if pin is not None:
+            records = index.pinned(records, pin, query.accepts_version)
+
+        versions: Dict[int, bool] = {}
+        specs: Dict[int, bool] = {}
+        tag_sets: Dict[int, bool] = {}
+        for i in records:
+            record = index.record(i)
+            version, _, tags, spec, _, _, flags = record
+            if flags & skip or (skip_sdists and not flags & FLAG_WHEEL):
+                continue
+            ok = versions.get(version)
+            if ok is None:
+                ok = versions[version] = query.accepts_version(index.version(version))
+            if not ok:
+                continue
+            ok = specs.get(spec)
+            if ok is None:
+                ok = specs[spec] = query.accepts_python(index.specifier(spec))
+            if not ok:
+                continue
+            if flags & FLAG_WHEEL:
+                ok = tag_sets.get(tags)
+                if ok is None:
+                    ok = tag_sets[tags] = query.accepts_file(True, index.tags(tags))
+                if not ok:
+                    continue
+            yield LazyCandidate(query.name, index, record)
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[bytes] = []
+
+    def add(self, value: str, intern: bool = True) -> int:
+        if intern:
+            string_id = self.ids.get(value)
+            if string_id is not None:
+                return string_id
+        string_id = len(self.strings)
+        self.strings.append(value.encode("utf-8"))
+        if intern:
+            self.ids[value] = string_id
+        return string_id
+
+
+def write_index(
+    path: str, projects: Iterable[Tuple[str, Iterable]], serial: int = 0
+) -> None:
+    """Write a binary index from (name, candidates) pairs.
+
+    The candidates can be any candidate objects, and need `filename` and
+    `url` attributes as well as the standard ones. The file is written to
+    a temporary name and renamed into place, so readers never see a
+    partially written index.
+    """
+    strings = _StringTable()
+    project_entries = []
+    records = []
+    for name, candidates in sorted(projects, key=lambda p: p[0].encode("utf-8")):
+        candidates = list(candidates)
+        ranks = {v: i for i, v in enumerate(sorted({c.version for c in candidates}))}
+        candidates.sort(key=lambda c: ranks[c.version], reverse=True)
+        project_entries.append((strings.add(name), len(records), len(candidates)))
+        for c in candidates:
+            flags = (FLAG_WHEEL if c.is_wheel else 0) | (
+                FLAG_YANKED if c.is_yanked else 0
+            )
+            records.append(
+                (
+                    strings.add(str(c.version)),
+                    ranks[c.version],
+                    strings.add(tags_to_str(c.tags)),
+                    strings.add(str(c.requires_python)),
+                    strings.add(c.filename, intern=False),
+                    strings.add(c.url or "", intern=False),
+                    flags,
+                )
+            )
+
+    projects_at = HEADER.size
+    records_at = projects_at + len(project_entries) * PROJECT.size
+    strings_at = records_at + len(records) * RECORD.size
+    data_at = strings_at + len(strings.strings) * STRING.size
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    serial,
+                    len(project_entries),
+                    len(records),
+                    len(strings.strings),
+                    projects_at,
+                    records_at,
+                    strings_at,
+                    data_at,
+                )
+            )
+            for entry in project_entries:
+                f.write(PROJECT.pack(*entry))
+            for record in records:
+                f.write(RECORD.pack(*record))
+            offset = 0
+            for s in strings.strings:
+                f.write(STRING.pack(offset, len(s)))
+                offset += len(s)
+            for s in strings.strings:
+                f.write(s)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def build_index(
+    path: str,
+    source: Callable[[str], Iterable],
+    names: Iterable[str],
+    serial: int = 0,
+) -> None:
+    """Build a binary index of the named projects, from any source."""
+    write_index(path, ((name, source(name)) for name in names), serial)
+
+
+def sync_index(path: str, source: Source, changelog: str, transport=None) -> int:
+    """Bring an existing binary index up to date from a changelog.
+
+    The index's serial is taken to be the changelog serial it is up to
+    date with (see `shadwell.sources.changelog`). Projects changed since
+    then are fetched again from `source`, and the other projects are
+    copied from the old index, into a new index with the latest serial.
+    Returns the number of projects updated.
+
+    The old index is read into memory and closed before the new one is
+    written, but on Windows, other open readers still stop the file
+    being replaced (see the module docstring).
+    """
+    old = BinaryIndex(path)
+    try:
+        latest, changed = changes_since(changelog, old.serial, transport)
+        if latest == old.serial:
+            return 0
+        projects: Dict[str, Iterable] = {}
+        for i in range(old.project_count):
+            name_id, start, count = old._project(i)
+            name = old.string(name_id)
+            projects[name] = [
+                _copy(LazyCandidate(name, old, old.record(j)))
+                for j in range(start, start + count)
+            ]
+    finally:
+        old.close()
+    for name in changed:
+        candidates = list(source(name))
+        if candidates:
+            projects[name] = candidates
+        else:
+            projects.pop(name, None)
+    write_index(path, projects.items(), latest)
+    return len(changed)
+
+
+def _copy(c: LazyCandidate) -> CompactCandidate:
+    # Decode a record, so that it doesn't depend on the index's mapping
+    return CompactCandidate(
+        c.name,
+        c.version,
+        c.requires_python,
+        c.is_wheel,
+        c.tags,
+        c.is_yanked,
+        c.url,
+        c.filename,
+    )
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import BinaryIO, Callable, Dict, Optional
+
+# Called with a URL and a dictionary of extra request headers. Returns a
+# response object with a getcode() method, a headers mapping, and a read()
+# method for the body. A 304 response must be returned, not raised. The
+# open() method of a transport (see shadwell.sources.transport) fits.
+Fetcher = Callable[[str, Dict[str, str]], BinaryIO]
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+class HTTPCache:
+    """An on-disk cache of HTTP response bodies.
+
+    Each cached URL is stored as a body file plus a small JSON file holding
+    the URL and its validators (ETag and Last-Modified). Cached responses
+    are always revalidated with a conditional request, unless the cache is
+    in offline mode, in which case cached bodies are served without any
+    network access at all.
+
+    The total size of the stored bodies is kept below `max_size` by
+    evicting the least recently used entries.
+    """
+
+    directory: str
+    max_size: int
+    offline: bool
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        offline: bool = False,
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.offline = offline
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(data, bytes):
+                    f.write(data)
+                else:
+                    while True:
+                        chunk = data.read(64 * 1024)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _touch(self, meta_path):
+        # The modification time of the metadata file records when the
+        # entry was last used, for LRU eviction.
+        now = time.time()
+        try:
+            os.utime(meta_path, (now, now))
+        except OSError:
+            pass
+
+    def get(self, url: str) -> Optional[BinaryIO]:
+        """Open the cached body for url, or return None if it isn't cached."""
+        body_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is None or meta.get("url") != url:
+            return None
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            return None
+        self._touch(meta_path)
+        return f
+
+    def content_type(self, url: str) -> Optional[str]:
+        """Return the Content-Type of the cached response for url, if known."""
+        _, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is None or meta.get("url") != url:
+            return None
+        return meta.get("content_type")
+
+    def open(self, url: str, fetch: Fetcher) -> Optional[BinaryIO]:
+        """Return the body for url, revalidating any cached copy.
+
+        In offline mode, the cached copy is returned without contacting the
+        server, and None is returned if there is no cached copy.
+        """
+        if self.offline:
+            return self.get(url)
+
+        body_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is not None and meta.get("url") != url:
+            meta = None
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with fetch(url, headers) as response:
+            if response.getcode() == 304 and meta is not None:
+                cached = self.get(url)
+                if cached is not None:
+                    return cached
+                # The body went missing underneath us, so fetch it again.
+                return self._refetch(url, fetch)
+            self._store(url, response)
+
+        return open(body_path, "rb")
+
+    def _refetch(self, url, fetch):
+        body_path, _ = self._paths(url)
+        with fetch(url, {}) as response:
+            self._store(url, response)
+        return open(body_path, "rb")
+
+    def _store(self, url, response):
+        body_path, meta_path = self._paths(url)
+        self._write_atomic(body_path, response)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+        }
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        self._evict(keep=meta_path)
+
+    def _evict(self, keep):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json") or entry.path == keep:
+                    continue
+                body_path = entry.path[: -len(".json")] + ".body"
+                try:
+                    size = os.stat(body_path).st_size
+                    last_used = entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((last_used, entry.path, body_path, size))
+                total += size
+        try:
+            total += os.stat(keep[: -len(".json")] + ".body").st_size
+        except OSError:
+            pass
+
+        entries.sort()
+        for _, meta_path, body_path, size in entries:
+            if total <= self.max_size:
+                break
+            for path in (meta_path, body_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith((".json", ".body")):
+                    os.unlink(entry.path)
@@ -0,0 +1,56 @@
+"""Reading a changelog of project changes, for incremental index updates.
+
+A changelog is a sequence of JSON lines, each an object with (at least)
+a "serial" number and a project "name", saying that the project changed
+at that serial. Serials increase through the changelog. This is the
+information in PyPI's `changelog_since_serial` API, one entry per line.
+
+A changelog is read from a local file, or an HTTP(S) URL. A URL may
+contain "{serial}", which is replaced by the last serial already seen,
+so that the server can send only newer entries. Either way, entries at
+or before that serial are ignored.
+"""
+
+import json
+from typing import Iterator, List, Tuple
+
+from packaging.utils import canonicalize_name
+
+from .transport import UrllibTransport
+
+
+def read_changelog(
+    location: str, since: int = 0, transport=None
+) -> Iterator[Tuple[int, str]]:
+    """Yield (serial, canonical project name) for changes after `since`."""
+    if "://" in location:
+        if transport is None:
+            transport = UrllibTransport()
+        f = transport.open(location.format(serial=since))
+    else:
+        f = open(location, "rb")
+    with f:
+        text = f.read().decode("utf-8")
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        serial = int(entry["serial"])
+        if serial > since:
+            yield serial, canonicalize_name(entry["name"])
+
+
+def changes_since(
+    location: str, since: int = 0, transport=None
+) -> Tuple[int, List[str]]:
+    """Return the latest serial, and the projects changed after `since`.
+
+    Each changed project is listed once. If there are no changes, the
+    serial returned is `since`.
+    """
+    latest = since
+    changed = {}
+    for serial, name in read_changelog(location, since, transport):
+        latest = max(latest, serial)
+        changed[name] = None
+    return latest, list(changed)
@@ -0,0 +1,184 @@
+"""Sharing one fetch of a project between concurrent callers.
+
+In a threaded service, many threads can ask for the same popular project
+at once. `CoalescingSource` wraps another source so that only one call to
+it is in flight for each project, with every other caller waiting for
+that call's result. Results are kept in memory for a while, and can be
+served stale while a fresh copy is fetched in the background.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+from ..candidate import Candidate
+from ..finder import Source
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 10_000
+
+
+class _Flight:
+    """A fetch in progress, which other callers can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[List[Candidate]] = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingSource:
+    """Wrap a source, coalescing concurrent lookups and caching results.
+
+    A result is fresh for `ttl` seconds after it was fetched. For the
+    following `stale_ttl` seconds it is still returned, but the first
+    lookup in that time starts a refresh in the background (in `executor`,
+    or a new thread). After that, lookups wait for a new fetch. Projects
+    with no candidates are remembered for `negative_ttl` seconds (by
+    default, the same as `ttl`), and never served stale.
+
+    At most `max_size` projects' results are kept, discarding the least
+    recently used, and expired results are dropped when they are next
+    looked up.
+
+    Errors are not cached: every caller waiting on a failed fetch gets the
+    exception, and the next lookup tries again. A failed background
+    refresh (or one that could not be started) is logged, and the stale
+    result kept.
+
+    If the wrapped source has a `serial`, so does this one, and if it has
+    a `query` method, queries are passed straight to it, as such sources
+    answer them from their own index.
+    """
+
+    def __init__(
+        self,
+        source: Source,
+        ttl: float = 300,
+        stale_ttl: float = 0,
+        negative_ttl: Optional[float] = None,
+        executor: Optional[Executor] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        if negative_ttl is None:
+            negative_ttl = ttl
+        self.source = source
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.executor = executor
+        self.max_size = max_size
+        # Results are returned in the order the source gave them
+        self.version_ordered = getattr(source, "version_ordered", False)
+        if hasattr(source, "query"):
+            self.query = source.query
+        self._serial = getattr(source, "serial", None)
+        self._lock = threading.Lock()
+        # name -> (candidates, time fetched), least recently used first
+        self._results: "OrderedDict[str, Tuple[List[Candidate], float]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+
+    @property
+    def serial(self):
+        """The wrapped source's serial.
+
+        This is only available if the wrapped source has one. Reading it
+        forgets all remembered results if it has changed since it was
+        last read, so that they are not served after the source changes.
+        """
+        serial = self.source.serial
+        with self._lock:
+            if serial != self._serial:
+                self._serial = serial
+                self._results.clear()
+        return serial
+
+    def clear(self) -> None:
+        """Forget all remembered results."""
+        with self._lock:
+            self._results.clear()
+
+    def _fetch(self, name: str, flight: _Flight) -> None:
+        try:
+            result = list(self.source(name))
+        except BaseException as e:
+            flight.error = e
+        else:
+            flight.result = result
+        with self._lock:
+            if flight.error is None:
+                self._results[name] = (flight.result, time.monotonic())
+                self._results.move_to_end(name)
+                if len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+            del self._flights[name]
+        flight.done.set()
+
+    def _refresh(self, name: str, flight: _Flight) -> None:
+        self._fetch(name, flight)
+        if flight.error is not None:
+            logger.warning(
+                "Background refresh of %s failed", name, exc_info=flight.error
+            )
+
+    def _start_refresh(self, name: str) -> None:
+        """Refresh a project's result in the background.
+
+        Called with the lock held. If the refresh can't be started (for
+        example, because the executor has been shut down), the failure is
+        logged and the stale result is kept.
+        """
+        flight = self._flights[name] = _Flight()
+        try:
+            if self.executor is None:
+                threading.Thread(
+                    target=self._refresh, args=(name, flight), daemon=True
+                ).start()
+            else:
+                self.executor.submit(self._refresh, name, flight)
+        except Exception as e:
+            # Nothing will ever finish this flight, so don't leave it for
+            # other callers to wait on.
+            del self._flights[name]
+            flight.error = e
+            flight.done.set()
+            logger.warning("Could not start a refresh of %s", name, exc_info=e)
+
+    def __call__(self, name):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(name)
+            if entry is not None:
+                candidates, fetched = entry
+                age = now - fetched
+                if not candidates:
+                    if age < self.negative_ttl:
+                        self._results.move_to_end(name)
+                        return iter(())
+                elif age < self.ttl:
+                    self._results.move_to_end(name)
+                    return iter(candidates)
+                elif age < self.ttl + self.stale_ttl:
+                    self._results.move_to_end(name)
+                    if name not in self._flights:
+                        self._start_refresh(name)
+                    return iter(candidates)
+                # Expired, so it can't be used again
+                del self._results[name]
+
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+
+        if leader:
+            self._fetch(name, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return iter(flight.result)
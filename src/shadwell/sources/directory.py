@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from packaging.specifiers import SpecifierSet
+
+from ..candidate import Candidate, CompactCandidate, parse_filename
+from ..finder import Query
+
+INDEX_FORMAT = 1
+
+# Directory modification times are only so precise, so a change made just
+# after we scan a directory could leave its mtime unchanged. We don't trust
+# an mtime this recent (in nanoseconds) to tell us the index is current.
+MTIME_SETTLE_NS = 2_000_000_000
+
+
+class DirectorySource:
+    """A source that reads wheels and sdists from a local directory.
+
+    The source keeps an index mapping project names to filenames, so that
+    each lookup only looks at the files for the requested project. The
+    index is refreshed incrementally: if the directory's modification time
+    has not changed, nothing is read, and otherwise only new filenames are
+    parsed. If `index_file` is given, the index is saved there, and loaded
+    again by later instances.
+
+    Local files carry no Requires-Python metadata, so every candidate is
+    treated as compatible with all Python versions.
+    """
+
+    def __init__(self, path: str, index_file: Optional[str] = None, pool=None):
+        self.path = os.path.abspath(path)
+        self.index_file = index_file
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._serial = 0
+        # filename -> project name (None if not a distribution)
+        self._files: Dict[str, Optional[str]] = {}
+        # project name -> filenames
+        self._projects: Dict[str, List[str]] = {}
+        if index_file is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format") != INDEX_FORMAT or data.get("path") != self.path:
+            return
+        self._mtime_ns = data["mtime_ns"]
+        self._files = data["files"]
+        for filename, name in self._files.items():
+            if name is not None:
+                self._projects.setdefault(name, []).append(filename)
+
+    def _save(self):
+        data = {
+            "format": INDEX_FORMAT,
+            "path": self.path,
+            "mtime_ns": self._mtime_ns,
+            "files": self._files,
+        }
+        directory = os.path.dirname(os.path.abspath(self.index_file))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.index_file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the directory's contents."""
+        with self._lock:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            if mtime_ns == self._mtime_ns:
+                return
+
+            with os.scandir(self.path) as it:
+                current = {e.name for e in it if e.is_file()}
+
+            removed = self._files.keys() - current
+            for filename in removed:
+                name = self._files.pop(filename)
+                if name is not None:
+                    self._projects[name].remove(filename)
+                    if not self._projects[name]:
+                        del self._projects[name]
+
+            added = current - self._files.keys()
+            for filename in added:
+                try:
+                    parsed = parse_filename(filename)
+                except ValueError:
+                    # Invalid wheel or sdist names
+                    parsed = None
+                name = None if parsed is None else parsed[0]
+                self._files[filename] = name
+                if name is not None:
+                    self._projects.setdefault(name, []).append(filename)
+
+            old_mtime_ns = self._mtime_ns
+            if time.time_ns() - mtime_ns < MTIME_SETTLE_NS:
+                self._mtime_ns = None
+            else:
+                self._mtime_ns = mtime_ns
+            if added or removed:
+                self._serial += 1
+            changed = added or removed or self._mtime_ns != old_mtime_ns
+            if self.index_file is not None and changed:
+                self._save()
+
+    @property
+    def serial(self) -> int:
+        """A number that changes whenever the directory's contents change.
+
+        Reading this refreshes the index.
+        """
+        self.refresh()
+        return self._serial
+
+    def _candidate(self, filename):
+        path = os.path.join(self.path, filename)
+        url = Path(path).as_uri()
+        if self.pool is not None:
+            candidate = CompactCandidate.from_filename(
+                filename, url=url, pool=self.pool
+            )
+        else:
+            candidate = Candidate()
+            candidate.attributes_from_filename(filename)
+            candidate.requires_python = SpecifierSet()
+            candidate.is_yanked = False
+            candidate.url = url
+            candidate.filename = filename
+        return candidate
+
+    def _filenames(self, name):
+        self.refresh()
+        with self._lock:
+            return list(self._projects.get(name, ()))
+
+    def __call__(self, name):
+        for filename in self._filenames(name):
+            yield self._candidate(filename)
+
+    def query(self, query: Query):
+        """Yield the candidates for a project that the query accepts.
+
+        Filenames are checked (using the cached parse) before any
+        candidate is built. Local files are never yanked, and have no
+        Requires-Python metadata, so those checks always pass.
+        """
+        for filename in self._filenames(query.name):
+            _, version, tags, is_wheel = parse_filename(filename)
+            if query.accepts_version(version) and query.accepts_file(is_wheel, tags):
+                yield self._candidate(filename)
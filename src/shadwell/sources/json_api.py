@@ -1,36 +1,149 @@
 import json
-from urllib.request import urlopen
+from urllib.error import HTTPError
 
 from packaging.specifiers import SpecifierSet
 
+from ..candidate import CompactCandidate, parse_filename
 from ..finder import Candidate
+from .jsonstream import iter_release_files
+from .transport import UrllibTransport
 
 PYPI_TEMPLATE = "https://pypi.org/pypi/{pkg}/json"
 
 
+def candidates_from_json(name, data, pool=None):
+    """Yield candidates from a project's JSON API data.
+
+    If a `CandidatePool` is supplied, the candidates are `CompactCandidate`
+    objects, sharing their values through the pool.
+    """
+    files = (
+        (release, url) for release, urls in data["releases"].items() for url in urls
+    )
+    return candidates_from_files(name, files, pool)
+
+
+def candidates_from_files(name, files, pool=None):
+    """Yield candidates from (release, file data) pairs.
+
+    The file data is the data for one file in the "releases" section
+    of the JSON API.
+    """
+    for release, url in files:
+        if url["yanked"]:
+            # TODO: Implement complex client logic
+            # to allow using yanked releases for exact matches
+            continue
+        filename = url["filename"]
+        try:
+            parsed = parse_filename(filename)
+        except ValueError:
+            # An invalid wheel or sdist name (or an old file in another
+            # format, such as a bdist_dumb "proj-1.0.win32.zip")
+            continue
+        if parsed is None or parsed[0] != name:
+            # Handles both "not a wheel or sdist" or mismatches
+            # from bad data
+            continue
+        if pool is not None:
+            yield CompactCandidate.from_filename(
+                filename, url["requires_python"], url=url["url"], pool=pool
+            )
+            continue
+        candidate = Candidate()
+        candidate.attributes_from_filename(filename)
+        candidate.url = url["url"]
+        candidate.filename = filename
+        candidate.is_yanked = False
+        spec = url["requires_python"]
+        if spec:
+            candidate.requires_python = SpecifierSet(spec)
+        else:
+            candidate.requires_python = SpecifierSet()
+        yield candidate
+
+
+class _CountingReader:
+    """Wrap a response, reporting how much of it was read when closed.
+
+    Other attributes (such as `getcode` and `headers`, which `HTTPCache`
+    uses) are passed through to the response.
+    """
+
+    def __init__(self, fp, url, collector):
+        self._fp = fp
+        self._url = url
+        self._collector = collector
+        self._size = 0
+
+    def read(self, size=-1):
+        data = self._fp.read(size)
+        self._size += len(data)
+        return data
+
+    def close(self):
+        self._fp.close()
+        self._collector.bytes_fetched(self._url, self._size)
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class JsonSource:
-    def __init__(self, template=PYPI_TEMPLATE):
+    def __init__(
+        self,
+        template=PYPI_TEMPLATE,
+        cache=None,
+        transport=None,
+        pool=None,
+        streaming=False,
+        collector=None,
+    ):
+        if transport is None:
+            transport = UrllibTransport()
         self.template = template
+        self.cache = cache
+        self.transport = transport
+        self.pool = pool
+        self.streaming = streaming
+        self.collector = collector
+
+    def _fetch(self, url, headers=None):
+        # Responses are counted here, rather than in _open, so that
+        # bodies served from the cache aren't reported as fetched.
+        f = self.transport.open(url, headers)
+        if self.collector is not None:
+            f = _CountingReader(f, url, self.collector)
+        return f
+
+    def _open(self, name):
+        url = self.template.format(pkg=name)
+        if self.cache is None:
+            return self._fetch(url)
+        return self.cache.open(url, self._fetch)
 
     def __call__(self, name):
-        with urlopen(self.template.format(pkg=name)) as f:
+        try:
+            f = self._open(name)
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            # The project doesn't exist
+            e.close()
+            return
+        if f is None:
+            # Offline, and not in the cache
+            return
+        with f:
+            if self.streaming:
+                files = iter_release_files(f)
+                yield from candidates_from_files(name, files, self.pool)
+                return
             data = json.load(f)
-        for release in data["releases"]:
-            for url in data["releases"][release]:
-                if url["yanked"]:
-                    # TODO: Implement complex client logic
-                    # to allow using yanked releases for exact matches
-                    continue
-                candidate = Candidate()
-                candidate.attributes_from_filename(url["filename"])
-                if candidate.name != name:
-                    # Handles both "not a wheel or sdist" (name is not set)
-                    # or mismatches from bad data
-                    continue
-                candidate.url = url["url"]
-                spec = url["requires_python"]
-                if spec:
-                    candidate.requires_python = SpecifierSet(spec)
-                else:
-                    candidate.requires_python = SpecifierSet()
-                yield candidate
+        yield from candidates_from_json(name, data, self.pool)
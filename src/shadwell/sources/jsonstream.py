@@ -0,0 +1,124 @@
+"""Incremental parsing of JSON API project documents.
+
+The standard library has no streaming JSON parser, but `raw_decode` can
+decode one value at a time from a buffer. So we walk the structure of the
+document by hand down to the individual file entries in "releases", and
+decode each of those separately, keeping only a small window of the
+document in memory.
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Reader:
+    def __init__(self, fp: BinaryIO, chunk_size: int):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        data = self._fp.read(size)
+        if data:
+            text = self._decoder.decode(data)
+        else:
+            self._eof = True
+            text = self._decoder.decode(b"", final=True)
+        # Drop everything we have already consumed
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                "Invalid JSON: expected {!r}, found {!r}".format(char, found)
+            )
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number at the very end of the buffer may be incomplete
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            # Read in bigger and bigger chunks, so that a large value
+            # isn't decoded over and over again.
+            self._fill(size)
+            size *= 2
+
+    def items(self, open_char: str, close_char: str) -> Iterator[None]:
+        """Iterate over the items of an array or object.
+
+        The caller must consume each item before asking for the next.
+        """
+        self.expect(open_char)
+        if self.peek() == close_char:
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect(close_char)
+            return
+
+    def key(self) -> str:
+        key = self.value()
+        self.expect(":")
+        return key
+
+
+def iter_release_files(
+    fp: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, Any]]:
+    """Yield (release, file data) for each file in a JSON API document.
+
+    The document is read from the binary file object `fp` as the files
+    are yielded. Other top-level keys are decoded and discarded one at
+    a time.
+    """
+    reader = _Reader(fp, chunk_size)
+    for _ in reader.items("{", "}"):
+        if reader.key() != "releases":
+            reader.value()
+            continue
+        for _ in reader.items("{", "}"):
+            release = reader.key()
+            for _ in reader.items("[", "]"):
+                yield release, reader.value()
+    if reader.peek() != "":
+        raise ValueError("Invalid JSON: extra data after the document")
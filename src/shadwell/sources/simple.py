@@ -0,0 +1,239 @@
+import codecs
+import json
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, Optional
+from urllib.error import HTTPError
+from urllib.parse import urljoin
+
+from packaging.specifiers import SpecifierSet
+
+from ..candidate import Candidate, CompactCandidate, parse_filename
+from .transport import UrllibTransport
+
+PYPI_SIMPLE_URL = "https://pypi.org/simple/"
+
+# The content types of the JSON and HTML forms of project pages
+JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+HTML_TYPES = ("application/vnd.pypi.simple.v1+html", "text/html")
+
+# Prefer the JSON form (PEP 691), but accept HTML (PEP 503) from
+# indexes that don't support it.
+ACCEPT = ", ".join(
+    [
+        JSON_TYPE,
+        "application/vnd.pypi.simple.v1+html;q=0.2",
+        "text/html;q=0.01",
+    ]
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# Each file is described by a dictionary, in the form used by PEP 691
+FileData = Dict[str, Any]
+
+
+class _AnchorParser(HTMLParser):
+    """Collect the links in a PEP 503 page, as PEP 691 style file data.
+
+    HTMLParser is event based, so no document tree is built, and
+    the page can be fed in as it arrives.
+    """
+
+    def __init__(self, page_url: str):
+        super().__init__()
+        self.base_url = page_url
+        self.files = []
+        self._anchor: Optional[Dict[str, Optional[str]]] = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+        elif tag == "a":
+            self._anchor = dict(attrs)
+            self._text = []
+
+    def handle_data(self, data):
+        if self._anchor is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != "a" or self._anchor is None:
+            return
+        attrs, self._anchor = self._anchor, None
+        href = attrs.get("href")
+        if not href:
+            return
+        url, _, fragment = _absolute(self.base_url, href).partition("#")
+        hashes = {}
+        if "=" in fragment:
+            hash_name, _, value = fragment.partition("=")
+            hashes[hash_name] = value
+        filename = "".join(self._text).strip() or url.rsplit("/", 1)[-1]
+        # The attribute's value is the reason, which may be missing
+        yanked = False
+        if "data-yanked" in attrs:
+            yanked = attrs["data-yanked"] or True
+        self.files.append(
+            {
+                "filename": filename,
+                "url": url,
+                "hashes": hashes,
+                "requires-python": attrs.get("data-requires-python"),
+                "yanked": yanked,
+            }
+        )
+
+
+def parse_html(fp, page_url: str) -> Iterator[FileData]:
+    """Yield file data from a PEP 503 HTML page, as it is read."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = _AnchorParser(page_url)
+    while True:
+        chunk = fp.read(CHUNK_SIZE)
+        parser.feed(decoder.decode(chunk, final=not chunk))
+        yield from parser.files
+        parser.files = []
+        if not chunk:
+            break
+    parser.close()
+    yield from parser.files
+
+
+def _absolute(base_url: str, url: str) -> str:
+    # urljoin is relatively slow, and indexes usually give absolute URLs
+    if "://" in url:
+        return url
+    return urljoin(base_url, url)
+
+
+def parse_json(fp, page_url: str) -> Iterator[FileData]:
+    """Yield file data from a PEP 691 JSON page."""
+    data = json.load(fp)
+    for file in data["files"]:
+        file["url"] = _absolute(page_url, file["url"])
+        yield file
+
+
+class _Prefixed:
+    """A file object, with some data that has already been read put back."""
+
+    def __init__(self, prefix: bytes, fp):
+        self._prefix = prefix
+        self._fp = fp
+
+    def read(self, size: int = -1) -> bytes:
+        prefix, self._prefix = self._prefix, b""
+        if size is None or size < 0:
+            return prefix + self._fp.read()
+        if prefix:
+            return prefix
+        return self._fp.read(size)
+
+
+class SimpleSource:
+    """A source that reads from a Simple Repository API index.
+
+    Both the JSON (PEP 691) and HTML (PEP 503) forms of the API are
+    supported. Unlike `JsonSource`, yanked files are returned, with
+    `is_yanked` set, so the finder's yanked handling applies. Each
+    candidate also has a `hashes` attribute, mapping hash names to values.
+    """
+
+    def __init__(
+        self, index_url=PYPI_SIMPLE_URL, cache=None, transport=None, pool=None
+    ):
+        if transport is None:
+            transport = UrllibTransport()
+        # Project pages are relative to the index URL, which must be
+        # treated as a directory.
+        if not index_url.endswith("/"):
+            index_url += "/"
+        self.index_url = index_url
+        self.cache = cache
+        self.transport = transport
+        self.pool = pool
+
+    def _fetch(self, url, headers):
+        headers = dict(headers)
+        headers["Accept"] = ACCEPT
+        return self.transport.open(url, headers)
+
+    def _open(self, url):
+        if self.cache is None:
+            return self._fetch(url, {})
+        return self.cache.open(url, self._fetch)
+
+    def _content_type(self, fp, url) -> Optional[str]:
+        headers = getattr(fp, "headers", None)
+        if headers is not None:
+            content_type = headers.get("Content-Type")
+        elif self.cache is not None:
+            content_type = self.cache.content_type(url)
+        else:
+            content_type = None
+        if not content_type:
+            return None
+        return content_type.split(";", 1)[0].strip().lower()
+
+    def _files(self, fp, url):
+        content_type = self._content_type(fp, url)
+        if content_type == JSON_TYPE:
+            return parse_json(fp, url)
+        if content_type in HTML_TYPES:
+            return parse_html(fp, url)
+        # The server didn't say (or gave a type we didn't ask for), so go
+        # by the content. A JSON page is an object, and HTML starts with
+        # a tag.
+        start = fp.read(CHUNK_SIZE)
+        fp = _Prefixed(start, fp)
+        if start.lstrip()[:1] == b"{":
+            return parse_json(fp, url)
+        return parse_html(fp, url)
+
+    def _candidate(self, file: FileData):
+        yanked = bool(file.get("yanked"))
+        spec = file.get("requires-python")
+        if self.pool is not None:
+            candidate = CompactCandidate.from_filename(
+                file["filename"],
+                spec,
+                is_yanked=yanked,
+                url=file["url"],
+                pool=self.pool,
+            )
+        else:
+            candidate = Candidate()
+            candidate.attributes_from_filename(file["filename"])
+            candidate.requires_python = SpecifierSet(spec or "")
+            candidate.is_yanked = yanked
+            candidate.url = file["url"]
+            candidate.filename = file["filename"]
+        candidate.hashes = file.get("hashes", {})
+        return candidate
+
+    def __call__(self, name):
+        url = urljoin(self.index_url, name + "/")
+        try:
+            f = self._open(url)
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            # The project doesn't exist
+            e.close()
+            return
+        if f is None:
+            # Offline, and not in the cache
+            return
+        with f:
+            for file in self._files(f, url):
+                try:
+                    parsed = parse_filename(file["filename"])
+                except ValueError:
+                    # Invalid wheel or sdist names
+                    continue
+                if parsed is None or parsed[0] != name:
+                    continue
+                yield self._candidate(file)
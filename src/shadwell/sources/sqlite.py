@@ -0,0 +1,433 @@
+"""A source backed by a pre-built SQLite index of candidate files.
+
+The index holds one row per file, with everything the finder needs already
+parsed out of the filename and metadata, so a lookup is a single indexed
+query per project, with no JSON decoding or filename parsing.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from packaging.tags import Tag
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+from ..candidate import DEFAULT_POOL, CandidatePool, CompactCandidate, version_key
+from ..finder import Query, Source, WheelPolicy
+from .changelog import changes_since
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    project_id INTEGER NOT NULL REFERENCES projects (id),
+    filename TEXT NOT NULL,
+    version TEXT NOT NULL,
+    version_rank INTEGER NOT NULL,
+    is_wheel INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    requires_python TEXT NOT NULL,
+    yanked INTEGER NOT NULL,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS files_by_project ON files (project_id, version_rank);
+"""
+
+# (filename, version, version_rank, is_wheel, tags, requires_python, yanked, url)
+Row = Tuple[str, str, int, int, str, str, int, str]
+
+# Projects are committed in batches of this size during ingestion
+BATCH_SIZE = 1000
+
+
+def tags_to_str(tags: Iterable[Tag]) -> str:
+    return " ".join(sorted(str(tag) for tag in tags))
+
+
+def tags_from_str(value: str) -> FrozenSet[Tag]:
+    return frozenset(Tag(*tag.split("-")) for tag in value.split())
+
+
+def project_rows(files: Iterable) -> List[Row]:
+    """Turn a project's candidates into index rows.
+
+    `files` can contain any candidate objects, as long as they have
+    `filename` and `url` attributes as well as the standard ones.
+    """
+    files = list(files)
+    versions = sorted({c.version for c in files})
+    rank = {v: i for i, v in enumerate(versions)}
+    return [
+        (
+            c.filename,
+            str(c.version),
+            rank[c.version],
+            int(c.is_wheel),
+            tags_to_str(c.tags),
+            str(c.requires_python),
+            int(c.is_yanked),
+            c.url,
+        )
+        for c in files
+    ]
+
+
+def candidates_from_pypi_json(name: str, data) -> Iterator[CompactCandidate]:
+    """Yield candidates from the JSON API data for a project in a dump.
+
+    Unlike JsonSource, yanked files are included (marked as yanked).
+    Files that are not wheels or sdists, or have invalid names, are skipped.
+    """
+    for release, files in data.get("releases", {}).items():
+        for file in files:
+            try:
+                c = CompactCandidate.from_filename(
+                    file["filename"],
+                    file.get("requires_python"),
+                    is_yanked=bool(file.get("yanked")),
+                    url=file.get("url", ""),
+                )
+            except ValueError:
+                continue
+            if c.name == name:
+                yield c
+
+
+def pypi_dump_rows(cur: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, List[Row]]]:
+    """Yield (canonical name, rows) from (name, JSON) rows of a PyPI dump.
+
+    Rows with invalid JSON are skipped.
+    """
+    for name, json_data in cur:
+        try:
+            data = json.loads(json_data)
+        except (TypeError, ValueError):
+            continue
+        name = canonicalize_name(name)
+        yield name, project_rows(candidates_from_pypi_json(name, data))
+
+
+class SQLiteSource:
+    """A source that looks candidates up in a SQLite index.
+
+    The index is created if it does not exist. Populate it with
+    `add_project`, or `ingest_pypi_dump`.
+    """
+
+    # Candidates are returned best version first
+    version_ordered = True
+
+    def __init__(self, path: str, pool: Optional[CandidatePool] = None):
+        if pool is None:
+            pool = DEFAULT_POOL
+        self.path = path
+        self.pool = pool
+        self._local = threading.local()
+        self._tags: Dict[str, FrozenSet[Tag]] = {}
+        with self._transaction() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _replace_project(self, conn, name: str, rows: List[Row]) -> None:
+        cur = conn.execute("SELECT id FROM projects WHERE name = ?", (name,))
+        row = cur.fetchone()
+        if row is None:
+            project_id = conn.execute(
+                "INSERT INTO projects (name) VALUES (?)", (name,)
+            ).lastrowid
+        else:
+            project_id = row[0]
+            conn.execute("DELETE FROM files WHERE project_id = ?", (project_id,))
+        conn.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(project_id,) + row for row in rows],
+        )
+
+    def _bump_serial(self, conn) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('serial', 1)"
+            " ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
+
+    @property
+    def serial(self) -> int:
+        """A number that changes whenever the index is modified."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'serial'"
+        ).fetchone()
+        return 0 if row is None else int(row[0])
+
+    @property
+    def changelog_serial(self) -> Optional[int]:
+        """The changelog serial the index is up to date with, if known."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'changelog_serial'"
+        ).fetchone()
+        return None if row is None else int(row[0])
+
+    def _set_changelog_serial(self, conn, serial: int) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('changelog_serial', ?)",
+            (serial,),
+        )
+
+    def _remove_project(self, conn, name: str) -> None:
+        cur = conn.execute("SELECT id FROM projects WHERE name = ?", (name,))
+        row = cur.fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM files WHERE project_id = ?", row)
+            conn.execute("DELETE FROM projects WHERE id = ?", row)
+
+    def add_project(self, name: str, files: Iterable) -> None:
+        """Replace the files for a project with the given candidates."""
+        rows = project_rows(files)
+        with self._transaction() as conn:
+            self._replace_project(conn, name, rows)
+            self._bump_serial(conn)
+
+    def apply_changes(
+        self, projects: Iterable[Tuple[str, Iterable]], changelog_serial: int
+    ) -> None:
+        """Replace the files for several projects at once.
+
+        `projects` gives (name, candidates) pairs, and projects with no
+        candidates are removed. All of the changes, and the new changelog
+        serial, are committed in one transaction, so readers see either
+        none of them or all of them.
+        """
+        # Build all the rows first, so the write transaction is short
+        changes = [(name, project_rows(files)) for name, files in projects]
+        with self._transaction() as conn:
+            for name, rows in changes:
+                if rows:
+                    self._replace_project(conn, name, rows)
+                else:
+                    self._remove_project(conn, name)
+            self._set_changelog_serial(conn, changelog_serial)
+            self._bump_serial(conn)
+
+    def sync(self, source: Source, changelog: str, transport=None) -> int:
+        """Bring the index up to date from a changelog.
+
+        Every project changed since the index's changelog serial is
+        fetched again from `source` (see `shadwell.sources.changelog` for
+        the changelog format). Returns the number of projects updated.
+        """
+        since = self.changelog_serial or 0
+        latest, changed = changes_since(changelog, since, transport)
+        if latest == since:
+            return 0
+        self.apply_changes(((name, source(name)) for name in changed), latest)
+        return len(changed)
+
+    def ingest_pypi_dump(
+        self,
+        dump: str,
+        batch_size: int = BATCH_SIZE,
+        changelog_serial: Optional[int] = None,
+    ) -> int:
+        """Load every project from a PyPI metadata dump.
+
+        The dump is a SQLite database with a `package_data_json` table,
+        holding each project's name and its JSON API data. Rows with
+        invalid JSON are skipped. Returns the number of projects loaded.
+        If the dump was taken at a known changelog serial, pass it as
+        `changelog_serial`, so that `sync` can continue from there.
+        """
+        src = sqlite3.connect(dump)
+        try:
+            cur = src.execute("SELECT name, json FROM package_data_json")
+            return self.ingest_rows(
+                pypi_dump_rows(cur), batch_size, changelog_serial=changelog_serial
+            )
+        finally:
+            src.close()
+
+    def ingest_rows(
+        self,
+        projects: Iterable[Tuple[str, List[Row]]],
+        batch_size: int = BATCH_SIZE,
+        changelog_serial: Optional[int] = None,
+    ) -> int:
+        """Load projects whose rows have already been built.
+
+        `projects` gives (name, rows) pairs, with rows as returned by
+        `project_rows`, and is consumed in the writing thread. Changes are
+        committed every `batch_size` projects. Returns the number loaded.
+        """
+        count = 0
+        with self._transaction() as conn:
+            for name, rows in projects:
+                self._replace_project(conn, name, rows)
+                count += 1
+                if count % batch_size == 0:
+                    self._bump_serial(conn)
+                    conn.commit()
+            if changelog_serial is not None:
+                self._set_changelog_serial(conn, changelog_serial)
+            self._bump_serial(conn)
+        return count
+
+    def projects(self) -> List[str]:
+        """Return the names of all the projects in the index."""
+        cur = self._conn.execute("SELECT name FROM projects ORDER BY name")
+        return [name for (name,) in cur]
+
+    def _tag_set(self, value: str) -> FrozenSet[Tag]:
+        tags = self._tags.get(value)
+        if tags is None:
+            tags = self._tags.setdefault(value, self.pool.tags(tags_from_str(value)))
+        return tags
+
+    def _files(self, name: str, where: str = ""):
+        return self._conn.execute(
+            "SELECT filename, version, is_wheel, tags, requires_python, yanked, url"
+            " FROM files JOIN projects ON files.project_id = projects.id"
+            " WHERE projects.name = ?"
+            + where
+            + " ORDER BY version_rank DESC, files.rowid",
+            (name,),
+        )
+
+    def _pinned_files(self, name: str, pin: Version, accepts, where: str = ""):
+        """Return the rows `_files` would, for versions matching a pin.
+
+        The versions matching an exact pin are next to each other in
+        version order (see `pinned_version`), so a binary search over the
+        project's version ranks finds the first of them, and only rows
+        from there on are read, until one of them doesn't match. Rows
+        equal to the pinned version are all returned, as they can come in
+        any order (`===1.0` accepts 1.0 but not 1.0.0).
+        """
+        conn = self._conn
+        row = conn.execute(
+            "SELECT projects.id, max(version_rank) FROM files"
+            " JOIN projects ON files.project_id = projects.id"
+            " WHERE projects.name = ?",
+            (name,),
+        ).fetchone()
+        project_id, top = row
+        if project_id is None:
+            return []
+        pin_key = version_key(pin)
+        pool = self.pool
+        lo, hi = 0, top + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (version,) = conn.execute(
+                "SELECT version FROM files"
+                " WHERE project_id = ? AND version_rank = ? LIMIT 1",
+                (project_id, mid),
+            ).fetchone()
+            if pool.version_key(pool.version(version)) < pin_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        cur = conn.execute(
+            "SELECT filename, version, is_wheel, tags, requires_python, yanked, url,"
+            " version_rank FROM files WHERE project_id = ? AND version_rank >= ?"
+            + where
+            + " ORDER BY version_rank, rowid",
+            (project_id, lo),
+        )
+        rows = []
+        for row in cur:
+            version = pool.version(row[1])
+            if pool.version_key(version) != pin_key and not accepts(version):
+                break
+            rows.append(row)
+        # Best version first, as from `_files`
+        rows.sort(key=lambda row: row[7], reverse=True)
+        return [row[:7] for row in rows]
+
+    def _candidate(self, name: str, row) -> CompactCandidate:
+        filename, version, is_wheel, tags, spec, yanked, url = row
+        pool = self.pool
+        version = pool.version(version)
+        return CompactCandidate(
+            name,
+            version,
+            pool.specifier(spec),
+            bool(is_wheel),
+            self._tag_set(tags),
+            bool(yanked),
+            url,
+            filename,
+            version_key=pool.version_key(version),
+        )
+
+    def __call__(self, name):
+        for row in self._files(name):
+            yield self._candidate(name, row)
+
+    def query(self, query: Query):
+        """Yield the candidates for a project that the query accepts.
+
+        The wheel policy is applied in SQL. The other checks are made
+        once per distinct version, Requires-Python and tag set value,
+        before any candidate is built. For an exact pin, only the rows for
+        the pinned version are read.
+        """
+        where = ""
+        if query.wheel_policy == WheelPolicy.REQUIRE:
+            where += " AND is_wheel"
+        elif query.wheel_policy == WheelPolicy.PROHIBIT:
+            where += " AND NOT is_wheel"
+
+        pool = self.pool
+        versions: Dict[str, bool] = {}
+        specs: Dict[str, bool] = {}
+        tag_sets: Dict[str, bool] = {}
+        pin = query.pinned_version()
+        if pin is None:
+            rows = self._files(query.name, where)
+        else:
+            rows = self._pinned_files(query.name, pin, query.accepts_version, where)
+        for row in rows:
+            _, version, is_wheel, tags, spec, _, _ = row
+            ok = versions.get(version)
+            if ok is None:
+                ok = versions[version] = query.accepts_version(pool.version(version))
+            if not ok:
+                continue
+            ok = specs.get(spec)
+            if ok is None:
+                ok = specs[spec] = query.accepts_python(pool.specifier(spec))
+            if not ok:
+                continue
+            if is_wheel:
+                ok = tag_sets.get(tags)
+                if ok is None:
+                    ok = tag_sets[tags] = query.accepts_file(True, self._tag_set(tags))
+                if not ok:
+                    continue
+            yield self._candidate(query.name, row)
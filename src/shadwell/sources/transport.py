@@ -0,0 +1,191 @@
+import http.client
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, urlopen
+
+# Redirects are followed up to this many times
+MAX_REDIRECTS = 10
+
+# Connections are pooled by (scheme, host, port)
+HostKey = Tuple[str, str, Optional[int]]
+
+
+class UrllibTransport:
+    """Fetch URLs using urllib, with a new connection for every request.
+
+    A transport has an `open` method, which takes a URL and an optional
+    dictionary of extra request headers, and returns a response object.
+    Responses have `getcode()`, `headers` and `read()`, and are context
+    managers. Error statuses raise `urllib.error.HTTPError`, except for
+    304 Not Modified, which is returned as a normal response so that
+    conditional requests can be handled by the caller.
+    """
+
+    def open(self, url: str, headers: Optional[Dict[str, str]] = None):
+        try:
+            return urlopen(Request(url, headers=headers or {}))
+        except HTTPError as e:
+            if e.code == 304:
+                return e
+            raise
+
+
+class PooledResponse:
+    """A response on a pooled connection.
+
+    Closing the response hands the connection back to the pool, provided
+    the body has been read in full. Otherwise, the connection is discarded.
+    """
+
+    def __init__(self, transport, key, conn, response):
+        self._transport = transport
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.headers = response.headers
+        self.status = response.status
+        self.reason = response.reason
+
+    def getcode(self) -> int:
+        return self.status
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is not None and amt < 0:
+            amt = None
+        return self._response.read(amt)
+
+    def readinto(self, b) -> int:
+        return self._response.readinto(b)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        response = self._response
+        if not response.isclosed() and response.length == 0:
+            # Bodyless responses (like 304) need a read to finish them off.
+            response.read()
+        reusable = response.isclosed() and not response.will_close
+        if not reusable:
+            response.close()
+        self._transport._release(self._key, conn, reusable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class PooledTransport:
+    """Fetch URLs over persistent, per-host HTTP connections.
+
+    Connections are kept open after each request, and reused by later
+    requests to the same host. A single transport can be shared between
+    threads. If `max_connections` is set, at most that many connections
+    will be in use at once, and further requests wait for one to be
+    returned to the pool.
+    """
+
+    max_connections: Optional[int]
+    timeout: Optional[float]
+
+    def __init__(
+        self, max_connections: Optional[int] = None, timeout: Optional[float] = None
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[HostKey, List[http.client.HTTPConnection]] = {}
+        self._limit = None
+        if max_connections is not None:
+            self._limit = threading.BoundedSemaphore(max_connections)
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        elif scheme == "http":
+            return http.client.HTTPConnection(host, port, timeout=self.timeout)
+        raise ValueError("Unsupported URL scheme: {}".format(scheme))
+
+    def _acquire(self, key):
+        if self._limit is not None:
+            self._limit.acquire()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        try:
+            return self._new_connection(key), False
+        except BaseException:
+            # There is no connection to release later, so give back the
+            # slot now.
+            if self._limit is not None:
+                self._limit.release()
+            raise
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.setdefault(key, []).append(conn)
+        else:
+            conn.close()
+        if self._limit is not None:
+            self._limit.release()
+
+    def _request(self, key, path, headers):
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            except (http.client.HTTPException, ConnectionError):
+                if not reused:
+                    raise
+                # The server closed an idle connection. Retry once, on a
+                # fresh connection.
+                conn.close()
+                conn = self._new_connection(key)
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+        except BaseException:
+            self._release(key, conn, False)
+            raise
+        return PooledResponse(self, key, conn, response)
+
+    def open(self, url: str, headers: Optional[Dict[str, str]] = None):
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            key = (parts.scheme, parts.hostname, parts.port)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            response = self._request(key, path, headers)
+            status = response.getcode()
+            if status in (301, 302, 303, 307, 308):
+                location = response.headers.get("Location")
+                response.read()
+                response.close()
+                url = urljoin(url, location)
+                continue
+            if status >= 400:
+                response.read()
+                response.close()
+                raise HTTPError(url, status, response.reason, response.headers, None)
+            return response
+        raise HTTPError(url, status, "Too many redirects", response.headers, None)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder, WheelPolicy
+
+
+def _project_json(files):
+    """Build a legacy JSON API document for the given filenames.
+
+    Each entry in files is either a filename, or a dictionary of
+    overrides for the file's JSON data (which must include "filename").
+    """
+    releases = {}
+    for f in files:
+        if isinstance(f, str):
+            f = {"filename": f}
+        filename = f["filename"]
+        if filename.endswith(".whl"):
+            version = filename.split("-")[1]
+        else:
+            version = filename.rsplit("-", 1)[1].split(".tar")[0].split(".zip")[0]
+        data = {
+            "filename": filename,
+            "url": "https://files.example.com/" + filename,
+            "requires_python": None,
+            "yanked": False,
+            "packagetype": "bdist_wheel" if filename.endswith(".whl") else "sdist",
+        }
+        data.update(f)
+        releases.setdefault(version, []).append(data)
+    return json.dumps({"info": {}, "releases": releases}).encode("utf-8")
+
+
+def _check_query(source, name):
+    """Check that passing a query to a source doesn't change the results.
+
+    For a range of finder settings and specifiers, a finder using the
+    source must return the same candidates as one calling it as a plain
+    function. The source must also only return candidates that the query
+    accepts, in the order it returns them when called.
+    """
+
+    def plain(name):
+        return source(name)
+
+    for python_version in ("2.7", "3.8", "3.12"):
+        for policy in WheelPolicy:
+            for allow_prerelease in (False, True):
+                for allow_yanked in (False, True):
+                    kw = dict(
+                        compatibility_tags=[Tag("py3", "none", "any")],
+                        python_version=Version(python_version),
+                        wheel_policy=lambda name: policy,
+                        allow_prerelease=allow_prerelease,
+                        allow_yanked=allow_yanked,
+                    )
+                    f = Finder(sources=[source], **kw)
+                    expected_finder = Finder(sources=[plain], **kw)
+                    for spec in ("", "<0.3", "==0.2", "===0.2", "==0.2.*", ">=1"):
+                        req = Requirement(name + spec)
+                        expected = expected_finder.get_candidates(req)
+                        result = f.get_candidates(req)
+                        assert [c.filename for c in result] == [
+                            c.filename for c in expected
+                        ]
+
+                        query = f.query(name, SpecifierSet(spec))
+                        filtered = {c.filename for c in source.query(query)}
+                        accepted = [
+                            c.filename
+                            for c in source(name)
+                            if c.filename in filtered and query.accepts(c)
+                        ]
+                        assert [c.filename for c in source.query(query)] == accepted
+
+
+# A project whose final releases are all yanked, so that the finder falls
+# back to its prereleases
+YANKED_FILES = [
+    ("yanked-1.0.tar.gz", True),
+    ("yanked-1.0-py3-none-any.whl", True),
+    ("yanked-2.0a1.tar.gz", False),
+    ("yanked-2.0a1-py3-none-any.whl", False),
+]
+
+
+# Files with versions that exact pins treat specially
+PIN_FILES = [
+    "proj-0.9.tar.gz",
+    "proj-1.0.tar.gz",
+    "proj-1.0-py3-none-any.whl",
+    "proj-1.0.0-py2.py3-none-any.whl",
+    "proj-1.0+a.tar.gz",
+    "proj-1.0+b.tar.gz",
+    "proj-1.0.post1.tar.gz",
+    "proj-1.1rc1.tar.gz",
+    "proj-2.0+a.tar.gz",
+]
+
+PINS = ["==1.0", "==1", "===1.0", "==1.0+a", "==1.1rc1", "==2.0", "==0.5", "==3"]
+
+
+def _check_pinned_query(source):
+    """Check that a source's query handles exact pins for `PIN_FILES`."""
+    for pin in PINS:
+        query = Finder(sources=[]).query("proj", SpecifierSet(pin))
+        expected = [c.filename for c in source("proj") if query.accepts(c)]
+        assert [c.filename for c in source.query(query)] == expected
+
+
+@pytest.fixture
+def project_json():
+    """The `_project_json` helper, for building JSON API data."""
+    return _project_json
+
+
+@pytest.fixture
+def check_query():
+    """The `_check_query` helper, for testing a source's query method."""
+    return _check_query
+
+
+@pytest.fixture
+def yanked_candidates():
+    """Candidates for the "yanked" project, built from `YANKED_FILES`."""
+    return [
+        CompactCandidate.from_filename(f, is_yanked=yanked, url="u/" + f)
+        for f, yanked in YANKED_FILES
+    ]
+
+
+@pytest.fixture
+def pin_files():
+    """The filenames that `check_pinned_query` expects a source to hold."""
+    return list(PIN_FILES)
+
+
+@pytest.fixture
+def check_pinned_query():
+    """The `_check_pinned_query` helper, for sources holding `PIN_FILES`."""
+    return _check_pinned_query
+
+
+class IndexServer:
+    """A local HTTP server, standing in for a package index.
+
+    Pages are set by assigning bytes to `server.pages[path]`, or a tuple of
+    (bytes, content type). Every response carries an ETag derived from the
+    body, and conditional requests that match it get a 304 response. The
+    request log records (path, status, headers) for each request handled.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.log = []
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                page = server.pages.get(self.path)
+                if page is None:
+                    self.respond(404, b"Not found")
+                    return
+                if isinstance(page, tuple):
+                    body, content_type = page
+                else:
+                    body, content_type = page, "application/json"
+                etag = '"{}"'.format(hashlib.sha256(body).hexdigest())
+                if self.headers.get("If-None-Match") == etag:
+                    self.respond(304, b"", etag=etag)
+                    return
+                self.respond(200, body, etag=etag, content_type=content_type)
+
+            def respond(self, status, body, etag=None, content_type="text/plain"):
+                server.log.append((self.path, status, dict(self.headers)))
+                self.send_response(status)
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                if status != 304:
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self.httpd.server_address[1])
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def statuses(self, path):
+        return [status for p, status, _ in self.log if p == path]
+
+
+@pytest.fixture
+def index_server():
+    server = IndexServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
@@ -0,0 +1,160 @@
+import asyncio
+from http.client import BadStatusLine
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.aio import AsyncFinder, from_sync
+from shadwell.candidate import Candidate
+from shadwell.finder import Finder, SourceErrorPolicy
+from shadwell.sources.async_json import AsyncJsonSource, fetch
+from shadwell.sources.json_api import JsonSource
+
+FILES = [
+    "proj-0.1.tar.gz",
+    "proj-0.2.tar.gz",
+    "proj-0.3.tar.gz",
+    "proj-0.2-py3-none-any.whl",
+    "proj-0.1-py2.py3-none-any.whl",
+]
+
+
+class MyCandidate(Candidate):
+    def __init__(self, filename):
+        self.filename = filename
+        self.attributes_from_filename(filename)
+        self.requires_python = SpecifierSet()
+        self.is_yanked = False
+
+
+def sync_src(name):
+    for filename in FILES[:3]:
+        c = MyCandidate(filename)
+        if c.name == name:
+            yield c
+
+
+async def async_src(name):
+    for filename in FILES[3:]:
+        await asyncio.sleep(0)
+        c = MyCandidate(filename)
+        if c.name == name:
+            yield c
+
+
+async def failing_src(name):
+    raise RuntimeError("Source failed")
+    yield
+
+
+def test_async_finder_matches_finder():
+    def all_src(name):
+        for filename in FILES:
+            c = MyCandidate(filename)
+            if c.name == name:
+                yield c
+
+    finder = Finder(
+        sources=[all_src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    afinder = AsyncFinder(
+        sources=[from_sync(sync_src), async_src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+
+    for req in [Requirement("proj"), Requirement("proj>=0.2")]:
+        result = asyncio.run(afinder.get_candidates(req))
+        expected = finder.get_candidates(req)
+        assert [c.filename for c in result] == [c.filename for c in expected]
+
+
+def test_async_finder_has_no_sync_api():
+    afinder = AsyncFinder(sources=[async_src])
+    assert not isinstance(afinder, Finder)
+    assert not hasattr(afinder, "iter_candidates")
+    with pytest.raises(TypeError):
+        AsyncFinder(sources=[async_src], cache_size=10)
+
+
+def test_async_finder_source_errors():
+    afinder = AsyncFinder(
+        sources=[failing_src, async_src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    with pytest.raises(RuntimeError):
+        asyncio.run(afinder.get_candidates(Requirement("proj")))
+
+    afinder.source_errors = SourceErrorPolicy.IGNORE
+    result = asyncio.run(afinder.get_candidates(Requirement("proj")))
+    assert [c.filename for c in result] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1-py2.py3-none-any.whl",
+    ]
+
+
+def test_async_json_source(index_server, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    template = index_server.url + "/{pkg}/json"
+    afinder = AsyncFinder(
+        sources=[AsyncJsonSource(template)],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    finder = Finder(
+        sources=[JsonSource(template)],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+
+    reqs = [Requirement("proj"), Requirement("proj<0.3")]
+    results = asyncio.run(afinder.find_many(reqs))
+    for req in reqs:
+        assert [c.url for c in results[req]] == [
+            c.url for c in finder.get_candidates(req)
+        ]
+
+    # Missing projects have no candidates
+    assert asyncio.run(afinder.get_candidates(Requirement("missing"))) == []
+
+
+def run_with_server(respond, coro):
+    """Run `coro(url)` against a local server that answers with `respond`."""
+
+    async def main():
+        async def handle(reader, writer):
+            await reader.readline()
+            await respond(writer)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await coro("http://127.0.0.1:{}/proj/json".format(port))
+        finally:
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_fetch_malformed_response():
+    async def empty(writer):
+        pass
+
+    with pytest.raises(BadStatusLine):
+        run_with_server(empty, fetch)
+
+
+def test_fetch_timeout_covers_response():
+    async def stall(writer):
+        # Accept the connection, but never send a response
+        await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run_with_server(stall, lambda url: fetch(url, timeout=0.1))
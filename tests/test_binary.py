@@ -0,0 +1,137 @@
+import pytest
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder
+from shadwell.sources.binary import BinaryIndexSource, build_index, write_index
+from shadwell.sources.json_api import JsonSource
+from shadwell.sources.simple import SimpleSource
+
+FILES = [
+    ("proj-0.1.tar.gz", None, False),
+    ("proj-0.2.tar.gz", ">=3.9", False),
+    ("proj-0.2-py3-none-any.whl", None, False),
+    ("proj-0.3.tar.gz", None, True),
+    ("proj-0.10-py2.py3-none-any.whl", None, False),
+]
+
+
+def source(name):
+    if name != "proj":
+        return []
+    return [
+        CompactCandidate.from_filename(f, spec, is_yanked=yanked, url="u/" + f)
+        for f, spec, yanked in FILES
+    ]
+
+
+def test_binary_index(tmp_path):
+    path = str(tmp_path / "index.bin")
+    build_index(path, source, ["proj", "empty"], serial=42)
+    src = BinaryIndexSource(path)
+    assert src.index.serial == 42
+    assert src.projects() == ["empty", "proj"]
+
+    candidates = list(src("proj"))
+    assert [c.filename for c in candidates] == [
+        "proj-0.10-py2.py3-none-any.whl",
+        "proj-0.3.tar.gz",
+        "proj-0.2.tar.gz",
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+    assert [c.is_yanked for c in candidates] == [False, True, False, False, False]
+    assert [c.is_wheel for c in candidates] == [True, False, False, True, False]
+    assert candidates[0].tags == {Tag("py2", "none", "any"), Tag("py3", "none", "any")}
+    assert candidates[0].version == Version("0.10")
+    assert candidates[0].url == "u/proj-0.10-py2.py3-none-any.whl"
+    assert Version("3.8") not in candidates[2].requires_python
+    # Interned values are decoded once
+    assert candidates[2].version is candidates[3].version
+    assert list(src("empty")) == []
+    assert list(src("missing")) == []
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    assert [c.filename for c in f.get_candidates(Requirement("proj<0.10"))] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+    src.close()
+
+
+def test_binary_index_lookup(tmp_path):
+    path = str(tmp_path / "index.bin")
+    names = ["p{}".format(i) for i in range(100)]
+    write_index(
+        path,
+        [(n, [CompactCandidate.from_filename(n + "-1.0.tar.gz")]) for n in names],
+    )
+    src = BinaryIndexSource(path)
+    for name in names:
+        assert [c.filename for c in src(name)] == [name + "-1.0.tar.gz"]
+    assert list(src("p")) == []
+    assert list(src("zzz")) == []
+
+
+def test_binary_index_replace(tmp_path):
+    path = str(tmp_path / "index.bin")
+    build_index(path, source, ["proj"])
+    src = BinaryIndexSource(path)
+    # Rebuilding replaces the file, so open readers are unaffected
+    build_index(path, source, [])
+    assert len(list(src("proj"))) == 5
+    assert list(BinaryIndexSource(path)("proj")) == []
+    assert [p.name for p in tmp_path.iterdir()] == ["index.bin"]
+
+
+def test_binary_index_invalid(tmp_path):
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"not an index" * 10)
+    with pytest.raises(ValueError):
+        BinaryIndexSource(str(path))
+
+
+def test_binary_index_query(tmp_path, check_query, yanked_candidates):
+    path = str(tmp_path / "index.bin")
+    write_index(path, [("proj", source("proj")), ("yanked", yanked_candidates)])
+    src = BinaryIndexSource(path)
+    check_query(src, "proj")
+    check_query(src, "yanked")
+    check_query(src, "missing")
+
+
+def test_binary_index_pinned_query(tmp_path, pin_files, check_pinned_query):
+    path = str(tmp_path / "index.bin")
+    candidates = [CompactCandidate.from_filename(f, url="u/" + f) for f in pin_files]
+    write_index(path, [("proj", candidates)])
+    check_pinned_query(BinaryIndexSource(path))
+
+
+def test_binary_index_from_json_source(tmp_path, index_server, project_json):
+    filenames = [f for f, _, _ in FILES]
+    index_server.pages["/proj/json"] = project_json(filenames)
+    path = str(tmp_path / "index.bin")
+    build_index(path, JsonSource(index_server.url + "/{pkg}/json"), ["proj"])
+    candidates = list(BinaryIndexSource(path)("proj"))
+    assert sorted(c.filename for c in candidates) == sorted(filenames)
+    assert sorted(c.url for c in candidates) == sorted(
+        "https://files.example.com/" + f for f in filenames
+    )
+
+
+def test_binary_index_from_simple_source(tmp_path, index_server):
+    index_server.pages["/simple/proj/"] = (
+        b'<a href="/files/proj-0.1.tar.gz">proj-0.1.tar.gz</a>',
+        "text/html",
+    )
+    path = str(tmp_path / "index.bin")
+    build_index(path, SimpleSource(index_server.url + "/simple/"), ["proj"])
+    [candidate] = BinaryIndexSource(path)("proj")
+    assert candidate.filename == "proj-0.1.tar.gz"
+    assert candidate.url == index_server.url + "/files/proj-0.1.tar.gz"
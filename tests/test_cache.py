@@ -0,0 +1,83 @@
+import os
+
+from shadwell.sources.cache import HTTPCache
+from shadwell.sources.json_api import JsonSource
+
+FILES = [
+    "proj-0.1.tar.gz",
+    "proj-0.2.tar.gz",
+    "proj-0.2-py3-none-any.whl",
+]
+
+
+def filenames(candidates):
+    return sorted(c.url.rsplit("/", 1)[1] for c in candidates)
+
+
+def test_cache_revalidates(index_server, tmp_path, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    cache = HTTPCache(str(tmp_path))
+    src = JsonSource(index_server.url + "/{pkg}/json", cache=cache)
+
+    assert filenames(src("proj")) == sorted(FILES)
+    assert filenames(src("proj")) == sorted(FILES)
+    assert index_server.statuses("/proj/json") == [200, 304]
+
+
+def test_cache_picks_up_changes(index_server, tmp_path, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    cache = HTTPCache(str(tmp_path))
+    src = JsonSource(index_server.url + "/{pkg}/json", cache=cache)
+
+    assert filenames(src("proj")) == sorted(FILES)
+    index_server.pages["/proj/json"] = project_json(FILES + ["proj-0.3.tar.gz"])
+    assert filenames(src("proj")) == sorted(FILES + ["proj-0.3.tar.gz"])
+    assert index_server.statuses("/proj/json") == [200, 200]
+
+
+def test_cache_offline(index_server, tmp_path, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    template = index_server.url + "/{pkg}/json"
+    list(JsonSource(template, cache=HTTPCache(str(tmp_path)))("proj"))
+
+    offline = JsonSource(template, cache=HTTPCache(str(tmp_path), offline=True))
+    assert filenames(offline("proj")) == sorted(FILES)
+    assert list(offline("other")) == []
+    assert index_server.statuses("/proj/json") == [200]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    class Response:
+        def __init__(self, body):
+            self.body = body
+            self.headers = {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def getcode(self):
+            return 200
+
+        def read(self, n=-1):
+            body, self.body = self.body, b""
+            return body
+
+    def fetch(url, headers):
+        return Response(b"x" * 100)
+
+    cache = HTTPCache(str(tmp_path), max_size=250)
+    for url in ("a", "b"):
+        cache.open(url, fetch).close()
+    # Use "a", so that "b" is the least recently used entry.
+    os.utime(cache._paths("b")[1], (0, 0))
+    cache.get("a").close()
+    cache.open("c", fetch).close()
+
+    assert cache.get("b") is None
+    for url in ("a", "c"):
+        f = cache.get(url)
+        assert f.read() == b"x" * 100
+        f.close()
@@ -0,0 +1,179 @@
+import pickle
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.utils import InvalidSdistFilename
+from packaging.version import Version
+
+from shadwell.candidate import (
+    Candidate,
+    CandidatePool,
+    CompactCandidate,
+    FilenameCache,
+    filename_cache,
+    is_final,
+    version_key,
+)
+from shadwell.finder import Finder
+
+
+def test_compact_candidate_attributes():
+    c = CompactCandidate.from_filename(
+        "Proj-1.0-py3-none-any.whl", ">=3.6", url="https://example.com/x"
+    )
+    assert c.name == "proj"
+    assert c.version == Version("1.0")
+    assert c.is_wheel
+    assert c.tags == {Tag("py3", "none", "any")}
+    assert Version("3.8") in c.requires_python
+    assert not c.is_yanked
+    assert c.url == "https://example.com/x"
+    assert c.filename == "Proj-1.0-py3-none-any.whl"
+    with pytest.raises(AttributeError):
+        c.extra = 1
+
+    sdist = CompactCandidate.from_filename("proj-1.0.tar.gz")
+    assert not sdist.is_wheel
+    assert sdist.tags == frozenset()
+
+
+def test_compact_candidates_share_values():
+    pool = CandidatePool()
+    a = CompactCandidate.from_filename("proj-1.0-py3-none-any.whl", ">=3.6", pool=pool)
+    b = CompactCandidate.from_filename("proj-1.0.tar.gz", ">=3.6", pool=pool)
+    c = CompactCandidate.from_filename("proj-2.0-py3-none-any.whl", ">=3.6", pool=pool)
+    assert a.version is b.version
+    assert a.requires_python is b.requires_python is c.requires_python
+    assert a.tags is c.tags
+    assert len(pool) == 5
+
+
+def test_finder_with_compact_candidates():
+    files = ["proj-1.0.tar.gz", "proj-1.0-py3-none-any.whl", "proj-2.0.tar.gz"]
+    pool = CandidatePool()
+
+    def src(name):
+        for filename in files:
+            yield CompactCandidate.from_filename(filename, pool=pool)
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+        "proj-2.0.tar.gz",
+        "proj-1.0-py3-none-any.whl",
+        "proj-1.0.tar.gz",
+    ]
+
+
+def test_version_key_order():
+    # In increasing order, with equal versions together
+    versions = [
+        ["1.0.dev1"],
+        ["1.0a1.dev1"],
+        ["1.0a1"],
+        ["1.0a2.post1"],
+        ["1.0b1"],
+        ["1.0rc1"],
+        ["1.0", "1.0.0", "1"],
+        ["1.0+abc"],
+        ["1.0+abc.1"],
+        ["1.0+1"],
+        ["1.0+2.abc"],
+        ["1.0+10"],
+        ["1.0.post1.dev1"],
+        ["1.0.post1"],
+        ["1.0.1"],
+        ["1.1.dev1"],
+        ["2"],
+        ["1!0.1"],
+    ]
+    keys = [[version_key(Version(v)) for v in equal] for equal in versions]
+    for equal in keys:
+        assert all(k == equal[0] for k in equal)
+    firsts = [equal[0] for equal in keys]
+    assert firsts == sorted(firsts)
+    assert len(set(firsts)) == len(firsts)
+    for equal in versions:
+        for v in equal:
+            assert is_final(version_key(Version(v))) == (not Version(v).is_prerelease)
+
+
+def test_compact_candidate_version_key():
+    pool = CandidatePool()
+    a = CompactCandidate.from_filename("proj-1.0-py3-none-any.whl", pool=pool)
+    b = CompactCandidate.from_filename("proj-1.0.tar.gz", pool=pool)
+    assert a.version_key == version_key(Version("1.0"))
+    assert a.version_key is b.version_key
+    c = CompactCandidate("proj", Version("1.0"), None, False, frozenset())
+    assert c.version_key is None
+
+
+def test_pool_version_key_interns():
+    pool = CandidatePool()
+    pooled = pool.version("1.0")
+    key = pool.version_key(pooled)
+    # Versions from outside the pool get the pooled version's key
+    for i in range(100):
+        other = Version("1.0.{}".format(i))
+        assert pool.version_key(other) == version_key(other)
+        del other
+    assert pool.version_key(Version("1.0")) is key
+
+
+def test_parse_sdist_formats():
+    cache = FilenameCache()
+    for filename in [
+        "proj-1.0.tar.gz",
+        "proj-1.0.zip",
+        "Proj-1.0.tar.bz2",
+        "proj-1.0.tar.xz",
+        "proj-1.0.tgz",
+        "proj-1.0.tar",
+    ]:
+        assert cache.parse(filename) == ("proj", Version("1.0"), frozenset(), False)
+    assert cache.parse("proj-1.0.win32.exe") is None
+    assert cache.parse("proj-1.0-1.egg") is None
+    with pytest.raises(InvalidSdistFilename):
+        cache.parse("proj-notaversion.tar.bz2")
+
+
+def test_filename_cache_counts_and_evicts():
+    cache = FilenameCache(maxsize=2)
+    cache.parse("a-1.0.tar.gz")
+    cache.parse("a-1.0.tar.gz")
+    cache.parse("b-1.0-py3-none-any.whl")
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+    # "a" was used most recently, so "b" is dropped
+    cache.parse("a-1.0.tar.gz")
+    cache.parse("c-1.0.tar.gz")
+    assert len(cache) == 2
+    cache.parse("a-1.0.tar.gz")
+    cache.parse("b-1.0-py3-none-any.whl")
+    assert (cache.hits, cache.misses) == (3, 4)
+
+
+def test_filename_cache_pickles():
+    cache = FilenameCache()
+    cache.parse("a-1.0-py3-none-any.whl")
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.parse("a-1.0-py3-none-any.whl") == (
+        "a",
+        Version("1.0"),
+        frozenset([Tag("py3", "none", "any")]),
+        True,
+    )
+    assert copy.hits == 1
+
+
+def test_candidate_uses_filename_cache():
+    filename_cache.clear()
+    for _ in range(3):
+        c = Candidate()
+        c.attributes_from_filename("proj-1.0.zip")
+        assert (c.name, c.version, c.is_wheel) == ("proj", Version("1.0"), False)
+    assert (filename_cache.hits, filename_cache.misses) == (2, 1)
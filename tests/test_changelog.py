@@ -0,0 +1,174 @@
+import json
+
+from packaging.requirements import Requirement
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder
+from shadwell.sources import binary
+from shadwell.sources.binary import BinaryIndexSource, build_index, sync_index
+from shadwell.sources.changelog import changes_since, read_changelog
+from shadwell.sources.json_api import JsonSource
+from shadwell.sources.sqlite import SQLiteSource
+
+
+def changelog(*entries):
+    return "".join(
+        json.dumps({"serial": serial, "name": name}) + "\n" for serial, name in entries
+    ).encode("utf-8")
+
+
+class FakeIndex:
+    """A source whose projects can be changed, counting lookups."""
+
+    def __init__(self, projects):
+        self.projects = projects
+        self.lookups = []
+
+    def __call__(self, name):
+        self.lookups.append(name)
+        return [
+            CompactCandidate.from_filename(f, url="u/" + f)
+            for f in self.projects.get(name, [])
+        ]
+
+
+def test_read_changelog(tmp_path):
+    path = tmp_path / "changelog.jsonl"
+    path.write_bytes(
+        changelog((1, "A"), (2, "b_c"), (3, "a")) + b"\n" + changelog((5, "d"))
+    )
+    path = str(path)
+    assert list(read_changelog(path)) == [(1, "a"), (2, "b-c"), (3, "a"), (5, "d")]
+    assert list(read_changelog(path, 2)) == [(3, "a"), (5, "d")]
+    assert changes_since(path, 0) == (5, ["a", "b-c", "d"])
+    assert changes_since(path, 5) == (5, [])
+
+
+def test_read_changelog_url(index_server):
+    index_server.pages["/changelog?since=2"] = (
+        changelog((3, "a"), (4, "b")),
+        "application/x-ndjson",
+    )
+    url = index_server.url + "/changelog?since={serial}"
+    assert changes_since(url, 2) == (4, ["a", "b"])
+
+
+def test_sqlite_sync(tmp_path):
+    log = tmp_path / "changelog.jsonl"
+    log.write_bytes(changelog((1, "a"), (2, "b")))
+    upstream = FakeIndex({"a": ["a-1.0.tar.gz"], "b": ["b-1.0.tar.gz"]})
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    assert src.changelog_serial is None
+
+    assert src.sync(upstream, str(log)) == 2
+    assert src.changelog_serial == 2
+    assert src.projects() == ["a", "b"]
+    serial = src.serial
+
+    # Nothing new: nothing fetched, and the index is unchanged
+    assert src.sync(upstream, str(log)) == 0
+    assert src.serial == serial
+
+    # Only changed projects are fetched again, and removed projects dropped
+    upstream.lookups.clear()
+    upstream.projects = {"a": ["a-1.0.tar.gz", "a-2.0.tar.gz"]}
+    log.write_bytes(changelog((1, "a"), (2, "b"), (3, "a"), (4, "b"), (5, "a")))
+    assert src.sync(upstream, str(log)) == 2
+    assert sorted(upstream.lookups) == ["a", "b"]
+    assert src.changelog_serial == 5
+    assert src.serial > serial
+    assert src.projects() == ["a"]
+    assert [c.filename for c in src("a")] == ["a-2.0.tar.gz", "a-1.0.tar.gz"]
+
+
+def test_sqlite_sync_json_source(tmp_path, index_server, project_json):
+    index_server.pages["/a/json"] = project_json(["a-1.0.tar.gz", "a-2.0.tar.gz"])
+    log = tmp_path / "changelog.jsonl"
+    log.write_bytes(changelog((1, "a"), (2, "missing")))
+    upstream = JsonSource(index_server.url + "/{pkg}/json")
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    assert src.sync(upstream, str(log)) == 2
+    assert src.projects() == ["a"]
+    assert [(c.filename, c.url) for c in src("a")] == [
+        ("a-2.0.tar.gz", "https://files.example.com/a-2.0.tar.gz"),
+        ("a-1.0.tar.gz", "https://files.example.com/a-1.0.tar.gz"),
+    ]
+
+
+def test_binary_sync(tmp_path):
+    path = str(tmp_path / "index.bin")
+    log = tmp_path / "changelog.jsonl"
+    log.write_bytes(changelog((1, "a"), (2, "b")))
+    upstream = FakeIndex({"a": ["a-1.0.tar.gz"], "b": ["b-1.0.tar.gz"]})
+    build_index(path, upstream, ["a", "b"], serial=2)
+    src = BinaryIndexSource(path, reload=True)
+    f = Finder(sources=[src], cache_size=10)
+    assert [c.filename for c in f.get_candidates(Requirement("a"))] == ["a-1.0.tar.gz"]
+    old = list(src("b"))
+
+    upstream.lookups.clear()
+    upstream.projects = {
+        "a": ["a-1.0.tar.gz", "a-2.0.tar.gz"],
+        "c": ["c-1.0.tar.gz"],
+    }
+    log.write_bytes(changelog((1, "a"), (2, "b"), (3, "a"), (4, "c")))
+    assert sync_index(path, upstream, str(log)) == 2
+    assert upstream.lookups == ["a", "c"]
+    assert sync_index(path, upstream, str(log)) == 0
+
+    # The source picks up the new file, and the finder's cache is cleared
+    assert src.serial == 4
+    assert src.projects() == ["a", "b", "c"]
+    assert [c.filename for c in f.get_candidates(Requirement("a"))] == [
+        "a-2.0.tar.gz",
+        "a-1.0.tar.gz",
+    ]
+    # Unchanged projects are carried over from the old index
+    assert [c.url for c in src("b")] == ["u/b-1.0.tar.gz"]
+    # Candidates from the old index can still be used
+    assert [c.filename for c in old] == ["b-1.0.tar.gz"]
+
+
+def test_binary_sync_closes_old_index(tmp_path, monkeypatch):
+    # Windows can't replace a mapped file, so the old index must be
+    # closed before the new one is written
+    path = str(tmp_path / "index.bin")
+    log = tmp_path / "changelog.jsonl"
+    log.write_bytes(changelog((1, "a"), (2, "b")))
+    upstream = FakeIndex({"a": ["a-1.0.tar.gz"], "b": ["b-1.0.tar.gz"]})
+    build_index(path, upstream, ["a"], serial=1)
+
+    opened = []
+    real_index = binary.BinaryIndex
+    real_write = binary.write_index
+
+    def index(*args, **kw):
+        result = real_index(*args, **kw)
+        opened.append(result)
+        return result
+
+    def write_index(*args, **kw):
+        assert all(index._map.closed for index in opened)
+        real_write(*args, **kw)
+
+    monkeypatch.setattr(binary, "BinaryIndex", index)
+    monkeypatch.setattr(binary, "write_index", write_index)
+    assert sync_index(path, upstream, str(log)) == 1
+    assert len(opened) == 1
+    assert [c.url for c in BinaryIndexSource(path)("a")] == ["u/a-1.0.tar.gz"]
+
+
+def test_binary_sync_json_source(tmp_path, index_server, project_json):
+    path = str(tmp_path / "index.bin")
+    build_index(path, FakeIndex({"b": ["b-1.0.tar.gz"]}), ["b"], serial=1)
+    index_server.pages["/a/json"] = project_json(["a-1.0.tar.gz"])
+    log = tmp_path / "changelog.jsonl"
+    log.write_bytes(changelog((1, "b"), (2, "a")))
+    upstream = JsonSource(index_server.url + "/{pkg}/json")
+    assert sync_index(path, upstream, str(log)) == 1
+    src = BinaryIndexSource(path)
+    assert src.projects() == ["a", "b"]
+    assert [(c.filename, c.url) for c in src("a")] == [
+        ("a-1.0.tar.gz", "https://files.example.com/a-1.0.tar.gz")
+    ]
+    src.close()
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from shadwell.candidate import CandidatePool
+from shadwell.check import ProblemKind, Summary, check_dump, check_project, main
+from shadwell.sources.sqlite import SQLiteSource
+
+
+def release_json(releases):
+    """Build JSON API data, with the files for each release given explicitly."""
+    data = {}
+    for release, files in releases.items():
+        data[release] = []
+        for f in files:
+            if isinstance(f, str):
+                f = {"filename": f}
+            entry = {
+                "url": "https://files.example.com/" + f["filename"],
+                "packagetype": (
+                    "bdist_wheel" if f["filename"].endswith(".whl") else "sdist"
+                ),
+            }
+            entry.update(f)
+            data[release].append(entry)
+    return json.dumps({"info": {}, "releases": data}).encode("utf-8")
+
+
+PROJECTS = [
+    (
+        "Proj",
+        release_json(
+            {
+                "1.0": ["proj-1.0.tar.gz", "proj-1.0-py3-none-any.whl"],
+                "1.1": [{"filename": "proj-1.1.tar.gz", "requires_python": ">=3.8"}],
+                "1.2": ["Proj-1.2.zip"],
+            }
+        ),
+    ),
+    ("bad-json", b"{not json"),
+    (
+        "mixed",
+        release_json(
+            {
+                "2.0": [
+                    "mixed-2.0.tar.gz",
+                    # A file for another project
+                    "other-2.0.tar.gz",
+                    # Invalid names, and a file that isn't checked
+                    "mixed-2.0-bad.whl",
+                    {"filename": "mixed-2.0.exe", "packagetype": "sdist"},
+                    {"filename": "mixed-2.0.exe", "packagetype": "bdist_wininst"},
+                    # An invalid Requires-Python only affects its own file
+                    {
+                        "filename": "mixed-2.0-py3-none-any.whl",
+                        "requires_python": ">=3.5.*",
+                    },
+                ],
+                # A file with the wrong version
+                "2.1": [{"filename": "mixed-2.0.1-py3-none-any.whl", "yanked": True}],
+            }
+        ),
+    ),
+]
+
+
+def make_dump(path, copies=1):
+    db = sqlite3.connect(str(path))
+    db.execute("CREATE TABLE package_data_json (name TEXT, json TEXT)")
+    rows = []
+    for i in range(copies):
+        for name, data in PROJECTS:
+            if i:
+                # Rename further copies of each project
+                new_name = "{}{}".format(name, i)
+                data = data.replace(name.lower().encode(), new_name.lower().encode())
+                name = new_name
+            rows.append((name, data.decode("utf-8")))
+    db.executemany("INSERT INTO package_data_json VALUES (?, ?)", rows)
+    db.commit()
+    db.close()
+    return str(path)
+
+
+def test_check_dump(tmp_path):
+    dump = make_dump(tmp_path / "dump.db")
+    problems = []
+    summary = check_dump(dump, report=problems.append)
+    assert summary == Summary(projects=3, files=10, problems=6)
+    found = sorted((p.kind.name, p.project, p.release, p.filename) for p in problems)
+    assert found == [
+        ("INVALID_FILENAME", "mixed", "2.0", "mixed-2.0-bad.whl"),
+        ("INVALID_FILENAME", "mixed", "2.0", "mixed-2.0.exe"),
+        ("INVALID_JSON", "bad-json", None, None),
+        ("INVALID_REQUIRES_PYTHON", "mixed", "2.0", "mixed-2.0-py3-none-any.whl"),
+        ("NAME_MISMATCH", "mixed", "2.0", "other-2.0.tar.gz"),
+        ("VERSION_MISMATCH", "mixed", "2.1", "mixed-2.0.1-py3-none-any.whl"),
+    ]
+
+
+def test_check_project():
+    problems = []
+    pool = CandidatePool()
+    count, candidates = check_project("mixed", PROJECTS[2][1], problems, pool)
+    assert count == 6
+    assert [c.filename for c in candidates] == [
+        "mixed-2.0.tar.gz",
+        "mixed-2.0.1-py3-none-any.whl",
+    ]
+    assert candidates[0].version is pool.version("2.0")
+    assert [p.kind for p in problems][-2:] == [
+        ProblemKind.INVALID_REQUIRES_PYTHON,
+        ProblemKind.VERSION_MISMATCH,
+    ]
+
+    # Valid JSON that isn't laid out like the JSON API's data
+    for data in (b"[]", b'{"releases": []}', b'{"releases": {"1.0": [{}]}}'):
+        problems = []
+        assert check_project("proj", data, problems) == (0, None)
+        assert [p.kind for p in problems] == [ProblemKind.INVALID_JSON]
+
+
+def test_check_dump_index(tmp_path):
+    dump = make_dump(tmp_path / "dump.db")
+    expected = SQLiteSource(str(tmp_path / "expected.db"))
+    expected.ingest_pypi_dump(dump)
+    index = SQLiteSource(str(tmp_path / "index.db"))
+    check_dump(dump, index)
+    assert index.projects() == expected.projects()
+    for name in expected.projects():
+        assert [vars_of(c) for c in index(name)] == [vars_of(c) for c in expected(name)]
+
+
+def vars_of(c):
+    return (c.filename, c.version, c.requires_python, c.tags, c.is_yanked, c.url)
+
+
+def test_check_dump_processes(tmp_path):
+    dump = make_dump(tmp_path / "dump.db", copies=20)
+    expected = []
+    summary = check_dump(dump, report=expected.append)
+    index = SQLiteSource(str(tmp_path / "index.db"))
+    problems = []
+    with ProcessPoolExecutor(2) as executor:
+        result = check_dump(
+            dump, index, executor, chunk_size=7, max_pending=2, report=problems.append
+        )
+    assert result == summary
+    assert problems == expected
+    assert len(index.projects()) == 40
+    assert [p.kind for p in problems[:2]] == [
+        ProblemKind.INVALID_JSON,
+        ProblemKind.NAME_MISMATCH,
+    ]
+
+
+def test_main(tmp_path, capsys):
+    dump = make_dump(tmp_path / "dump.db")
+    index = str(tmp_path / "index.db")
+    assert main([dump, "--processes", "0", "--index", index]) == 1
+    out, err = capsys.readouterr()
+    assert "INVALID_JSON\tbad-json\t\t\t" in out
+    assert len(out.splitlines()) == 6
+    assert "Checked 10 files in 3 projects" in err
+    assert SQLiteSource(index).projects() == ["mixed", "proj"]
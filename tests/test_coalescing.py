@@ -0,0 +1,239 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from packaging.requirements import Requirement
+
+from shadwell.finder import Finder
+from shadwell.sources import coalescing
+from shadwell.sources.coalescing import CoalescingSource
+from shadwell.sources.directory import DirectorySource
+from shadwell.sources.json_api import JsonSource
+
+
+class SlowSource:
+    """A source that counts its calls, and can be held until released."""
+
+    def __init__(self, results=("a",)):
+        self.calls = 0
+        self.results = list(results)
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def __call__(self, name):
+        self.calls += 1
+        self.release.wait()
+        if self.fail:
+            raise RuntimeError("Source failed")
+        return list(self.results)
+
+
+@pytest.fixture
+def waiting(monkeypatch):
+    """A semaphore, released whenever a caller waits for another's fetch."""
+    waiting = threading.Semaphore(0)
+
+    class Done(threading.Event):
+        def wait(self, timeout=None):
+            waiting.release()
+            return super().wait(timeout)
+
+    class Flight(coalescing._Flight):
+        def __init__(self):
+            super().__init__()
+            self.done = Done()
+
+    monkeypatch.setattr(coalescing, "_Flight", Flight)
+    return waiting
+
+
+def wait_for(waiting, count):
+    for _ in range(count):
+        assert waiting.acquire(timeout=5)
+
+
+def test_coalescing_concurrent(waiting):
+    src = SlowSource()
+    src.release.clear()
+    coalesced = CoalescingSource(src)
+    with ThreadPoolExecutor(10) as pool:
+        futures = [pool.submit(lambda: list(coalesced("proj"))) for _ in range(10)]
+        # One caller fetches, and the others wait for it
+        wait_for(waiting, 9)
+        src.release.set()
+        results = [f.result() for f in futures]
+    assert src.calls == 1
+    assert results == [["a"]] * 10
+
+
+def test_coalescing_errors(waiting):
+    src = SlowSource()
+    src.release.clear()
+    src.fail = True
+    coalesced = CoalescingSource(src)
+    with ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(lambda: list(coalesced("proj"))) for _ in range(5)]
+        wait_for(waiting, 4)
+        src.release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result()
+    assert src.calls == 1
+
+    # Errors are not remembered
+    src.fail = False
+    assert list(coalesced("proj")) == ["a"]
+    assert src.calls == 2
+
+
+def test_coalescing_ttl():
+    src = SlowSource()
+    coalesced = CoalescingSource(src, ttl=0.1)
+    assert list(coalesced("proj")) == ["a"]
+    assert list(coalesced("proj")) == ["a"]
+    assert src.calls == 1
+    time.sleep(0.15)
+    src.results = ["b"]
+    assert list(coalesced("proj")) == ["b"]
+    assert src.calls == 2
+
+    coalesced.clear()
+    list(coalesced("proj"))
+    assert src.calls == 3
+
+
+def test_coalescing_stale_while_revalidate():
+    src = SlowSource()
+    coalesced = CoalescingSource(src, ttl=0.05, stale_ttl=10)
+    assert list(coalesced("proj")) == ["a"]
+    time.sleep(0.1)
+
+    # The stale result is returned while the refresh is held up
+    src.release.clear()
+    src.results = ["b"]
+    assert list(coalesced("proj")) == ["a"]
+    refresh = coalesced._flights["proj"]
+    assert list(coalesced("proj")) == ["a"]
+    src.release.set()
+    assert refresh.done.wait(5)
+    assert list(coalesced("proj")) == ["b"]
+    assert src.calls == 2
+
+    # A failed refresh keeps the stale result
+    time.sleep(0.1)
+    src.release.clear()
+    src.fail = True
+    assert list(coalesced("proj")) == ["b"]
+    refresh = coalesced._flights["proj"]
+    src.release.set()
+    assert refresh.done.wait(5)
+    assert refresh.error is not None
+    assert list(coalesced("proj")) == ["b"]
+
+
+def test_coalescing_refresh_not_started():
+    src = SlowSource()
+    executor = ThreadPoolExecutor(1)
+    executor.shutdown()
+    coalesced = CoalescingSource(src, ttl=0.05, stale_ttl=0.1, executor=executor)
+    assert list(coalesced("proj")) == ["a"]
+    time.sleep(0.06)
+
+    # The refresh can't be submitted, so the stale result is kept, and
+    # later lookups don't wait for a refresh that will never run.
+    src.results = ["b"]
+    assert list(coalesced("proj")) == ["a"]
+    assert list(coalesced("proj")) == ["a"]
+    time.sleep(0.1)
+    assert list(coalesced("proj")) == ["b"]
+    assert src.calls == 2
+
+
+def test_coalescing_max_size():
+    src = SlowSource()
+    coalesced = CoalescingSource(src, max_size=2)
+    for name in ("a", "b", "a", "c"):
+        list(coalesced(name))
+    assert src.calls == 3
+    # "b" was the least recently used
+    assert list(coalesced._results) == ["a", "c"]
+    list(coalesced("b"))
+    assert src.calls == 4
+
+
+def test_coalescing_drops_expired():
+    src = SlowSource()
+    coalesced = CoalescingSource(src, ttl=0.05)
+    list(coalesced("proj"))
+    time.sleep(0.06)
+    src.fail = True
+    with pytest.raises(RuntimeError):
+        list(coalesced("proj"))
+    assert len(coalesced._results) == 0
+
+
+def test_coalescing_negative(index_server, project_json):
+    template = index_server.url + "/{pkg}/json"
+    coalesced = CoalescingSource(JsonSource(template), ttl=10, negative_ttl=0.1)
+    assert list(coalesced("missing")) == []
+    assert list(coalesced("missing")) == []
+    assert index_server.statuses("/missing/json") == [404]
+    time.sleep(0.15)
+
+    index_server.pages["/missing/json"] = project_json(["missing-1.0.tar.gz"])
+    assert len(list(coalesced("missing"))) == 1
+    assert index_server.statuses("/missing/json") == [404, 200]
+
+
+def test_coalescing_version_ordered():
+    src = SlowSource()
+    assert not CoalescingSource(src).version_ordered
+    src.version_ordered = True
+    assert CoalescingSource(src).version_ordered
+
+
+def test_coalescing_serial():
+    src = SlowSource()
+    coalesced = CoalescingSource(src)
+    assert getattr(coalesced, "serial", None) is None
+
+    src.serial = 1
+    coalesced = CoalescingSource(src)
+    assert list(coalesced("proj")) == ["a"]
+    assert coalesced.serial == 1
+    assert list(coalesced("proj")) == ["a"]
+    assert src.calls == 1
+
+    # A new serial means the remembered results are out of date
+    src.serial = 2
+    src.results = ["b"]
+    assert coalesced.serial == 2
+    assert list(coalesced("proj")) == ["b"]
+    assert src.calls == 2
+
+
+def test_coalescing_directory_source(tmp_path):
+    (tmp_path / "proj-1.0.tar.gz").touch()
+    src = DirectorySource(str(tmp_path))
+    coalesced = CoalescingSource(src)
+    assert coalesced.query == src.query
+    f = Finder(sources=[coalesced], cache_size=10)
+    req = Requirement("proj")
+    assert [c.filename for c in f.get_candidates(req)] == ["proj-1.0.tar.gz"]
+
+    # The finder sees the directory's serial change through the wrapper
+    (tmp_path / "proj-2.0.tar.gz").touch()
+    assert [c.filename for c in f.get_candidates(req)] == [
+        "proj-2.0.tar.gz",
+        "proj-1.0.tar.gz",
+    ]
+
+
+def test_coalescing_query(tmp_path, check_query):
+    (tmp_path / "proj-1.0.tar.gz").touch()
+    (tmp_path / "proj-2.0-py3-none-any.whl").touch()
+    coalesced = CoalescingSource(DirectorySource(str(tmp_path)))
+    check_query(coalesced, "proj")
+    assert not hasattr(CoalescingSource(SlowSource()), "query")
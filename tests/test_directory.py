@@ -0,0 +1,112 @@
+import os
+
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+import shadwell.sources.directory
+from shadwell.candidate import CandidatePool
+from shadwell.finder import Finder
+from shadwell.sources.directory import DirectorySource
+
+FILES = [
+    "proj-0.1.tar.gz",
+    "proj-0.2.zip",
+    "proj-0.2-py3-none-any.whl",
+    "other-1.0-py3-none-any.whl",
+    "README.txt",
+    "broken-.whl",
+]
+
+
+def populate(path, files):
+    for filename in files:
+        (path / filename).write_bytes(b"")
+
+
+def names(candidates):
+    return sorted(c.url.rsplit("/", 1)[1] for c in candidates)
+
+
+def test_directory_source(tmp_path):
+    populate(tmp_path, FILES)
+    for pool in (None, CandidatePool()):
+        src = DirectorySource(str(tmp_path), pool=pool)
+        assert names(src("proj")) == [
+            "proj-0.1.tar.gz",
+            "proj-0.2-py3-none-any.whl",
+            "proj-0.2.zip",
+        ]
+        assert names(src("other")) == ["other-1.0-py3-none-any.whl"]
+        assert names(src("missing")) == []
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.2.zip",
+        "proj-0.1.tar.gz",
+    ]
+
+
+def test_directory_source_refreshes(tmp_path):
+    populate(tmp_path, FILES)
+    src = DirectorySource(str(tmp_path))
+    assert len(list(src("proj"))) == 3
+    serial = src.serial
+
+    populate(tmp_path, ["proj-0.3.tar.gz"])
+    os.unlink(tmp_path / "proj-0.1.tar.gz")
+    assert names(src("proj")) == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.2.zip",
+        "proj-0.3.tar.gz",
+    ]
+    assert src.serial != serial
+
+    # A cached finder notices the change
+    f = Finder(sources=[src], cache_size=10)
+    assert len(f.get_candidates(Requirement("proj"))) == 3
+    os.unlink(tmp_path / "proj-0.3.tar.gz")
+    assert len(f.get_candidates(Requirement("proj"))) == 2
+
+
+def test_directory_source_index(tmp_path, monkeypatch):
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    populate(wheelhouse, FILES)
+    # Make the directory look like it hasn't changed for a while
+    os.utime(wheelhouse, (0, 0))
+    index = str(tmp_path / "index.json")
+    list(DirectorySource(str(wheelhouse), index_file=index)("proj"))
+    assert os.path.exists(index)
+
+    parsed = []
+    real_parse = shadwell.sources.directory.parse_filename
+
+    def parse(filename):
+        parsed.append(filename)
+        return real_parse(filename)
+
+    monkeypatch.setattr(shadwell.sources.directory, "parse_filename", parse)
+
+    # A new source loads the index, and doesn't need to parse anything
+    src = DirectorySource(str(wheelhouse), index_file=index)
+    assert len(list(src("proj"))) == 3
+    assert parsed == []
+
+    # Only new files are parsed when the directory changes
+    populate(wheelhouse, ["proj-0.3.tar.gz"])
+    assert len(list(src("proj"))) == 4
+    assert parsed == ["proj-0.3.tar.gz"]
+
+
+def test_directory_source_query(tmp_path, check_query):
+    populate(tmp_path, FILES + ["proj-0.3-cp38-cp38-win32.whl"])
+    for pool in (None, CandidatePool()):
+        src = DirectorySource(str(tmp_path), pool=pool)
+        check_query(src, "proj")
+        check_query(src, "missing")
@@ -1,11 +1,26 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from sys import version_info
 
+import pytest
 from packaging.requirements import Requirement
 from packaging.specifiers import SpecifierSet
 from packaging.tags import Tag, sys_tags
 from packaging.version import Version
 
-from shadwell.finder import Candidate, Finder, WheelPolicy
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import (
+    Candidate,
+    Finder,
+    SourceErrorPolicy,
+    WheelPolicy,
+    compatibility,
+    pinned_version,
+    ranked_compatibility,
+    tag_ranks,
+)
 
 FILES = [
     "proj-0.1.tar.gz",
@@ -293,3 +308,461 @@ def test_finder_only_prereleases():
         "proj-0.1a1-py2.py3-none-any.whl",
         "proj-0.1a1.tar.gz",
     ]
+
+
+def test_finder_version_forms():
+    versions = ["1.0", "1.0.post1", "1.0.1.dev2", "1.0+local", "1.0rc1", "1!0.1"]
+
+    def src(name):
+        for v in versions:
+            yield MyCandidate("proj-{}.tar.gz".format(v))
+        # Candidates with precomputed version keys can be mixed with others
+        yield CompactCandidate.from_filename("proj-1.0.0.tar.gz")
+        yield CompactCandidate.from_filename("proj-1.0.1b1.tar.gz")
+
+    f = Finder(sources=[src], allow_prerelease=True)
+    assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+        "proj-1!0.1.tar.gz",
+        "proj-1.0.1b1.tar.gz",
+        "proj-1.0.1.dev2.tar.gz",
+        "proj-1.0.post1.tar.gz",
+        "proj-1.0+local.tar.gz",
+        "proj-1.0.tar.gz",
+        "proj-1.0.0.tar.gz",
+        "proj-1.0rc1.tar.gz",
+    ]
+    f = Finder(sources=[src])
+    assert [c.filename for c in f.get_candidates(Requirement("proj<1!0"))] == [
+        "proj-1.0.post1.tar.gz",
+        "proj-1.0+local.tar.gz",
+        "proj-1.0.tar.gz",
+        "proj-1.0.0.tar.gz",
+    ]
+    # Arbitrary equality tells apart versions with equal keys, whichever
+    # comes first, and with or without a precomputed key
+    candidates = list(src("proj"))
+    for order in (candidates, candidates[::-1]):
+        f = Finder(sources=[lambda name: order])
+        for spec in ("1.0", "1.0.0"):
+            req = Requirement("proj===" + spec)
+            expected = ["proj-{}.tar.gz".format(spec)]
+            assert [c.filename for c in f.get_candidates(req)] == expected
+            assert [c.filename for c in f.iter_candidates(req)] == expected
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_finder_arbitrary_equality(reverse):
+    # 0.2 and 0.2.0 are equal, but only one of them is ===0.2, so the
+    # result mustn't depend on which the finder sees first
+    files = [
+        MyCandidate("proj-0.2.0-py3-none-any.whl"),
+        MyCandidate("proj-0.2-cp38-cp38-win32.whl"),
+    ]
+    files[0].requires_python = SpecifierSet(">=3.9")
+    if reverse:
+        files.reverse()
+    f = Finder(
+        sources=[lambda name: files],
+        compatibility_tags=[Tag("cp38", "cp38", "win32"), Tag("py3", "none", "any")],
+        python_version=Version("2.7"),
+    )
+    req = Requirement("proj===0.2")
+    expected = ["proj-0.2-cp38-cp38-win32.whl"]
+    assert [c.filename for c in f.get_candidates(req)] == expected
+    assert [c.filename for c in f.iter_candidates(req)] == expected
+
+
+def test_ranked_compatibility_matches_compatibility():
+    system = [
+        Tag("cp38", "cp38", "manylinux2014_x86_64"),
+        Tag("cp38", "abi3", "manylinux2014_x86_64"),
+        Tag("py3", "none", "manylinux2014_x86_64"),
+        Tag("py3", "none", "any"),
+        Tag("py3", "none", "any"),
+    ]
+    ranks = tag_ranks(system)
+    tag_sets = [
+        set(),
+        {Tag("py3", "none", "any")},
+        {Tag("py2", "none", "any"), Tag("py3", "none", "any")},
+        {Tag("cp38", "abi3", "manylinux2014_x86_64"), Tag("py3", "none", "any")},
+        {Tag("cp39", "cp39", "win_amd64")},
+    ]
+    for tags in tag_sets:
+        assert ranked_compatibility(tags, ranks) == compatibility(tags, system)
+
+
+def make_source(files, delay=0, fail=False, label=None, barrier=None):
+    def src(name):
+        if delay:
+            time.sleep(delay)
+        if barrier is not None:
+            barrier.wait()
+        if fail:
+            raise RuntimeError("Source failed")
+        for filename in files:
+            c = MyCandidate(filename)
+            c.label = label
+            if c.name == name:
+                yield c
+
+    return src
+
+
+def concurrent_sources(barrier=None):
+    return [
+        make_source(FILES[:3], label=1, barrier=barrier),
+        make_source(FILES[3:], label=2, barrier=barrier),
+        make_source(["proj-0.2-py3-none-any.whl"], label=3, barrier=barrier),
+    ]
+
+
+def test_finder_concurrent_sources():
+    sequential = Finder(
+        sources=concurrent_sources(),
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    # Each source waits until all of them have started, so this only
+    # completes if they are queried at the same time.
+    concurrent = Finder(
+        sources=concurrent_sources(threading.Barrier(3, timeout=10)),
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+        executor=3,
+    )
+
+    result = concurrent.get_candidates(Requirement("proj"))
+    concurrent.close()
+
+    # Duplicate files are kept in source order
+    expected = [
+        ("proj-0.3.tar.gz", 1),
+        ("proj-0.2-py3-none-any.whl", 2),
+        ("proj-0.2-py3-none-any.whl", 3),
+        ("proj-0.2.tar.gz", 1),
+        ("proj-0.1-py2.py3-none-any.whl", 2),
+        ("proj-0.1.tar.gz", 1),
+    ]
+    assert [(c.filename, c.label) for c in result] == expected
+    result = sequential.get_candidates(Requirement("proj"))
+    assert [(c.filename, c.label) for c in result] == expected
+
+
+def test_finder_source_timeout():
+    with ThreadPoolExecutor(2) as executor:
+        f = Finder(
+            sources=[make_source(FILES[:3], delay=0.3), make_source(FILES[3:])],
+            compatibility_tags=[Tag("py3", "none", "any")],
+            python_version=Version("3.8"),
+            executor=executor,
+            source_timeout=0.1,
+            source_errors=SourceErrorPolicy.IGNORE,
+        )
+        assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+            "proj-0.2-py3-none-any.whl",
+            "proj-0.1-py2.py3-none-any.whl",
+        ]
+
+        f.source_errors = SourceErrorPolicy.RAISE
+        with pytest.raises(FutureTimeoutError):
+            f.get_candidates(Requirement("proj"))
+
+
+def test_finder_source_errors():
+    sources = [make_source(FILES[:3], fail=True), make_source(FILES[3:])]
+    for executor in (None, 2):
+        f = Finder(
+            sources=sources,
+            compatibility_tags=[Tag("py3", "none", "any")],
+            python_version=Version("3.8"),
+            executor=executor,
+        )
+        with pytest.raises(RuntimeError):
+            f.get_candidates(Requirement("proj"))
+
+        f.source_errors = SourceErrorPolicy.IGNORE
+        assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+            "proj-0.2-py3-none-any.whl",
+            "proj-0.1-py2.py3-none-any.whl",
+        ]
+        f.close()
+
+
+def test_find_many():
+    calls = []
+    other = ["other-1.0.tar.gz", "other-2.0-py3-none-any.whl"]
+    base = make_source(FILES + other)
+
+    def src(name):
+        calls.append(name)
+        return base(name)
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    reqs = [
+        Requirement("proj"),
+        Requirement("proj>=0.2"),
+        Requirement("Proj<0.3"),
+        Requirement("other"),
+        Requirement("missing"),
+    ]
+
+    results = f.find_many(reqs)
+    assert sorted(calls) == ["missing", "other", "proj"]
+    assert list(results) == reqs
+    for req in reqs:
+        assert [c.filename for c in results[req]] == [
+            c.filename for c in f.get_candidates(req)
+        ]
+    assert [c.filename for c in results[reqs[2]]] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.2.tar.gz",
+        "proj-0.1-py2.py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+
+
+def test_iter_candidates_matches_get_candidates():
+    versions = ["0.1a1", "0.1", "0.2", "0.2.0", "0.3b1", "0.3", "0.4rc1"]
+    files = []
+    for v in versions:
+        files.append("proj-{}.tar.gz".format(v))
+        files.append("proj-{}-py3-none-any.whl".format(v))
+
+    def src_factory(yanked, versions):
+        def src(name):
+            for filename in files:
+                c = MyCandidate(filename)
+                if str(c.version) not in versions:
+                    continue
+                c.is_yanked = str(c.version) in yanked
+                if c.name == name:
+                    yield c
+
+        return src
+
+    scenarios = [
+        (set(), versions),
+        ({"0.3"}, versions),
+        ({"0.1", "0.2", "0.3"}, versions),
+        (set(versions), versions),
+        ({"0.3b1"}, ["0.1a1", "0.3b1", "0.4rc1"]),
+        ({"0.1a1", "0.3b1", "0.4rc1"}, ["0.1a1", "0.3b1", "0.4rc1"]),
+        (set(), []),
+    ]
+    for yanked, available in scenarios:
+        for allow_prerelease in (False, True):
+            for allow_yanked in (False, True):
+                for policy in (WheelPolicy.ALLOW, WheelPolicy.PREFER):
+                    f = Finder(
+                        sources=[src_factory(yanked, available)],
+                        compatibility_tags=[Tag("py3", "none", "any")],
+                        python_version=Version("3.8"),
+                        allow_prerelease=allow_prerelease,
+                        allow_yanked=allow_yanked,
+                        wheel_policy=lambda name: policy,
+                    )
+                    for req in (
+                        Requirement("proj"),
+                        Requirement("proj<0.3"),
+                        Requirement("proj===0.2"),
+                        Requirement("proj===0.2.0"),
+                    ):
+                        expected = f.get_candidates(req)
+                        result = list(f.iter_candidates(req))
+                        assert [c.filename for c in result] == [
+                            c.filename for c in expected
+                        ]
+
+
+def test_iter_candidates_is_lazy():
+    def src(name):
+        for i in range(1000):
+            c = MyCandidate("proj-1.{}.tar.gz".format(i))
+            if c.name == name:
+                yield c
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    it = f.iter_candidates(Requirement("proj"))
+    assert next(it).filename == "proj-1.999.tar.gz"
+    assert next(it).filename == "proj-1.998.tar.gz"
+
+
+def test_finder_query_sources():
+    queries = []
+    base = make_source(FILES)
+
+    class QuerySource:
+        def __call__(self, name):
+            raise AssertionError("query should be used")
+
+        def query(self, query):
+            queries.append(query)
+            return [c for c in base(query.name) if query.accepts(c)]
+
+    f = Finder(
+        sources=[QuerySource(), make_source(["proj-0.4.tar.gz"])],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+        wheel_policy=lambda name: WheelPolicy.PREFER,
+    )
+    req = Requirement("Proj<0.3")
+    assert [c.filename for c in f.get_candidates(req)] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1-py2.py3-none-any.whl",
+        "proj-0.2.tar.gz",
+        "proj-0.1.tar.gz",
+    ]
+    (query,) = queries
+    assert query.name == "proj"
+    assert query.specifier == SpecifierSet("<0.3")
+    assert query.python_version == Version("3.8")
+    assert query.wheel_policy == WheelPolicy.PREFER
+
+    # find_many can't filter on the specifier, as requirements may differ
+    f.find_many([req])
+    assert queries[-1].specifier == SpecifierSet()
+
+
+def test_finder_cache():
+    calls = []
+    base = make_source(FILES + ["other-1.0.tar.gz"])
+
+    def src(name):
+        calls.append(name)
+        return base(name)
+
+    options = dict(
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    f = Finder(sources=[src], cache_size=10, **options)
+    uncached = Finder(sources=[base], **options)
+    for spec in ("", "<0.3", ">=0.2", "==0.1", "<0.3"):
+        req = Requirement("Proj" + spec)
+        assert [c.filename for c in f.get_candidates(req)] == [
+            c.filename for c in uncached.get_candidates(req)
+        ]
+        assert [c.filename for c in f.iter_candidates(req)] == [
+            c.filename for c in uncached.get_candidates(req)
+        ]
+    # Different specifiers reuse the project's fetched candidates
+    assert calls == ["proj"]
+
+    # Results are copies
+    f.get_candidates(Requirement("proj")).clear()
+    assert len(f.get_candidates(Requirement("proj"))) == 5
+
+    f.clear_cache()
+    f.get_candidates(Requirement("proj"))
+    assert calls == ["proj", "proj"]
+
+    f.find_many([Requirement("proj"), Requirement("other")])
+    assert calls == ["proj", "proj", "other"]
+
+
+def test_finder_cache_size():
+    calls = []
+    base = make_source(FILES + ["other-1.0.tar.gz"])
+
+    def src(name):
+        calls.append(name)
+        return base(name)
+
+    f = Finder(sources=[src], cache_size=1)
+    for name in ("proj", "other", "other", "proj"):
+        f.get_candidates(Requirement(name))
+    assert calls == ["proj", "other", "proj"]
+
+
+def test_finder_cache_serial():
+    calls = []
+    base = make_source(FILES)
+
+    class Source:
+        serial = 1
+
+        def __call__(self, name):
+            calls.append(name)
+            return base(name)
+
+    src = Source()
+    f = Finder(sources=[src], cache_size=10)
+    f.get_candidates(Requirement("proj"))
+    f.get_candidates(Requirement("proj"))
+    assert len(calls) == 1
+    src.serial = 2
+    f.get_candidates(Requirement("proj"))
+    assert len(calls) == 2
+
+
+def test_pinned_version():
+    for spec, pin in [
+        ("==1.0", "1.0"),
+        ("==1.0+local", "1.0+local"),
+        ("===1.0", "1.0"),
+        ("==1.*", None),
+        ("===not-a-version", None),
+        (">=1.0", None),
+        ("==1.0,<2", None),
+        ("", None),
+    ]:
+        expected = None if pin is None else Version(pin)
+        assert pinned_version(SpecifierSet(spec)) == expected
+
+
+def test_finder_pin_stops_ordered_source():
+    versions = ["3.0", "2.0+b", "2.0+a", "2.0", "1.0", "0.1"]
+    read = []
+
+    def src(name):
+        for v in versions:
+            read.append(v)
+            yield MyCandidate("proj-{}.tar.gz".format(v))
+
+    f = Finder(sources=[src])
+    assert len(f.get_candidates(Requirement("proj==2.0"))) == 3
+    assert len(read) == len(versions)
+
+    # An ordered source is only read until its versions are below the pin
+    src.version_ordered = True
+    read.clear()
+    assert [c.filename for c in f.get_candidates(Requirement("proj==2.0"))] == [
+        "proj-2.0+b.tar.gz",
+        "proj-2.0+a.tar.gz",
+        "proj-2.0.tar.gz",
+    ]
+    assert read == ["3.0", "2.0+b", "2.0+a", "2.0", "1.0"]
+    read.clear()
+    assert len(f.get_candidates(Requirement("proj>=2.0"))) == 4
+    assert len(read) == len(versions)
+
+
+def test_finder_cache_pins():
+    queries = []
+    base = make_source(FILES)
+
+    class Src:
+        def __call__(self, name):
+            return base(name)
+
+        def query(self, query):
+            queries.append(str(query.specifier))
+            return base(query.name)
+
+    f = Finder(sources=[Src()], cache_size=10)
+    # Pins are looked up directly, until the whole project is cached
+    assert len(f.get_candidates(Requirement("proj==0.2"))) == 2
+    assert len(f.get_candidates(Requirement("proj==0.2"))) == 2
+    assert queries == ["==0.2"]
+    f.get_candidates(Requirement("proj"))
+    assert len(f.get_candidates(Requirement("proj==0.1"))) == 2
+    assert queries == ["==0.2", ""]
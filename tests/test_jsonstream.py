@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from shadwell.sources.json_api import JsonSource
+from shadwell.sources.jsonstream import iter_release_files
+
+DOCUMENT = {
+    "info": {"summary": 'A project ☃ with "quotes" and [brackets]'},
+    "last_serial": 1234567,
+    "releases": {
+        "0.1": [
+            {"filename": "proj-0.1.tar.gz", "yanked": False, "size": 12345},
+            {"filename": "proj-0.1-py3-none-any.whl", "yanked": True},
+        ],
+        "0.2": [],
+        "0.3": [{"filename": "proj-0.3.zip", "comment": "{not: [json"}],
+    },
+    "urls": [{"filename": "proj-0.3.zip"}],
+    "vulnerabilities": [],
+}
+
+
+def expected(document):
+    return [
+        (release, f) for release, files in document["releases"].items() for f in files
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_release_files(chunk_size, indent):
+    data = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False).encode("utf-8")
+    result = list(iter_release_files(io.BytesIO(data), chunk_size=chunk_size))
+    assert result == expected(DOCUMENT)
+
+
+def test_iter_release_files_empty():
+    assert list(iter_release_files(io.BytesIO(b'{"releases": {}}'))) == []
+    assert list(iter_release_files(io.BytesIO(b"{}"))) == []
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"[]", b'{"releases": {"0.1": [{"a": 1}', b'{"releases": 1}']
+)
+def test_iter_release_files_invalid(data):
+    with pytest.raises(ValueError):
+        list(iter_release_files(io.BytesIO(data)))
+
+
+def test_streaming_json_source(index_server, project_json):
+    files = [
+        "proj-0.1.tar.gz",
+        "proj-0.2.tar.gz",
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.2.win32.exe",
+        # An old bdist_dumb file, which isn't a valid sdist name
+        "proj-0.2.win32.zip",
+        "other-0.2.tar.gz",
+    ]
+    index_server.pages["/proj/json"] = project_json(files)
+    template = index_server.url + "/{pkg}/json"
+
+    streamed = list(JsonSource(template, streaming=True)("proj"))
+    loaded = list(JsonSource(template)("proj"))
+    assert [c.url for c in streamed] == [c.url for c in loaded]
+    assert len(streamed) == 3
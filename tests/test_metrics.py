@@ -0,0 +1,148 @@
+import pytest
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder, SourceErrorPolicy, WheelPolicy
+from shadwell.metrics import STAGES, Collector, Metrics
+from shadwell.sources.cache import HTTPCache
+from shadwell.sources.json_api import JsonSource
+
+FILES = [
+    "proj-0.1.tar.gz",
+    {"filename": "proj-0.2.tar.gz", "requires_python": ">=3.9"},
+    "proj-0.2-py3-none-any.whl",
+    "proj-0.2-cp38-cp38-win32.whl",
+    {"filename": "proj-0.3.tar.gz", "yanked": True},
+    "proj-0.4b1.tar.gz",
+]
+
+
+class Recorder(Collector):
+    def __init__(self):
+        self.calls = []
+
+    def filtered(self, name, stage, before, after):
+        self.calls.append((name, stage, before, after))
+
+
+def failing(name):
+    raise RuntimeError("Source failed")
+
+
+@pytest.fixture
+def server(index_server, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    return index_server
+
+
+def make_finder(index_server, collector, **kw):
+    template = index_server.url + "/{pkg}/json"
+    return Finder(
+        sources=[JsonSource(template, collector=collector), failing],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+        source_errors=SourceErrorPolicy.IGNORE,
+        collector=collector,
+        **kw
+    )
+
+
+def test_metrics(server):
+    metrics = Metrics()
+    f = make_finder(server, metrics)
+    result = f.get_candidates(Requirement("proj>=0.1"))
+    assert [c.url.rsplit("/", 1)[1] for c in result] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+
+    json_stats, failing_stats = metrics.sources.values()
+    # Yanked files are dropped by JsonSource
+    assert json_stats[:3] == [1, 0, 5]
+    assert failing_stats[:3] == [1, 1, 0]
+    assert metrics.bytes == len(server.pages["/proj/json"])
+    assert set(metrics.times) == {"fetch", "filter", "order"}
+    assert metrics.stages == {
+        "specifier": [5, 5],
+        "requires_python": [5, 4],
+        "wheel_policy": [4, 4],
+        "tags": [4, 3],
+        "prerelease": [3, 2],
+        "yanked": [2, 2],
+    }
+    assert metrics.caches == {}
+
+    metrics.reset()
+    assert metrics.bytes == 0
+
+
+def test_metrics_bytes_with_cache(server, tmp_path):
+    metrics = Metrics()
+    template = server.url + "/{pkg}/json"
+    src = JsonSource(template, cache=HTTPCache(str(tmp_path)), collector=metrics)
+    for _ in range(2):
+        assert len(list(src("proj"))) == 5
+    # The second response is a 304, and the body comes from the cache
+    assert server.statuses("/proj/json") == [200, 304]
+    assert metrics.bytes == len(server.pages["/proj/json"])
+
+
+def test_metrics_stages():
+    recorder = Recorder()
+    f = Finder(
+        sources=[],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        wheel_policy=lambda name: WheelPolicy.REQUIRE,
+        collector=recorder,
+    )
+    assert f.get_candidates(Requirement("proj")) == []
+    assert [stage for (_, stage, _, _) in recorder.calls] == list(STAGES)
+    assert {(name, before, after) for (name, _, before, after) in recorder.calls} == {
+        ("proj", 0, 0)
+    }
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        [("proj-0.1.tar.gz", False), ("proj-0.2b1.tar.gz", False)],
+        [("proj-0.1.tar.gz", True), ("proj-0.2.tar.gz", False)],
+        [("proj-0.1.tar.gz", True), ("proj-0.2b1.tar.gz", False)],
+        [("proj-0.1b1.tar.gz", True), ("proj-0.2b1.tar.gz", False)],
+        [("proj-0.1b1.tar.gz", True), ("proj-0.2.tar.gz", True)],
+        [("proj-0.1b1.tar.gz", True)],
+        [],
+    ],
+)
+def test_metrics_iter_candidates(files):
+    candidates = [
+        CompactCandidate.from_filename(f, is_yanked=yanked) for f, yanked in files
+    ]
+    for allow_prerelease in (False, True):
+        for allow_yanked in (False, True):
+            calls = []
+            for method in ("get_candidates", "iter_candidates"):
+                recorder = Recorder()
+                f = Finder(
+                    sources=[lambda name: candidates],
+                    allow_prerelease=allow_prerelease,
+                    allow_yanked=allow_yanked,
+                    collector=recorder,
+                )
+                list(getattr(f, method)(Requirement("proj")))
+                calls.append(recorder.calls)
+            assert [stage for (_, stage, _, _) in calls[1]] == list(STAGES)
+            assert calls[1] == calls[0]
+
+
+def test_metrics_cache(server):
+    metrics = Metrics()
+    f = make_finder(server, metrics, cache_size=10)
+    for spec in ("", "<0.2", ""):
+        f.get_candidates(Requirement("proj" + spec))
+    assert metrics.caches == {"results": [1, 2], "projects": [1, 1]}
+    # The specifier stage is only applied to the cached project list
+    assert metrics.stages["specifier"] == [6, 4]
+    assert metrics.stages["requires_python"] == [5, 4]
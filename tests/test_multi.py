@@ -0,0 +1,134 @@
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.finder import Candidate, Finder, WheelPolicy
+from shadwell.multi import MultiTargetFinder, Target
+
+FILES = [
+    ("proj-1.0.tar.gz", ""),
+    ("proj-1.0-py3-none-any.whl", ""),
+    ("proj-2.0.tar.gz", ">=3.8"),
+    ("proj-2.0-cp38-cp38-manylinux1_x86_64.whl", ">=3.8"),
+    ("proj-2.0-cp38-cp38-win_amd64.whl", ">=3.8"),
+    ("proj-2.0-cp312-cp312-win_amd64.whl", ">=3.8"),
+    ("proj-3.0b1-py3-none-any.whl", ">=3.12"),
+]
+
+TARGETS = {
+    "linux-38": Target(
+        [
+            Tag("cp38", "cp38", "manylinux1_x86_64"),
+            Tag("py3", "none", "any"),
+        ],
+        Version("3.8"),
+    ),
+    "win-38": Target(
+        [Tag("cp38", "cp38", "win_amd64"), Tag("py3", "none", "any")],
+        Version("3.8"),
+    ),
+    "win-312": Target(
+        [Tag("cp312", "cp312", "win_amd64"), Tag("py3", "none", "any")],
+        Version("3.12"),
+    ),
+    "py27": Target([Tag("py2", "none", "any")], Version("2.7")),
+}
+
+
+class MyCandidate(Candidate):
+    def __init__(self, filename, requires_python):
+        self.filename = filename
+        self.attributes_from_filename(filename)
+        self.requires_python = SpecifierSet(requires_python)
+        self.is_yanked = False
+
+
+def test_multi_target_matches_finder():
+    calls = []
+
+    def src(name):
+        calls.append(name)
+        for filename, spec in FILES:
+            c = MyCandidate(filename, spec)
+            if c.name == name:
+                yield c
+
+    for policy in WheelPolicy:
+        for allow_prerelease in (False, True):
+            options = dict(
+                allow_prerelease=allow_prerelease,
+                wheel_policy=lambda name: policy,
+            )
+            multi = MultiTargetFinder([src], TARGETS, **options)
+            for req in (
+                Requirement("proj"),
+                Requirement("Proj<2"),
+                Requirement("proj===2.0"),
+            ):
+                calls.clear()
+                result = multi.get_candidates(req)
+                assert calls == ["proj"]
+                assert list(result) == list(TARGETS)
+                for label, target in TARGETS.items():
+                    f = Finder(
+                        [src],
+                        compatibility_tags=target.compatibility_tags,
+                        python_version=target.python_version,
+                        **options
+                    )
+                    assert [c.filename for c in result[label]] == [
+                        c.filename for c in f.get_candidates(req)
+                    ]
+
+
+def test_multi_target_find_many():
+    def src(name):
+        for filename, spec in FILES:
+            c = MyCandidate(filename, spec)
+            if c.name == name:
+                yield c
+
+    multi = MultiTargetFinder([src], TARGETS)
+    reqs = [Requirement("proj"), Requirement("proj<2"), Requirement("missing")]
+    results = multi.find_many(reqs)
+    assert list(results) == reqs
+    assert [c.filename for c in results[reqs[0]]["win-312"]] == [
+        "proj-2.0-cp312-cp312-win_amd64.whl",
+        "proj-2.0.tar.gz",
+        "proj-1.0-py3-none-any.whl",
+        "proj-1.0.tar.gz",
+    ]
+    assert [c.filename for c in results[reqs[1]]["py27"]] == ["proj-1.0.tar.gz"]
+    assert results[reqs[2]] == {label: [] for label in TARGETS}
+
+
+def test_multi_target_query():
+    queries = []
+
+    class QuerySource:
+        def query(self, query):
+            queries.append(query)
+            return []
+
+    multi = MultiTargetFinder([QuerySource()], TARGETS)
+    multi.get_candidates(Requirement("proj>=1"))
+    (query,) = queries
+    assert query.specifier == SpecifierSet(">=1")
+    # Anything acceptable to some target is requested
+    assert query.python_version is None
+    assert query.accepts_file(True, {Tag("cp312", "cp312", "win_amd64")})
+    assert query.accepts_file(True, {Tag("py2", "none", "any")})
+    assert not query.accepts_file(True, {Tag("cp39", "cp39", "win_amd64")})
+
+
+def test_multi_target_arbitrary_equality():
+    # 2.0 and 2.0.0 are equal, but only one of them is ===2.0
+    files = [
+        MyCandidate("proj-2.0.0-py3-none-any.whl", ""),
+        MyCandidate("proj-2.0-py3-none-any.whl", ""),
+    ]
+    for order in (files, files[::-1]):
+        multi = MultiTargetFinder([lambda name: order], TARGETS)
+        result = multi.get_candidates(Requirement("proj===2.0"))
+        assert [c.filename for c in result["win-312"]] == [files[1].filename]
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CandidatePool
+from shadwell.finder import Finder
+from shadwell.sources.cache import HTTPCache
+from shadwell.sources.simple import SimpleSource
+
+HTML_PAGE = b"""<!DOCTYPE html>
+<html>
+  <head><title>Links for proj</title></head>
+  <body>
+    <h1>Links for proj</h1>
+    <a href="../../files/proj-0.1.tar.gz#sha256=aaaa">proj-0.1.tar.gz</a><br/>
+    <a href="../../files/proj-0.2-py3-none-any.whl#sha256=bbbb"
+       data-requires-python="&gt;=3.9">proj-0.2-py3-none-any.whl</a><br/>
+    <a href="../../files/proj-0.3.tar.gz" data-yanked="">proj-0.3.tar.gz</a><br/>
+    <a href="../../files/proj-0.3.win32.exe">proj-0.3.win32.exe</a><br/>
+    <a href="../../files/proj-0.3.win32.zip">proj-0.3.win32.zip</a><br/>
+    <a href="../../files/other-0.3.tar.gz">other-0.3.tar.gz</a><br/>
+  </body>
+</html>
+"""
+
+JSON_PAGE = json.dumps(
+    {
+        "meta": {"api-version": "1.0"},
+        "name": "proj",
+        "files": [
+            {
+                "filename": "proj-0.1.tar.gz",
+                "url": "../../files/proj-0.1.tar.gz",
+                "hashes": {"sha256": "aaaa"},
+            },
+            {
+                "filename": "proj-0.2-py3-none-any.whl",
+                "url": "../../files/proj-0.2-py3-none-any.whl",
+                "hashes": {"sha256": "bbbb"},
+                "requires-python": ">=3.9",
+            },
+            {
+                "filename": "proj-0.3.tar.gz",
+                "url": "../../files/proj-0.3.tar.gz",
+                "hashes": {},
+                "yanked": "Broken",
+            },
+            {
+                "filename": "proj-0.3.win32.exe",
+                "url": "../../files/proj-0.3.win32.exe",
+                "hashes": {},
+            },
+            {
+                "filename": "proj-0.3.win32.zip",
+                "url": "../../files/proj-0.3.win32.zip",
+                "hashes": {},
+            },
+        ],
+    }
+).encode("utf-8")
+
+PAGES = [
+    (HTML_PAGE, "text/html"),
+    (JSON_PAGE, "application/vnd.pypi.simple.v1+json"),
+]
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("pool", [None, CandidatePool()])
+def test_simple_source(index_server, page, pool):
+    index_server.pages["/simple/proj/"] = page
+    src = SimpleSource(index_server.url + "/simple/", pool=pool)
+    candidates = list(src("proj"))
+
+    files = index_server.url + "/files/"
+    assert [c.url for c in candidates] == [
+        files + "proj-0.1.tar.gz",
+        files + "proj-0.2-py3-none-any.whl",
+        files + "proj-0.3.tar.gz",
+    ]
+    assert [c.filename for c in candidates] == [
+        "proj-0.1.tar.gz",
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.3.tar.gz",
+    ]
+    assert [c.hashes for c in candidates] == [
+        {"sha256": "aaaa"},
+        {"sha256": "bbbb"},
+        {},
+    ]
+    assert [c.is_yanked for c in candidates] == [False, False, True]
+    assert Version("3.8") not in candidates[1].requires_python
+    assert Version("3.8") in candidates[0].requires_python
+
+    accept = index_server.log[0][2]["Accept"]
+    assert accept.startswith("application/vnd.pypi.simple.v1+json")
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_simple_source_with_finder(index_server, tmp_path, page):
+    index_server.pages["/simple/proj/"] = page
+    src = SimpleSource(index_server.url + "/simple/", cache=HTTPCache(str(tmp_path)))
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.9"),
+    )
+    for _ in range(2):
+        result = f.get_candidates(Requirement("proj"))
+        assert [c.url.rsplit("/", 1)[1] for c in result] == [
+            "proj-0.2-py3-none-any.whl",
+            "proj-0.1.tar.gz",
+        ]
+    assert index_server.statuses("/simple/proj/") == [200, 304]
+
+
+def test_simple_source_index_url_without_slash(index_server):
+    index_server.pages["/simple/proj/"] = PAGES[1]
+    src = SimpleSource(index_server.url + "/simple")
+    assert len(list(src("proj"))) == 3
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_simple_source_uses_content_type(index_server, tmp_path, cached):
+    # An HTML page that looks like JSON, from its first character
+    page = b"{{ header }}\n" + HTML_PAGE
+    index_server.pages["/simple/proj/"] = (page, "text/html; charset=utf-8")
+    cache = HTTPCache(str(tmp_path)) if cached else None
+    src = SimpleSource(index_server.url + "/simple/", cache=cache)
+    for _ in range(2):
+        assert len(list(src("proj"))) == 3
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.candidate import CompactCandidate
+from shadwell.finder import Finder
+from shadwell.sources.sqlite import SQLiteSource
+
+FILES = [
+    "proj-0.1.tar.gz",
+    {"filename": "proj-0.2.tar.gz", "requires_python": ">=3.9"},
+    "proj-0.2-py3-none-any.whl",
+    {"filename": "proj-0.3.tar.gz", "yanked": True},
+    "proj-0.3.win32.exe",
+    "other-1.0.tar.gz",
+]
+
+
+@pytest.fixture
+def dump(tmp_path, project_json):
+    path = str(tmp_path / "dump.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE package_data_json (name TEXT, json TEXT)")
+    db.executemany(
+        "INSERT INTO package_data_json VALUES (?, ?)",
+        [
+            ("Proj", project_json(FILES).decode("utf-8")),
+            ("other", project_json(["other-1.0.tar.gz"]).decode("utf-8")),
+            ("broken", "{not json"),
+        ],
+    )
+    db.commit()
+    db.close()
+    return path
+
+
+def test_sqlite_ingest(tmp_path, dump):
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    assert src.ingest_pypi_dump(dump) == 2
+    assert src.projects() == ["other", "proj"]
+
+    candidates = list(src("proj"))
+    assert [c.filename for c in candidates] == [
+        "proj-0.3.tar.gz",
+        "proj-0.2.tar.gz",
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+    assert [c.is_yanked for c in candidates] == [True, False, False, False]
+    assert candidates[2].is_wheel
+    assert candidates[2].tags == {Tag("py3", "none", "any")}
+    assert Version("3.8") not in candidates[1].requires_python
+    assert list(src("missing")) == []
+
+    f = Finder(
+        sources=[src],
+        compatibility_tags=[Tag("py3", "none", "any")],
+        python_version=Version("3.8"),
+    )
+    assert [c.filename for c in f.get_candidates(Requirement("proj"))] == [
+        "proj-0.2-py3-none-any.whl",
+        "proj-0.1.tar.gz",
+    ]
+
+
+def test_sqlite_add_project(tmp_path):
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    files = ["proj-1.0.tar.gz", "proj-1.0-py2.py3-none-any.whl"]
+    src.add_project(
+        "proj", [CompactCandidate.from_filename(f, url="u/" + f) for f in files]
+    )
+    assert sorted(c.filename for c in src("proj")) == sorted(files)
+
+    serial = src.serial
+    src.add_project("proj", [CompactCandidate.from_filename("proj-2.0.tar.gz")])
+    assert src.serial != serial
+    assert [c.filename for c in src("proj")] == ["proj-2.0.tar.gz"]
+
+    # The index persists
+    again = SQLiteSource(str(tmp_path / "index.db"))
+    assert [str(c.version) for c in again("proj")] == ["2.0"]
+    assert again.projects() == ["proj"]
+
+
+def test_sqlite_query(tmp_path, dump, check_query, yanked_candidates):
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    src.ingest_pypi_dump(dump)
+    src.add_project("yanked", yanked_candidates)
+    check_query(src, "proj")
+    check_query(src, "yanked")
+    check_query(src, "missing")
+
+
+def test_sqlite_pinned_query(tmp_path, pin_files, check_pinned_query):
+    src = SQLiteSource(str(tmp_path / "index.db"))
+    src.add_project(
+        "proj", [CompactCandidate.from_filename(f, url="u/" + f) for f in pin_files]
+    )
+    check_pinned_query(src)
@@ -0,0 +1,90 @@
+import threading
+from urllib.error import HTTPError
+
+import pytest
+
+from shadwell.sources.cache import HTTPCache
+from shadwell.sources.json_api import JsonSource
+from shadwell.sources.transport import PooledTransport
+
+FILES = [
+    "proj-0.1.tar.gz",
+    "proj-0.2-py3-none-any.whl",
+]
+
+
+def test_pooled_transport_reuses_connections(index_server, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    src = JsonSource(index_server.url + "/{pkg}/json", transport=PooledTransport())
+    for _ in range(5):
+        assert len(list(src("proj"))) == 2
+    assert index_server.statuses("/proj/json") == [200] * 5
+    assert index_server.connections == 1
+
+
+def test_pooled_transport_with_cache(index_server, tmp_path, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    src = JsonSource(
+        index_server.url + "/{pkg}/json",
+        cache=HTTPCache(str(tmp_path)),
+        transport=PooledTransport(),
+    )
+    for _ in range(3):
+        assert len(list(src("proj"))) == 2
+    assert index_server.statuses("/proj/json") == [200, 304, 304]
+    assert index_server.connections == 1
+
+
+def test_pooled_transport_errors(index_server, project_json):
+    transport = PooledTransport()
+    with pytest.raises(HTTPError) as exc_info:
+        transport.open(index_server.url + "/missing/json")
+    assert exc_info.value.code == 404
+    # The connection is still usable after an error response
+    index_server.pages["/proj/json"] = project_json(FILES)
+    with transport.open(index_server.url + "/proj/json") as response:
+        assert response.getcode() == 200
+        response.read()
+    assert index_server.connections == 1
+
+
+def test_pooled_transport_limits_connections(index_server, project_json):
+    index_server.pages["/proj/json"] = project_json(FILES)
+    src = JsonSource(
+        index_server.url + "/{pkg}/json",
+        transport=PooledTransport(max_connections=2),
+    )
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(10):
+                assert len(list(src("proj"))) == 2
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert index_server.statuses("/proj/json") == [200] * 80
+    assert index_server.connections <= 2
+
+
+def test_pooled_transport_failed_connections_release(index_server, project_json):
+    transport = PooledTransport(max_connections=2)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            transport.open("ftp://example.com/proj/json")
+    # The failures didn't use up the connection slots
+    assert transport._limit.acquire(timeout=1)
+    assert transport._limit.acquire(timeout=1)
+    transport._limit.release()
+    transport._limit.release()
+    index_server.pages["/proj/json"] = project_json(FILES)
+    with transport.open(index_server.url + "/proj/json") as response:
+        assert response.getcode() == 200
+        response.read()
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+from packaging.requirements import Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.tags import Tag
+from packaging.version import Version
+
+from shadwell.finder import Candidate, Finder, WheelPolicy
+
+pytest.importorskip("numpy")
+
+from shadwell.vectorised import VectorisedFinder  # noqa: E402
+
+VERSIONS = ["0.1a1", "0.1", "0.2", "0.2.0", "0.3b1", "0.3", "1.0rc1", "1.0"]
+WHEEL_TAGS = ["py3-none-any", "py2.py3-none-any", "cp38-cp38-win32", "py2-none-any"]
+REQUIRES_PYTHON = ["", ">=3.6", ">=3.9", "<3"]
+
+
+class MyCandidate(Candidate):
+    def __init__(self, filename, requires_python, is_yanked):
+        self.filename = filename
+        self.attributes_from_filename(filename)
+        self.requires_python = SpecifierSet(requires_python)
+        self.is_yanked = is_yanked
+
+
+def random_files(rng, count, versions, yanked_rate):
+    files = []
+    for i in range(count):
+        version = rng.choice(versions)
+        if rng.random() < 0.3:
+            filename = "proj-{}.tar.gz".format(version)
+        else:
+            filename = "proj-{}-{}.whl".format(version, rng.choice(WHEEL_TAGS))
+        spec = rng.choice(REQUIRES_PYTHON)
+        files.append(MyCandidate(filename, spec, rng.random() < yanked_rate))
+    return files
+
+
+def test_vectorised_matches_finder():
+    rng = random.Random(1234)
+    for _ in range(30):
+        versions = rng.sample(VERSIONS, rng.randint(1, len(VERSIONS)))
+        files = random_files(rng, rng.randint(0, 60), versions, rng.choice([0, 0.2, 1]))
+        for policy in WheelPolicy:
+            for allow_prerelease in (False, True):
+                for allow_yanked in (False, True):
+                    options = dict(
+                        sources=[lambda name: files],
+                        compatibility_tags=[
+                            Tag("cp38", "cp38", "win32"),
+                            Tag("py3", "none", "any"),
+                        ],
+                        python_version=Version("3.8"),
+                        allow_prerelease=allow_prerelease,
+                        allow_yanked=allow_yanked,
+                        wheel_policy=lambda name: policy,
+                    )
+                    f = Finder(**options)
+                    vf = VectorisedFinder(min_candidates=0, **options)
+                    for req in ("proj", "proj<0.3", "proj==0.2", "proj===0.2"):
+                        req = Requirement(req)
+                        assert vf.get_candidates(req) == f.get_candidates(req)
+
+
+def test_vectorised_small_projects():
+    files = [MyCandidate("proj-1.0.tar.gz", "", False)]
+    vf = VectorisedFinder(sources=[lambda name: files])
+    assert vf.min_candidates > 1
+    assert vf.get_candidates(Requirement("proj")) == files
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_vectorised_arbitrary_equality(reverse):
+    files = [
+        MyCandidate("proj-0.2.0-py3-none-any.whl", ">=3.9", False),
+        MyCandidate("proj-0.2-cp38-cp38-win32.whl", "", False),
+    ]
+    if reverse:
+        files.reverse()
+    vf = VectorisedFinder(
+        sources=[lambda name: files],
+        compatibility_tags=[Tag("cp38", "cp38", "win32"), Tag("py3", "none", "any")],
+        python_version=Version("2.7"),
+        min_candidates=0,
+    )
+    assert vf.get_candidates(Requirement("proj===0.2")) == [files[not reverse]]